@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+# class holding a rate schedule as a matrix with one row per lookup key and one
+# column per year, so the rates applicable to any number of measures are
+# gathered by row rather than filtered from the table for every measure. rates
+# of rows sharing a lookup key and year are summed, as are their present values
+# when calculated row by row, and years without rates hold zero:
+class AnnualRates:
+    lookup_key = []
+    lookup_key_index = None
+    years = None
+    rates = None
+    rate_counts = None
+
+    def __init__(self, rate_schedule, lookup_key, rate_column):
+        ### parameters:
+        ###     rate_schedule : a pandas DataFrame with lookup key and
+        ###         'ApplicableYear' as either columns or index levels, such as
+        ###         the 'data' variable of a 'RateScheduleElectric' or
+        ###         'RateScheduleGas' object
+        ###     lookup_key : a list of column names matching input measures to
+        ###         rows of the rate schedule
+        ###     rate_column : the name of the column of rates, either
+        ###         'ElectricRate' or 'GasRate'
+
+        if any(name is not None for name in rate_schedule.index.names):
+            rate_schedule = rate_schedule.reset_index()
+        rate_schedule = rate_schedule[rate_schedule.ApplicableYear.notna()]
+
+        self.lookup_key = lookup_key
+        self.lookup_key_index = pd.MultiIndex.from_frame(
+            rate_schedule[lookup_key].drop_duplicates()
+        )
+        key_codes = self.lookup_key_index.get_indexer(
+            pd.MultiIndex.from_frame(rate_schedule[lookup_key])
+        )
+        years = rate_schedule.ApplicableYear.to_numpy(dtype=float)
+        first_year = years.min() if len(years) > 0 else 0
+        self.years = np.arange(first_year, years.max() + 1 if len(years) > 0 else 0)
+
+        # the last row holds no rates, for measures with keys not in the
+        # schedule:
+        shape = (len(self.lookup_key_index) + 1, len(self.years))
+        columns = (years - first_year).astype(int)
+        self.rates = np.zeros(shape)
+        np.add.at(
+            self.rates,
+            (key_codes, columns),
+            np.nan_to_num(rate_schedule[rate_column].to_numpy(dtype=float))
+        )
+        self.rate_counts = np.zeros(shape, dtype=np.int64)
+        np.add.at(self.rate_counts, (key_codes, columns), 1)
+
+    def key_codes(self, keys):
+        ### returns an array of the rows of the rate matrices matching a
+        ### pandas DataFrame of lookup keys, with the columns of 'lookup_key',
+        ### one per measure
+        codes = self.lookup_key_index.get_indexer(
+            pd.MultiIndex.from_frame(keys[self.lookup_key])
+        )
+        return np.where(codes < 0, len(self.lookup_key_index), codes)
@@ -0,0 +1,141 @@
+import hashlib, json, os, shutil, tempfile
+import numpy as np
+import pandas as pd
+
+# helper function to dictionary-encode a non-numeric column, returning integer
+# codes and the categorical dtype they index. categorical columns keep their
+# own codes and categories, and other columns are factorized in order of
+# appearance. codes are returned in the integer width pandas keeps for the
+# number of categories, so 'pandas.Categorical.from_codes' wraps arrays read
+# back from shared or mapped memory without copying them. a column's codes
+# are then reached through 'Series.array.codes', which stays backed by the
+# mapped memory, whereas 'Series.cat.codes' returns a copy:
+def dictionary_encode(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.array.codes
+        categorical_dtype = series.dtype
+    else:
+        codes, uniques = pd.factorize(series)
+        categorical_dtype = pd.CategoricalDtype(np.asarray(uniques))
+    return pd.Categorical.from_codes(codes, dtype=categorical_dtype).codes, categorical_dtype
+
+# compact binary store of an avoided cost table on disk, with each numeric
+# column saved as a fixed-width numpy array and each other column saved as
+# integer codes into a dictionary of its distinct values. the arrays are
+# memory-mapped read-only, so the operating system shares one copy of the
+# table's pages among the main process and all worker processes. stores
+# written by 'write_by_content' are named by a digest of the table, so mapped
+# arrays are never overwritten while another scenario reads them. all but the
+# 'max_stores' most recently used stores in a directory are removed as new
+# stores are written; processes already mapping a removed store keep reading
+# it until they unmap it:
+class AvoidedCostStore:
+    directory = ''
+    manifest_file_name = 'manifest.json'
+    manifest = []
+    max_stores = 2
+
+    def __init__(self, directory):
+        ### parameters:
+        ###     directory : a string containing the path of a directory written
+        ###         by 'AvoidedCostStore.write'
+
+        self.directory = directory
+        with open(os.path.join(self.directory, self.manifest_file_name)) as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def write(cls, data, directory):
+        ### writes the columns of a pandas DataFrame to the directory and
+        ### returns an 'AvoidedCostStore' reading them
+        os.makedirs(directory, exist_ok=True)
+        manifest = []
+        for position, column in enumerate(data.columns):
+            if data[column].dtype.kind in 'biuf':
+                values = data[column].to_numpy()
+                categories = None
+            else:
+                values, categorical_dtype = dictionary_encode(data[column])
+                categories = categorical_dtype.categories.tolist()
+            file_name = 'column_{}.npy'.format(position)
+            np.save(os.path.join(directory, file_name), values)
+            manifest.append({
+                'column'     : column,
+                'file_name'  : file_name,
+                'categories' : categories,
+            })
+        # write the manifest last, so an interrupted write is not read:
+        temporary_path = os.path.join(directory, cls.manifest_file_name + '.tmp')
+        with open(temporary_path, 'w') as f:
+            json.dump(manifest, f, default=str)
+        os.replace(temporary_path, os.path.join(directory, cls.manifest_file_name))
+        return cls(directory)
+
+    @classmethod
+    def content_key(cls, data):
+        ### returns a hexadecimal digest of the column names, dtypes, and
+        ### values of a pandas DataFrame
+        digest = hashlib.sha256()
+        digest.update(repr([(column, str(dtype)) for column, dtype in data.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def write_by_content(cls, data, directory, max_stores=None):
+        ### writes the columns of a pandas DataFrame to a subdirectory of the
+        ### directory named by its 'content_key', unless a store of the same
+        ### table is already there, and returns an 'AvoidedCostStore' reading
+        ### them. the store is written to a temporary directory and renamed
+        ### into place, so it is only ever seen complete. stores beyond the
+        ### 'max_stores' most recently used are then removed
+        path = os.path.join(directory, cls.content_key(data))
+        if os.path.exists(os.path.join(path, cls.manifest_file_name)):
+            # mark as recently used for eviction:
+            os.utime(path)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            temporary_path = tempfile.mkdtemp(prefix='.tmp_', dir=directory)
+            cls.write(data, temporary_path)
+            try:
+                os.rename(temporary_path, path)
+            except OSError:
+                # the same table was stored meanwhile by another scenario:
+                shutil.rmtree(temporary_path)
+        store = cls(path)
+        cls.evict(directory, cls.max_stores if max_stores is None else max_stores, keep=path)
+        return store
+
+    @classmethod
+    def stores(cls, directory):
+        ### returns the paths of the complete stores written to the directory
+        ### by 'write_by_content', least recently used first
+        paths = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if not name.startswith('.') and
+            os.path.exists(os.path.join(directory, name, cls.manifest_file_name))
+        ]
+        return sorted(paths, key=lambda path: os.stat(path).st_mtime)
+
+    @classmethod
+    def evict(cls, directory, max_stores, keep=None):
+        ### removes the least recently used stores in the directory, other
+        ### than 'keep', until at most 'max_stores' remain
+        stores = [path for path in cls.stores(directory) if path != keep]
+        number_to_remove = len(stores) + (keep is not None) - max(max_stores, 1)
+        for path in stores[:max(number_to_remove, 0)]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def read(self):
+        ### returns a pandas DataFrame whose columns are backed by read-only
+        ### memory maps of the stored arrays, with dictionary-encoded columns
+        ### as pandas Categorical columns whose codes are the mapped arrays
+        columns = {}
+        for entry in self.manifest:
+            # plain ndarray views of the maps, so results computed from the
+            #     columns are not typed as memory maps:
+            values = np.load(os.path.join(self.directory, entry['file_name']), mmap_mode='r').view(np.ndarray)
+            if entry['categories'] is None:
+                columns[entry['column']] = values
+            else:
+                columns[entry['column']] = pd.Categorical.from_codes(values, entry['categories'])
+        return pd.DataFrame(columns, copy=False)
@@ -1,7 +1,9 @@
 import os, types, numpy as np, pandas as pd
 from datetime import datetime as dt
-import measure_calculations, measure_calculations_match_sql
+import measure_calculations, measure_calculations_match_sql, \
+    measure_calculations_vectorized, measure_calculations_fused
 import multiprocessing_helper, multiprocessing_helper_match_sql
+from program_costs import ProgramCosts
 
 import dill as pickle
 
@@ -15,6 +17,16 @@ def calculate_measure_cost_effectiveness(cet_scenario):
     ### outputs:
     ###     pandas DataFrame with measure-level cost-effectiveness outputs
 
+    # parallelized stages run on the scenario's worker pool, which is stopped
+    # once the calculations complete or fail unless it was already running:
+    stop_worker_pool = cet_scenario.parallelize and cet_scenario.WorkerPool is None
+    try:
+        return calculate_measure_outputs(cet_scenario)
+    finally:
+        if stop_worker_pool:
+            cet_scenario.stop_worker_pool()
+
+def calculate_measure_outputs(cet_scenario):
     if cet_scenario.match_sql:
         mc = measure_calculations_match_sql
         mp = multiprocessing_helper_match_sql
@@ -22,23 +34,92 @@ def calculate_measure_cost_effectiveness(cet_scenario):
         mc = measure_calculations
         mp = multiprocessing_helper
 
+    # array-based calculations only reproduce the standard calculations, not
+    # those matching the sql version of the cet:
+    vectorize = cet_scenario.vectorize and not cet_scenario.match_sql
+    group_by_lookup_key = cet_scenario.group_by_lookup_key and not cet_scenario.match_sql
+    cumulative_sums = cet_scenario.cumulative_sums and not cet_scenario.match_sql
+    vc = measure_calculations_vectorized
+
+    # precomputed discount factors are likewise only used by the standard
+    # calculations:
+    if cet_scenario.match_sql:
+        discount_factors = {}
+    else:
+        discount_factors = {'discount_factors' : cet_scenario.DiscountFactors}
+
+    # optionally calculate all measure-level outputs in a fused evaluation on
+    #     the array-based calculations grouped by lookup key, which runs in a
+    #     single process and only reproduces the standard calculations:
+    if cet_scenario.fuse_stages:
+        conflicting_flags = [
+            flag for flag in ['match_sql','parallelize','cumulative_sums']
+            if getattr(cet_scenario, flag)
+        ]
+        if conflicting_flags:
+            raise ValueError(
+                'fuse_stages cannot be combined with {}'.format(', '.join(conflicting_flags))
+            )
+        t_fused = dt.now()
+        outputs = measure_calculations_fused.calculate_measure_outputs(
+            cet_scenario.InputMeasures,
+            cet_scenario.InputPrograms,
+            cet_scenario.AvoidedCostElectric,
+            cet_scenario.AvoidedCostGas,
+            cet_scenario.Emissions,
+            cet_scenario.CombustionTypes,
+            cet_scenario.RateScheduleElectric,
+            cet_scenario.RateScheduleGas,
+            cet_scenario.Settings,
+            cet_scenario.first_year,
+            **discount_factors
+        )
+        calculation_time = (dt.now() - t_fused).total_seconds()
+        cet_scenario.calculation_times['fused_stages'] = calculation_time
+        print('< Fused Measure Calculation Time: {:.3f} seconds >'.format(calculation_time))
+        return outputs
+
     if cet_scenario.parallelize:
-        # create objects without pyodbc connections:
+        # all parallelized stages run on the scenario's worker pool, started
+        # here unless already running, with reference tables preloaded in each
+        # worker and passed to tasks by name:
+        cet_scenario.start_worker_pool()
+        worker_pool = cet_scenario.WorkerPool
         InputMeasuresData = cet_scenario.InputMeasures.data
-        Emissions = mp.EmissionsTable(cet_scenario.Emissions.data)
-        CombustionTypes = mp.CombustionTypesTable(cet_scenario.CombustionTypes.data)
-        Settings = mp.SettingsTable(cet_scenario.Settings.data)
-        AvoidedCostElectric = mp.AvoidedCostElectricTable(cet_scenario.AvoidedCostElectric.data)
-        AvoidedCostGas = mp.AvoidedCostGasTable(cet_scenario.AvoidedCostGas.data)
+        Emissions = worker_pool.tables['Emissions']
+        CombustionTypes = worker_pool.tables['CombustionTypes']
+        Settings = worker_pool.tables['Settings']
+        AvoidedCostElectric = worker_pool.tables['AvoidedCostElectric']
+        AvoidedCostGas = worker_pool.tables['AvoidedCostGas']
+        RateScheduleElectric = worker_pool.tables['RateScheduleElectric']
+        RateScheduleGas = worker_pool.tables['RateScheduleGas']
+        if cet_scenario.match_sql:
+            worker_discount_factors = {}
+        else:
+            worker_discount_factors = {'discount_factors' : worker_pool.tables['DiscountFactors']}
 
         # run parallelized apply functions:
         ## avoided costs:
         t_acce = dt.now()
-        avoided_electric_costs = mp.MultiprocessingAvoidedCosts(InputMeasuresData, AvoidedCostElectric, Settings, cet_scenario.first_year, mc.calculate_avoided_electric_costs).calculate()
+        if group_by_lookup_key:
+            avoided_electric_costs = vc.calculate_avoided_electric_costs_by_lookup_key(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif cumulative_sums:
+            avoided_electric_costs = vc.calculate_avoided_electric_costs_from_cumulative_sums(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif vectorize:
+            avoided_electric_costs = vc.calculate_avoided_electric_costs(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        else:
+            avoided_electric_costs = mp.MultiprocessingAvoidedCosts(InputMeasuresData, AvoidedCostElectric, Settings, cet_scenario.first_year, mc.calculate_avoided_electric_costs, worker_pool=worker_pool, **worker_discount_factors).calculate()
         cet_scenario.calculation_times['avoided_electric_costs'] = (dt.now() - t_acce).total_seconds()
 
         t_accg = dt.now()
-        avoided_gas_costs = mp.MultiprocessingAvoidedCosts(InputMeasuresData, AvoidedCostGas, Settings, cet_scenario.first_year, mc.calculate_avoided_gas_costs).calculate()
+        if group_by_lookup_key:
+            avoided_gas_costs = vc.calculate_avoided_gas_costs_by_lookup_key(cet_scenario.InputMeasures, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif cumulative_sums:
+            avoided_gas_costs = vc.calculate_avoided_gas_costs_from_cumulative_sums(cet_scenario.InputMeasures, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif vectorize:
+            avoided_gas_costs = vc.calculate_avoided_gas_costs(cet_scenario.InputMeasures, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        else:
+            avoided_gas_costs = mp.MultiprocessingAvoidedCosts(InputMeasuresData, AvoidedCostGas, Settings, cet_scenario.first_year, mc.calculate_avoided_gas_costs, worker_pool=worker_pool, **worker_discount_factors).calculate()
         cet_scenario.calculation_times['avoided_gas_costs'] = (dt.now() - t_accg).total_seconds()
 
         calculation_time = sum([cet_scenario.calculation_times[s] for s in ['avoided_electric_costs','avoided_gas_costs']])
@@ -46,7 +127,10 @@ def calculate_measure_cost_effectiveness(cet_scenario):
 
         ## emissions reductions:
         t_emiss = dt.now()
-        emissions_reductions = mp.MultiprocessingEmissionsReductions(InputMeasuresData, AvoidedCostElectric, Emissions, CombustionTypes, Settings, mc.calculate_emissions_reductions).calculate()
+        if vectorize:
+            emissions_reductions = vc.calculate_emissions_reductions(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Emissions, cet_scenario.CombustionTypes, cet_scenario.Settings)
+        else:
+            emissions_reductions = mp.MultiprocessingEmissionsReductions(InputMeasuresData, AvoidedCostElectric, Emissions, CombustionTypes, Settings, mc.calculate_emissions_reductions, worker_pool=worker_pool).calculate()
         calculation_time = (dt.now() - t_emiss).total_seconds()
         cet_scenario.calculation_times['emissions_reductions'] = calculation_time
         print('< Emissions Reductions Calculation Time with Parallelization: {:.3f} seconds >'.format(calculation_time))
@@ -55,13 +139,27 @@ def calculate_measure_cost_effectiveness(cet_scenario):
         # run standard serial apply functions:
         ## avoided costs:
         t_acce = dt.now()
-        f = lambda r: mc.calculate_avoided_electric_costs(r, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year)
-        avoided_electric_costs = cet_scenario.InputMeasures.data.apply(f, axis='columns')
+        if group_by_lookup_key:
+            avoided_electric_costs = vc.calculate_avoided_electric_costs_by_lookup_key(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif cumulative_sums:
+            avoided_electric_costs = vc.calculate_avoided_electric_costs_from_cumulative_sums(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif vectorize:
+            avoided_electric_costs = vc.calculate_avoided_electric_costs(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        else:
+            f = lambda r: mc.calculate_avoided_electric_costs(r, cet_scenario.AvoidedCostElectric, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+            avoided_electric_costs = cet_scenario.InputMeasures.data.apply(f, axis='columns')
         cet_scenario.calculation_times['avoided_electric_costs'] = (dt.now() - t_acce).total_seconds()
 
         t_accg = dt.now()
-        f = lambda r: mc.calculate_avoided_gas_costs(r, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year)
-        avoided_gas_costs = cet_scenario.InputMeasures.data.apply(f, axis='columns')
+        if group_by_lookup_key:
+            avoided_gas_costs = vc.calculate_avoided_gas_costs_by_lookup_key(cet_scenario.InputMeasures, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif cumulative_sums:
+            avoided_gas_costs = vc.calculate_avoided_gas_costs_from_cumulative_sums(cet_scenario.InputMeasures, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        elif vectorize:
+            avoided_gas_costs = vc.calculate_avoided_gas_costs(cet_scenario.InputMeasures, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        else:
+            f = lambda r: mc.calculate_avoided_gas_costs(r, cet_scenario.AvoidedCostGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+            avoided_gas_costs = cet_scenario.InputMeasures.data.apply(f, axis='columns')
         cet_scenario.calculation_times['avoided_gas_costs'] = (dt.now() - t_accg).total_seconds()
 
         calculation_time = sum([cet_scenario.calculation_times[s] for s in ['avoided_electric_costs','avoided_gas_costs']])
@@ -69,8 +167,11 @@ def calculate_measure_cost_effectiveness(cet_scenario):
 
         ## emissions reductions:
         t_emiss = dt.now()
-        f = lambda r: mc.calculate_emissions_reductions(r, cet_scenario.AvoidedCostElectric, cet_scenario.Emissions, cet_scenario.CombustionTypes, cet_scenario.Settings)
-        emissions_reductions = cet_scenario.InputMeasures.data.apply(f, axis='columns')
+        if vectorize:
+            emissions_reductions = vc.calculate_emissions_reductions(cet_scenario.InputMeasures, cet_scenario.AvoidedCostElectric, cet_scenario.Emissions, cet_scenario.CombustionTypes, cet_scenario.Settings)
+        else:
+            f = lambda r: mc.calculate_emissions_reductions(r, cet_scenario.AvoidedCostElectric, cet_scenario.Emissions, cet_scenario.CombustionTypes, cet_scenario.Settings)
+            emissions_reductions = cet_scenario.InputMeasures.data.apply(f, axis='columns')
         calculation_time  = (dt.now() - t_emiss).total_seconds()
         print('< Emissions Reductions Calculation Time without Parallelization: {:.3f} seconds >'.format(calculation_time))
 
@@ -96,28 +197,43 @@ def calculate_measure_cost_effectiveness(cet_scenario):
 
     programs = cet_scenario.InputPrograms.data.merge(benefit_sums, on=['ProgramID','Qi'])
 
+    # the present value of program costs and program totals are calculated
+    #     once for all measures and looked up by the standard cost tests:
+    if cet_scenario.match_sql:
+        program_costs = {}
+    else:
+        program_costs = {'program_costs' : ProgramCosts(measures, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)}
+
     if cet_scenario.parallelize:
         t_trc = dt.now()
-        total_resource_cost_test_results = mp.MultiprocessingCostTest(measures, programs, Settings, cet_scenario.first_year, mc.total_resource_cost_test).calculate()
+        if vectorize:
+            total_resource_cost_test_results = vc.total_resource_cost_test(measures, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors, **program_costs)
+        else:
+            total_resource_cost_test_results = mp.MultiprocessingCostTest(measures, programs, Settings, cet_scenario.first_year, mc.total_resource_cost_test, worker_pool=worker_pool, **worker_discount_factors, **program_costs).calculate()
         cet_scenario.calculation_times['total_resource_cost_test'] = (dt.now() - t_trc).total_seconds()
         t_pac = dt.now()
-        program_administrator_cost_test_results = mp.MultiprocessingCostTest(measures, programs, Settings, cet_scenario.first_year, mc.program_administrator_cost_test).calculate()
+        if vectorize:
+            program_administrator_cost_test_results = vc.program_administrator_cost_test(measures, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors, **program_costs)
+        else:
+            program_administrator_cost_test_results = mp.MultiprocessingCostTest(measures, programs, Settings, cet_scenario.first_year, mc.program_administrator_cost_test, worker_pool=worker_pool, **worker_discount_factors, **program_costs).calculate()
         cet_scenario.calculation_times['program_administrator_cost_test'] = (dt.now() - t_pac).total_seconds()
 
-        RateScheduleElectric = mp.RateScheduleElectricTable(cet_scenario.RateScheduleElectric.data)
-        RateScheduleGas = mp.RateScheduleGasTable(cet_scenario.RateScheduleGas.data)
-
         measures = measures.merge(program_administrator_cost_test_results,on='CET_ID')
 
         t_rim = dt.now()
-        ratepayer_impact_measure_results = mp.MultiprocessingRatepayerImpactMeasure(
-            measures,
-            RateScheduleElectric,
-            RateScheduleGas,
-            Settings,
-            cet_scenario.first_year,
-            mc.ratepayer_impact_measure
-        ).calculate()
+        if vectorize:
+            ratepayer_impact_measure_results = vc.ratepayer_impact_measure(measures, cet_scenario.RateScheduleElectric, cet_scenario.RateScheduleGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        else:
+            ratepayer_impact_measure_results = mp.MultiprocessingRatepayerImpactMeasure(
+                measures,
+                RateScheduleElectric,
+                RateScheduleGas,
+                Settings,
+                cet_scenario.first_year,
+                mc.ratepayer_impact_measure,
+                worker_pool=worker_pool,
+                **worker_discount_factors
+            ).calculate()
         cet_scenario.calculation_times['ratepayer_impact_measure'] = (dt.now() - t_pac).total_seconds()
 
         calculation_time = sum([cet_scenario.calculation_times[s] for s in ['total_resource_cost_test','program_administrator_cost_test','ratepayer_impact_measure']])
@@ -126,20 +242,29 @@ def calculate_measure_cost_effectiveness(cet_scenario):
 
     else:
         t_trc = dt.now()
-        f = lambda r: mc.total_resource_cost_test(r, programs, cet_scenario.Settings, cet_scenario.first_year)
-        total_resource_cost_test_results = measures.apply(f, axis='columns')
+        if vectorize:
+            total_resource_cost_test_results = vc.total_resource_cost_test(measures, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors, **program_costs)
+        else:
+            f = lambda r: mc.total_resource_cost_test(r, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors, **program_costs)
+            total_resource_cost_test_results = measures.apply(f, axis='columns')
         cet_scenario.calculation_times['total_resource_cost_test'] = (dt.now() - t_trc).total_seconds()
 
         t_pac = dt.now()
-        f = lambda r: mc.program_administrator_cost_test(r, programs, cet_scenario.Settings, cet_scenario.first_year)
-        program_administrator_cost_test_results = measures.apply(f, axis='columns')
+        if vectorize:
+            program_administrator_cost_test_results = vc.program_administrator_cost_test(measures, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors, **program_costs)
+        else:
+            f = lambda r: mc.program_administrator_cost_test(r, programs, cet_scenario.Settings, cet_scenario.first_year, **discount_factors, **program_costs)
+            program_administrator_cost_test_results = measures.apply(f, axis='columns')
         cet_scenario.calculation_times['program_administrator_cost_test'] = (dt.now() - t_pac).total_seconds()
 
         measures = measures.merge(program_administrator_cost_test_results,on='CET_ID')
 
         t_rim = dt.now()
-        f = lambda r: mc.ratepayer_impact_measure(r,cet_scenario.RateScheduleElectric,cet_scenario.RateScheduleGas,cet_scenario.Settings,cet_scenario.first_year)
-        ratepayer_impact_measure_results = measures.apply(f, axis='columns')
+        if vectorize:
+            ratepayer_impact_measure_results = vc.ratepayer_impact_measure(measures, cet_scenario.RateScheduleElectric, cet_scenario.RateScheduleGas, cet_scenario.Settings, cet_scenario.first_year, **discount_factors)
+        else:
+            f = lambda r: mc.ratepayer_impact_measure(r,cet_scenario.RateScheduleElectric,cet_scenario.RateScheduleGas,cet_scenario.Settings,cet_scenario.first_year,**discount_factors)
+            ratepayer_impact_measure_results = measures.apply(f, axis='columns')
         cet_scenario.calculation_times['ratepayer_impact_measure'] = (dt.now() - t_pac).total_seconds()
 
         calculation_time = sum([cet_scenario.calculation_times[s] for s in ['total_resource_cost_test','program_administrator_cost_test','ratepayer_impact_measure']])
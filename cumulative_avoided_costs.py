@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+# class holding cumulative sums of avoided cost series for each lookup key, so
+# the sum of a series over any contiguous range of quarters is the difference
+# of two cumulative values rather than a sum over every quarter in the range:
+class CumulativeAvoidedCosts:
+    lookup_key = []
+    lookup_key_index = None
+    discount_factors = None
+    first_quarter = None
+    quarter_span = None
+    sort_keys = None
+    cumulative_sums = {}
+
+    def __init__(self, avoided_costs, lookup_key, discounted_columns, undiscounted_columns=[], discount_factors=None):
+        ### parameters:
+        ###     avoided_costs : a pandas DataFrame with lookup key and quarter
+        ###         index 'Qi' as either columns or index levels, such as the
+        ###         'data' variable of an 'AvoidedCostElectric' or
+        ###         'AvoidedCostGas' object
+        ###     lookup_key : a list of column names matching input measures to
+        ###         rows of the avoided cost table
+        ###     discounted_columns : a list of column names whose values are
+        ###         divided by the quarterly discount before summing
+        ###     undiscounted_columns : a list of column names summed without
+        ###         discounting
+        ###     discount_factors : an instance of class 'DiscountFactors'
+        ###         providing quarterly discount divisors by program
+        ###         administrator
+
+        if any(name is not None for name in avoided_costs.index.names):
+            avoided_costs = avoided_costs.reset_index()
+        avoided_costs = avoided_costs.sort_values(lookup_key + ['Qi'], kind='stable')
+
+        self.lookup_key = lookup_key
+        self.discount_factors = discount_factors
+        self.lookup_key_index = pd.MultiIndex.from_frame(
+            avoided_costs[lookup_key].drop_duplicates()
+        )
+
+        # combine lookup key and quarter into one sorted numeric key:
+        key_codes = self.lookup_key_index.get_indexer(
+            pd.MultiIndex.from_frame(avoided_costs[lookup_key])
+        )
+        quarters = avoided_costs.Qi.to_numpy(dtype=float)
+        self.first_quarter = quarters.min() if len(quarters) > 0 else 0
+        self.quarter_span = (quarters.max() - self.first_quarter + 2) if len(quarters) > 0 else 1
+        self.sort_keys = key_codes * self.quarter_span + (quarters - self.first_quarter)
+
+        if discount_factors is not None and len(quarters) > 0:
+            quarterly_discount = discount_factors.quarterly_array(
+                avoided_costs.ProgramAdministrator.to_numpy(),
+                quarters
+            )
+        else:
+            quarterly_discount = np.ones(len(quarters))
+
+        # cumulative sums begin with zero, so the sum over positions [a, b) is
+        # cumulative_sum[b] - cumulative_sum[a]:
+        self.cumulative_sums = {}
+        for name in discounted_columns:
+            values = avoided_costs[name].to_numpy(dtype=float)
+            self.cumulative_sums[name] = np.concatenate([[0.0], np.cumsum(values / quarterly_discount)])
+        for name in undiscounted_columns:
+            values = avoided_costs[name].to_numpy(dtype=float)
+            self.cumulative_sums[name] = np.concatenate([[0.0], np.cumsum(values)])
+
+    def key_codes(self, measures):
+        ### returns an array of integer codes of each measure's lookup key, or
+        ### -1 where the avoided cost table has no rows for the key
+        return self.lookup_key_index.get_indexer(
+            pd.MultiIndex.from_frame(measures[self.lookup_key])
+        )
+
+    def range_sums(self, name, key_codes, first_quarters, last_quarters):
+        ### returns an array of sums of the named series over quarters
+        ### first_quarters through last_quarters inclusive, for each lookup key
+        ### code; empty ranges and unknown keys sum to zero
+        first_quarters = np.maximum(np.asarray(first_quarters, dtype=float), self.first_quarter)
+        last_quarters = np.minimum(np.asarray(last_quarters, dtype=float), self.first_quarter + self.quarter_span - 2)
+        valid = (key_codes >= 0) & (first_quarters <= last_quarters)
+        start = np.searchsorted(
+            self.sort_keys,
+            key_codes * self.quarter_span + (first_quarters - self.first_quarter),
+            side='left'
+        )
+        end = np.searchsorted(
+            self.sort_keys,
+            key_codes * self.quarter_span + (last_quarters - self.first_quarter),
+            side='right'
+        )
+        cumulative_sum = self.cumulative_sums[name]
+        return np.where(valid, cumulative_sum[end] - cumulative_sum[start], 0.0)
+
+    def present_values(self, name, key_codes, measure_quarter, eulq, eulq_1, eulq_2, savings_1, savings_2):
+        ### parameters:
+        ###     name : the name of a cumulative series
+        ###     key_codes : array of lookup key codes from 'key_codes'
+        ###     measure_quarter : array of measure installation quarter indices
+        ###     eulq : array of measure effective useful lives in quarters,
+        ###         bounding the window [int(Qi), int(Qi + EULq)) of avoided
+        ###         cost quarters attributed to each measure
+        ###     eulq_1, eulq_2 : arrays of first and second baseline useful
+        ###         lives in quarters
+        ###     savings_1, savings_2 : arrays of first and second baseline
+        ###         annual savings
+        ###
+        ### returns:
+        ###     numpy array with, for each measure, the sum over its window of
+        ###     the named series weighted by the savings rate of
+        ###     'quarter_calculations_vectorized.savings_rate', evaluated as
+        ###     two contiguous quarter ranges and two partial quarters
+
+        measure_quarter = np.asarray(measure_quarter, dtype=float)
+        eulq_1 = np.asarray(eulq_1, dtype=float)
+        eulq_2 = np.asarray(eulq_2, dtype=float)
+        savings_1 = np.asarray(savings_1, dtype=float)
+        savings_2 = np.asarray(savings_2, dtype=float)
+
+        measure_phase_1 = measure_quarter + eulq_1
+        measure_phase_2 = measure_quarter + eulq_2
+        fraction_1 = eulq_1 % 1
+        fraction_2 = eulq_2 % 1
+
+        window_start = np.trunc(measure_quarter)
+        window_end = np.trunc(measure_quarter + np.asarray(eulq, dtype=float)) - 1
+
+        window_sums = lambda first, last: self.range_sums(
+            name,
+            key_codes,
+            np.maximum(first, window_start),
+            np.minimum(last, window_end)
+        )
+
+        # quarters in [install, phase 1 - 1] at first baseline savings:
+        present_values = savings_1 * window_sums(
+            np.ceil(measure_quarter),
+            np.floor(measure_phase_1 - 1)
+        )
+
+        # the quarter strictly between phase 1 - 1 and phase 1, if any:
+        partial_quarter_1 = np.floor(measure_phase_1)
+        has_partial_quarter_1 = measure_phase_1 % 1 != 0
+        present_values += np.where(
+            has_partial_quarter_1,
+            (savings_1 * fraction_1 + savings_2 * (1 - fraction_1)) *
+                window_sums(partial_quarter_1, partial_quarter_1),
+            0.0
+        )
+
+        # quarters in [phase 1, phase 2 - 1] at second baseline savings:
+        present_values += savings_2 * window_sums(
+            np.ceil(measure_phase_1),
+            np.floor(measure_phase_2 - 1)
+        )
+
+        # the quarter strictly between phase 2 - 1 and phase 2, if not already
+        # counted in an earlier period:
+        partial_quarter_2 = np.floor(measure_phase_2)
+        has_partial_quarter_2 = (
+            (measure_phase_2 % 1 != 0) &
+            ~((measure_quarter <= partial_quarter_2) & (partial_quarter_2 <= measure_phase_1 - 1)) &
+            ~((measure_phase_1 - 1 < partial_quarter_2) & (partial_quarter_2 < measure_phase_1))
+        )
+        present_values += np.where(
+            has_partial_quarter_2,
+            savings_2 * fraction_2 * window_sums(partial_quarter_2, partial_quarter_2),
+            0.0
+        )
+
+        return present_values
+
+def electric_cumulative_avoided_costs(avoided_cost_electric, discount_factors):
+    ### returns an instance of class 'CumulativeAvoidedCosts' with cumulative
+    ### present values of generation and transmission and distribution costs,
+    ### split by demand savings type, and cumulative CO2 if available, for a
+    ### pandas DataFrame such as the 'data' variable of an
+    ### 'AvoidedCostElectric' object
+    return CumulativeAvoidedCosts(
+        avoided_cost_electric.assign(
+            TDkWh = avoided_cost_electric.TD.where(avoided_cost_electric.DSType == 'kWh', 0),
+            TDkW = avoided_cost_electric.TD.where(avoided_cost_electric.DSType != 'kWh', 0)
+        ),
+        [
+            'ProgramAdministrator',
+            'ElectricTargetSector',
+            'ElectricEndUse',
+            'ClimateZone'
+        ],
+        ['Gen','TDkWh','TDkW'],
+        [c for c in ['CO2'] if c in avoided_cost_electric.columns],
+        discount_factors
+    )
+
+def gas_cumulative_avoided_costs(avoided_cost_gas, discount_factors):
+    ### returns an instance of class 'CumulativeAvoidedCosts' with cumulative
+    ### present values of gas costs, for a pandas DataFrame such as the 'data'
+    ### variable of an 'AvoidedCostGas' object
+    return CumulativeAvoidedCosts(
+        avoided_cost_gas,
+        [
+            'ProgramAdministrator',
+            'GasTargetSector',
+            'GasSavingsProfile'
+        ],
+        ['Cost'],
+        [],
+        discount_factors
+    )
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+# helper function to get the first settings row for each program administrator,
+# matching 'Settings.filter_by_measure(measure).iloc[0]':
+def first_settings_rows(Settings):
+    settings = Settings.data
+    if 'ProgramAdministrator' not in settings.columns:
+        settings = settings.reset_index()
+    return settings[~settings.ProgramAdministrator.duplicated(keep='first')]
+
+# class holding precomputed discount divisors for each program administrator,
+# so present value calculations look up
+#     (1 + DiscountRateQtr) ** (Qi - first_year * 4)
+# and
+#     (1 + DiscountRateAnnual) ** (year - first_year)
+# instead of exponentiating for every avoided cost, program, or rate row:
+class DiscountFactors:
+    first_year = None
+    first_quarter = None
+    last_quarter = None
+    quarterly_discount_rates = {}
+    annual_discount_rates = {}
+    program_administrator_codes = {}
+    quarterly_discounts = None
+    annual_discounts = None
+
+    def __init__(self, Settings, first_year, years_before=10, years_after=60):
+        ### parameters:
+        ###     Settings : an instance of a 'Settings' object of class
+        ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+        ###     first_year : an int representing the first year of programs in
+        ###         a cet run, i.e., the year to which values are discounted
+        ###     years_before : an int number of years prior to first_year
+        ###         covered by the lookup tables
+        ###     years_after : an int number of years following first_year
+        ###         covered by the lookup tables; periods outside the covered
+        ###         range are calculated by exponentiation
+
+        settings = first_settings_rows(Settings)
+
+        self.first_year = first_year
+        self.first_quarter = 4 * (first_year - years_before)
+        self.last_quarter = 4 * (first_year + years_after)
+        self.quarterly_discount_rates = dict(zip(
+            settings.ProgramAdministrator,
+            1 + settings.DiscountRateQtr.astype(float)
+        ))
+        self.annual_discount_rates = dict(zip(
+            settings.ProgramAdministrator,
+            1 + settings.DiscountRateAnnual.astype(float)
+        ))
+        self.program_administrator_codes = {
+            program_administrator : code for code, program_administrator
+            in enumerate(self.quarterly_discount_rates.keys())
+        }
+
+        # one row per program administrator, one column per quarter or year:
+        quarters = np.arange(self.first_quarter, self.last_quarter)
+        years = np.arange(self.first_quarter // 4, self.last_quarter // 4)
+        self.quarterly_discounts = np.array([
+            rate ** (quarters - first_year * 4)
+            for rate in self.quarterly_discount_rates.values()
+        ]).reshape(-1, len(quarters))
+        self.annual_discounts = np.array([
+            rate ** (years - first_year)
+            for rate in self.annual_discount_rates.values()
+        ]).reshape(-1, len(years))
+
+    def matches(self, Settings, first_year):
+        ### returns True if this instance can be reused for a run with the
+        ### given settings and first year
+        settings = first_settings_rows(Settings)
+        return (
+            first_year == self.first_year and
+            dict(zip(
+                settings.ProgramAdministrator,
+                1 + settings.DiscountRateQtr.astype(float)
+            )) == self.quarterly_discount_rates and
+            dict(zip(
+                settings.ProgramAdministrator,
+                1 + settings.DiscountRateAnnual.astype(float)
+            )) == self.annual_discount_rates
+        )
+
+    def equals(self, other):
+        ### returns True if another instance discounts to the same first year
+        ### at the same rates, whether or not it is the same object
+        return (
+            other is not None and
+            other.first_year == self.first_year and
+            other.quarterly_discount_rates == self.quarterly_discount_rates and
+            other.annual_discount_rates == self.annual_discount_rates
+        )
+
+    def quarterly(self, program_administrator, quarter):
+        ### returns (1 + DiscountRateQtr) ** (quarter - first_year * 4) for a
+        ### single program administrator and quarter index
+        offset = quarter - self.first_quarter
+        if offset == int(offset) and 0 <= offset < self.quarterly_discounts.shape[1]:
+            code = self.program_administrator_codes[program_administrator]
+            return self.quarterly_discounts[code, int(offset)]
+        return self.quarterly_discount_rates[program_administrator] ** (quarter - self.first_year * 4)
+
+    def annual(self, program_administrator, year):
+        ### returns (1 + DiscountRateAnnual) ** (year - first_year) for a
+        ### single program administrator and year
+        offset = year - self.first_quarter // 4
+        if offset == int(offset) and 0 <= offset < self.annual_discounts.shape[1]:
+            code = self.program_administrator_codes[program_administrator]
+            return self.annual_discounts[code, int(offset)]
+        return self.annual_discount_rates[program_administrator] ** (year - self.first_year)
+
+    def quarterly_array(self, program_administrators, quarters):
+        ### returns an array of quarterly discount divisors for arrays of
+        ### program administrators and quarter indices of equal length
+        quarters = np.asarray(quarters, dtype=float)
+        return self.lookup(
+            self.quarterly_discounts,
+            list(self.quarterly_discount_rates.values()),
+            self.program_administrator_code_array(program_administrators),
+            quarters - self.first_quarter,
+            quarters - self.first_year * 4
+        )
+
+    def annual_array(self, program_administrators, years):
+        ### returns an array of annual discount divisors for arrays of
+        ### program administrators and years of equal length
+        years = np.asarray(years, dtype=float)
+        return self.lookup(
+            self.annual_discounts,
+            list(self.annual_discount_rates.values()),
+            self.program_administrator_code_array(program_administrators),
+            years - self.first_quarter // 4,
+            years - self.first_year
+        )
+
+    def program_administrator_code_array(self, program_administrators):
+        # unknown program administrators are given a code past the last row
+        # of the lookup tables, and evaluate to NaN:
+        unknown = len(self.program_administrator_codes)
+        return pd.Series(np.asarray(program_administrators)).map(
+            self.program_administrator_codes
+        ).fillna(unknown).to_numpy(dtype=int)
+
+    def lookup(self, discounts, rates, codes, offsets, exponents):
+        # read covered periods from the lookup table and exponentiate the
+        # remainder:
+        covered = (
+            (codes < discounts.shape[0]) &
+            (offsets == np.floor(offsets)) &
+            (0 <= offsets) &
+            (offsets < discounts.shape[1])
+        )
+        rates = np.array(rates + [np.nan])
+        output = np.empty(len(codes))
+        output[covered] = discounts[codes[covered], offsets[covered].astype(int)]
+        output[~covered] = rates[codes[~covered]] ** exponents[~covered]
+        return output
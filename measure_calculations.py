@@ -3,7 +3,7 @@ import pandas as pd
 
 import quarter_calculations as qc
 
-def calculate_avoided_electric_costs(measure, AvoidedCostElectric, Settings, first_year):
+def calculate_avoided_electric_costs(measure, AvoidedCostElectric, Settings, first_year, discount_factors=None):
     ### parameters:
     ###     measure : a pandas Series containing a single row from the
     ###         'data' pandas DataFrame in an 'InputMeasures' object of class
@@ -14,6 +14,9 @@ def calculate_avoided_electric_costs(measure, AvoidedCostElectric, Settings, fir
     ###         or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year for the program
     ###         through which the input measure is implemented
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         shared across the cet run, from which discount divisors are
+    ###         looked up
     ###
     ### returns:
     ###     pandas Series containing calculated measure benefits due to avoided
@@ -26,10 +29,10 @@ def calculate_avoided_electric_costs(measure, AvoidedCostElectric, Settings, fir
         # filter settings table:
         settings = Settings.filter_by_measure(measure).iloc[0]
 
-        f = lambda r: qc.present_value_generation_benefits(r, measure, settings, first_year)
+        f = lambda r: qc.present_value_generation_benefits(r, measure, settings, first_year, discount_factors)
         present_value_generation_benefits = avoided_cost_electric.apply(f, axis='columns').aggregate(np.sum)
 
-        f = lambda r: qc.present_value_transmission_and_distribution_benefits(r, measure, settings, first_year)
+        f = lambda r: qc.present_value_transmission_and_distribution_benefits(r, measure, settings, first_year, discount_factors)
         present_value_transmission_and_distribution_benefits = avoided_cost_electric.apply(f, axis='columns').aggregate(np.sum)
     else:
         present_value_generation_benefits = 0
@@ -119,7 +122,7 @@ def calculate_avoided_electric_costs(measure, AvoidedCostElectric, Settings, fir
 
     return avoided_electric_costs
 
-def calculate_avoided_gas_costs(measure, AvoidedCostGas, Settings, first_year):
+def calculate_avoided_gas_costs(measure, AvoidedCostGas, Settings, first_year, discount_factors=None):
     ### parameters:
     ###     measure : a pandas Series containing a single row from the
     ###         'data' pandas DataFrame in an 'InputMeasures' object of class
@@ -128,6 +131,11 @@ def calculate_avoided_gas_costs(measure, AvoidedCostGas, Settings, first_year):
     ###         'EDCS_Table' or 'EDCS_Query_Results'
     ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
     ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measure is implemented
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         shared across the cet run, from which discount divisors are
+    ###         looked up
     ###
     ### returns:
     ###     pandas Series containing calculated measure benefits due to avoided
@@ -140,7 +148,7 @@ def calculate_avoided_gas_costs(measure, AvoidedCostGas, Settings, first_year):
         # filter settings table:
         settings = Settings.filter_by_measure(measure).iloc[0]
 
-        f = lambda r: qc.present_value_gas_benefits(r, measure, settings, first_year)
+        f = lambda r: qc.present_value_gas_benefits(r, measure, settings, first_year, discount_factors)
         pv_gas = avoided_cost_gas.apply(f,axis='columns').aggregate(np.sum)
     else:
         pv_gas = 0
@@ -370,7 +378,7 @@ def calculate_emissions_reductions(measure, AvoidedCostElectric, Emissions, Comb
 
     return emissions_reductions
 
-def total_resource_cost_test(measure, programs, Settings, first_year):
+def total_resource_cost_test(measure, programs, Settings, first_year, discount_factors=None, program_costs=None):
     ### parameters:
     ###     measure: a pandas Series containing a single row from a pandas
     ###         DataFrame representing a single input measure and corresponding
@@ -381,17 +389,26 @@ def total_resource_cost_test(measure, programs, Settings, first_year):
     ###         or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year of programs in a cet
     ###         run
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         shared across the cet run, from which discount divisors are
+    ###         looked up
+    ###     program_costs : an optional instance of class 'ProgramCosts' shared
+    ###         across the cost tests, from which the present value of program
+    ###         costs and program totals are looked up
     ###
     ### outputs:
     ###     float value of the total resource cost test for the given measure
     
-    # filter programs based on measure, both subtotals for measure's installation quarter and totals for all quarters:
-    sum_columns = ['ProgramID','Count','ElectricBenefitsGross','ElectricBenefitsNet','GasBenefitsGross','GasBenefitsNet']
-    program = programs.loc[(measure.ProgramID,slice(None)]
-    program_total = programs.loc[(measure.ProgramID,slice(None)][sum_columns].groupby('ProgramID').aggregate(np.sum).iloc[0]
+    # look up program totals if precomputed, otherwise filter programs based on measure, both subtotals for measure's installation quarter and totals for all quarters:
+    if program_costs is not None:
+        program_total = program_costs.lookup(measure)
+    else:
+        sum_columns = ['ProgramID','Count','ElectricBenefitsGross','ElectricBenefitsNet','GasBenefitsGross','GasBenefitsNet']
+        program = programs.get(programs.ProgramID == measure.ProgramID)
+        program_total = programs.get(programs.ProgramID == measure.ProgramID)[sum_columns].groupby('ProgramID').aggregate(np.sum).iloc[0]
 
     # filter settings based on measure:
-    settings = Settings.filter_by_measure(measure)
+    settings = Settings.filter_by_measure(measure).iloc[0]
 
     # get quarterly discount rate for exponentiation:
     quarterly_discount_rate = 1 + settings.DiscountRateQtr
@@ -400,19 +417,19 @@ def total_resource_cost_test(measure, programs, Settings, first_year):
     quarterly_measure_inflation_rate = 1 + measure.AnnualInflationRate / 4
 
     # calculate the present value of cost to external parties:
-    present_value_external_costs = qc.present_value_external_costs(measure, quarterly_discount_rate, first_year)
+    present_value_external_costs = qc.present_value_external_costs(measure, quarterly_discount_rate, first_year, discount_factors)
 
     # calculate the present value of the incremental cost of the measure:
-    present_value_gross_measure_cost = qc.present_value_gross_measure_cost(measure, quarterly_measure_inflation_rate, quarterly_discount_rate, first_year)
+    present_value_gross_measure_cost = qc.present_value_gross_measure_cost(measure, quarterly_measure_inflation_rate, quarterly_discount_rate, first_year, discount_factors)
 
     # calculate present value of up- and mid-stream incentives and direct installation costs:
-    present_value_incentives_and_direct_installation =  qc.present_value_incentives_and_direct_installation(measure, quarterly_discount_rate, first_year)
+    present_value_incentives_and_direct_installation =  qc.present_value_incentives_and_direct_installation(measure, quarterly_discount_rate, first_year, discount_factors)
 
     # calculate present value of rebates to end-user:
-    present_value_rebates = qc.present_value_rebates(measure, quarterly_discount_rate, first_year)
+    present_value_rebates = qc.present_value_rebates(measure, quarterly_discount_rate, first_year, discount_factors)
 
     # calculate incentives in excess of measure cost:
-    present_value_excess_incentives = qc.present_value_excess_incentives(measure, quarterly_discount_rate, first_year)
+    present_value_excess_incentives = qc.present_value_excess_incentives(measure, quarterly_discount_rate, first_year, discount_factors)
 
     present_value_gross_participant_costs = (
         present_value_gross_measure_cost -
@@ -448,8 +465,11 @@ def total_resource_cost_test(measure, programs, Settings, first_year):
         'UserInputIncentive',
         'CostsRecoveredFromOtherSources',
     ]
-    f = lambda r: r[program_cost_columns].sum() / quarterly_discount_rate ** (r.Qi - first_year * 4)
-    present_value_program_costs = program.apply(f, axis='columns').aggregate(np.sum)
+    if program_costs is not None:
+        present_value_program_costs = program_total.PresentValueProgramCosts
+    else:
+        f = lambda r: r[program_cost_columns].sum() / qc.quarterly_discount(measure, r.Qi, quarterly_discount_rate, first_year, discount_factors)
+        present_value_program_costs = program.apply(f, axis='columns').aggregate(np.sum)
 
     # weigh program costs based on measure gross savings, if possible, otherwise by install count:
     if program_total[['ElectricBenefitsGross','GasBenefitsGross']].sum() > 0:
@@ -525,7 +545,7 @@ def total_resource_cost_test(measure, programs, Settings, first_year):
         'TotalResourceCostRatioNoAdmin' : total_resource_cost_ratio_no_admin,
     })
 
-def program_administrator_cost_test(measure, programs, Settings, first_year):
+def program_administrator_cost_test(measure, programs, Settings, first_year, discount_factors=None, program_costs=None):
     ### parameters:
     ###     measure: a pandas Series containing a single row from a pandas
     ###         DataFrame representing a single input measure and corresponding
@@ -536,14 +556,23 @@ def program_administrator_cost_test(measure, programs, Settings, first_year):
     ###         or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year of programs in a cet
     ###         run
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         shared across the cet run, from which discount divisors are
+    ###         looked up
+    ###     program_costs : an optional instance of class 'ProgramCosts' shared
+    ###         across the cost tests, from which the present value of program
+    ###         costs and program totals are looked up
     ###
     ### outputs:
     ###     float value of the program administrator cost test for the given measure
 
-    # filter programs based on measure, both subtotals for measure's installation quarter and totals for all quarters:
-    sum_columns = ['ProgramID','Count','ElectricBenefitsGross','ElectricBenefitsNet','GasBenefitsGross','GasBenefitsNet']
-    program = programs.get(programs.ProgramID == measure.ProgramID)
-    program_total = programs.get(programs.ProgramID == measure.ProgramID)[sum_columns].groupby('ProgramID').aggregate(np.sum).iloc[0]
+    # look up program totals if precomputed, otherwise filter programs based on measure, both subtotals for measure's installation quarter and totals for all quarters:
+    if program_costs is not None:
+        program_total = program_costs.lookup(measure)
+    else:
+        sum_columns = ['ProgramID','Count','ElectricBenefitsGross','ElectricBenefitsNet','GasBenefitsGross','GasBenefitsNet']
+        program = programs.get(programs.ProgramID == measure.ProgramID)
+        program_total = programs.get(programs.ProgramID == measure.ProgramID)[sum_columns].groupby('ProgramID').aggregate(np.sum).iloc[0]
 
     # filter settings based on measure:
     settings = Settings.filter_by_measure(measure).iloc[0]
@@ -570,8 +599,11 @@ def program_administrator_cost_test(measure, programs, Settings, first_year):
         'UserInputIncentive',
         'CostsRecoveredFromOtherSources',
     ]
-    f = lambda r: r[program_cost_columns].sum() / quarterly_discount_rate ** (r.Qi - first_year * 4)
-    present_value_program_costs = program.apply(f, axis='columns').aggregate(np.sum)
+    if program_costs is not None:
+        present_value_program_costs = program_total.PresentValueProgramCosts
+    else:
+        f = lambda r: r[program_cost_columns].sum() / qc.quarterly_discount(measure, r.Qi, quarterly_discount_rate, first_year, discount_factors)
+        present_value_program_costs = program.apply(f, axis='columns').aggregate(np.sum)
 
     # weigh program costs based on measure gross savings, if possible, otherwise by install count:
     if program_total[['ElectricBenefitsNet','GasBenefitsNet']].sum() > 0:
@@ -583,7 +615,7 @@ def program_administrator_cost_test(measure, programs, Settings, first_year):
         program_weighting = 1 / program_total.Count
 
     # calculate the present value of cost to external parties:
-    present_value_external_costs = qc.present_value_external_costs(measure, quarterly_discount_rate, first_year)
+    present_value_external_costs = qc.present_value_external_costs(measure, quarterly_discount_rate, first_year, discount_factors)
 
     program_administrator_cost = (
         program_weighting *
@@ -619,7 +651,7 @@ def program_administrator_cost_test(measure, programs, Settings, first_year):
         'ProgramAdministratorCostRatioNoAdmin' : program_administrator_cost_ratio_no_admin,
     })
 
-def ratepayer_impact_measure(measure, RateScheduleElectric, RateScheduleGas, Settings, first_year):
+def ratepayer_impact_measure(measure, RateScheduleElectric, RateScheduleGas, Settings, first_year, discount_factors=None):
     ### parameters:
     ###     measure : a pandas Series containing a single row from the
     ###         'data' pandas DataFrame in an 'InputMeasures' object of class
@@ -633,6 +665,9 @@ def ratepayer_impact_measure(measure, RateScheduleElectric, RateScheduleGas, Set
     ###         or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year for the program
     ###         through which the input measure is implemented
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         shared across the cet run, from which discount divisors are
+    ###         looked up
     ###
     ### returns:
     ###     pandas Series containing the results of the Ratepayer Impact Measure
@@ -647,7 +682,7 @@ def ratepayer_impact_measure(measure, RateScheduleElectric, RateScheduleGas, Set
 
     # calculate electric ratepayer impact:
     if annual_electric_rates.size > 0:
-        f = lambda r: qc.present_value_bill_savings_electric(r, measure, settings, first_year)
+        f = lambda r: qc.present_value_bill_savings_electric(r, measure, settings, first_year, discount_factors)
 
         ratepayer_impact_electric = (
             measure[['Quantity','IRkWh','RRkWh']].product() *
@@ -659,7 +694,7 @@ def ratepayer_impact_measure(measure, RateScheduleElectric, RateScheduleGas, Set
 
     # calculate natural gas ratepayer impact:
     if annual_gas_rates.size > 0:
-        f = lambda r: qc.present_value_bill_savings_gas(r, measure, settings, first_year)
+        f = lambda r: qc.present_value_bill_savings_gas(r, measure, settings, first_year, discount_factors)
 
         ratepayer_impact_gas = (
             measure[['Quantity','IRTherm','RRTherm']].product() *
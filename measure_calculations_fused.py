@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+import measure_calculations_vectorized as vc
+from discount_factors import DiscountFactors
+from program_costs import ProgramCosts
+
+# columns of the avoided cost results carried into measure-level outputs and
+# program-level benefit sums:
+avoided_electric_cost_columns = [
+    'ElectricBenefitsGross',
+    'ElectricBenefitsNet',
+    'ElectricCostsGross',
+    'ElectricCostsNet',
+]
+avoided_gas_cost_columns = [
+    'GasBenefitsGross',
+    'GasBenefitsNet',
+    'GasCostsGross',
+    'GasCostsNet',
+]
+
+def calculate_measure_outputs(
+        InputMeasures,
+        InputPrograms,
+        AvoidedCostElectric,
+        AvoidedCostGas,
+        Emissions,
+        CombustionTypes,
+        RateScheduleElectric,
+        RateScheduleGas,
+        Settings,
+        first_year,
+        discount_factors=None,
+        batch_size=10000
+    ):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     InputPrograms : an instance of an 'InputPrograms' object
+    ###     AvoidedCostElectric, AvoidedCostGas, Emissions, CombustionTypes,
+    ###         RateScheduleElectric, RateScheduleGas, Settings : reference
+    ###         tables, as set up in 'tables'
+    ###     first_year : an int representing the first year of programs in a
+    ###         cet run
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         shared across the cet run; built from Settings if not provided
+    ###     batch_size : an int limiting the number of measures in each
+    ###         measures-by-quarters matrix, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure, in the order of
+    ###     the input measures and keyed by CET_ID, containing the avoided
+    ###     costs, emissions reductions, and cost test results of the standard
+    ###     calculations
+    ###
+    ### each block of electric avoided cost quarters is visited once per
+    ### lookup key to sum both the present values of electric benefits and the
+    ### electric savings weighed into emissions reductions, as in
+    ### 'measure_calculations_vectorized', and gas benefits likewise. the cost
+    ### tests then run over all measures as arrays. every stage returns its
+    ### results in the order of the input measures, so outputs are assembled
+    ### by row position rather than joined on CET_ID.
+
+    measures = vc.table_columns(InputMeasures.data).reset_index(drop=True)
+    avoided_cost_electric = vc.table_columns(AvoidedCostElectric.data)[
+        vc.electric_lookup_key + ['Qi','Gen','TD','DSType','CO2']
+    ]
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+
+    number_of_measures = len(measures.index)
+    present_value_generation_benefits = np.zeros(number_of_measures)
+    present_value_transmission_and_distribution_benefits = np.zeros(number_of_measures)
+    electric_savings_first_year = np.zeros(number_of_measures)
+    electric_savings_lifecycle = np.zeros(number_of_measures)
+    co2_first_year = np.zeros(number_of_measures)
+    co2_lifecycle = np.zeros(number_of_measures)
+
+    # electric benefits and emissions reductions from one pass over the
+    #     avoided cost quarters of each lookup key, sorted by quarter for the
+    #     first year of electric savings:
+    for measure_positions, avoided_cost_positions in vc.lookup_key_groups(measures, avoided_cost_electric, vc.electric_lookup_key, batch_size):
+        group = measures.iloc[measure_positions]
+        block = avoided_cost_electric.iloc[avoided_cost_positions]
+        block = block.iloc[np.argsort(block.Qi.to_numpy(dtype=float), kind='stable')]
+        (
+            present_value_generation_benefits[measure_positions],
+            present_value_transmission_and_distribution_benefits[measure_positions]
+        ) = vc.group_electric_benefits(group, block, discount_factors)
+        (
+            electric_savings_first_year[measure_positions],
+            electric_savings_lifecycle[measure_positions],
+            co2_first_year[measure_positions],
+            co2_lifecycle[measure_positions]
+        ) = vc.group_electric_savings(group, block)
+
+    avoided_electric_costs = vc.avoided_electric_costs_output(
+        measures,
+        present_value_generation_benefits,
+        present_value_transmission_and_distribution_benefits
+    )
+    emissions_reductions = vc.emissions_reductions_output(
+        measures,
+        Emissions,
+        CombustionTypes,
+        Settings,
+        electric_savings_first_year,
+        electric_savings_lifecycle,
+        co2_first_year,
+        co2_lifecycle
+    )
+    avoided_gas_costs = vc.calculate_avoided_gas_costs_by_lookup_key(
+        InputMeasures,
+        AvoidedCostGas,
+        Settings,
+        first_year,
+        discount_factors,
+        batch_size
+    )
+
+    # sum benefits by program and installation quarter:
+    measures = measures.assign(**{
+        column : avoided_electric_costs[column].to_numpy() for column in avoided_electric_cost_columns
+    }, **{
+        column : avoided_gas_costs[column].to_numpy() for column in avoided_gas_cost_columns
+    })
+    benefit_sums = measures[
+        ['ProgramID','Qi'] + avoided_electric_cost_columns + avoided_gas_cost_columns
+    ].assign(Count=1).groupby(['ProgramID','Qi']).aggregate('sum')
+    programs = InputPrograms.data.merge(benefit_sums, on=['ProgramID','Qi'])
+
+    # cost tests, with program costs calculated once for all measures and the
+    #     program administrator cost carried into the ratepayer impact measure:
+    program_costs = ProgramCosts(measures, programs, Settings, first_year, discount_factors)
+    total_resource_cost_test_results = vc.total_resource_cost_test(measures, programs, Settings, first_year, discount_factors, program_costs)
+    program_administrator_cost_test_results = vc.program_administrator_cost_test(measures, programs, Settings, first_year, discount_factors, program_costs)
+    measures['ProgramAdministratorCost'] = program_administrator_cost_test_results.ProgramAdministratorCost.to_numpy()
+    ratepayer_impact_measure_results = vc.ratepayer_impact_measure(measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, discount_factors, batch_size)
+
+    return pd.concat(
+        [
+            measures[['CET_ID'] + avoided_electric_cost_columns + avoided_gas_cost_columns],
+            emissions_reductions.drop(columns='CET_ID'),
+            total_resource_cost_test_results.drop(columns='CET_ID'),
+            program_administrator_cost_test_results.drop(columns='CET_ID'),
+            ratepayer_impact_measure_results.drop(columns='CET_ID'),
+        ],
+        axis='columns'
+    )
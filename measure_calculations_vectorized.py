@@ -0,0 +1,1050 @@
+import numpy as np
+import pandas as pd
+
+import quarter_calculations_vectorized as qcv
+from discount_factors import DiscountFactors, first_settings_rows
+from program_costs import ProgramCosts
+from annual_rates import AnnualRates
+from cumulative_avoided_costs import electric_cumulative_avoided_costs, gas_cumulative_avoided_costs
+
+# lookup keys matching input measures to rows of the avoided cost tables:
+electric_lookup_key = [
+    'ProgramAdministrator',
+    'ElectricTargetSector',
+    'ElectricEndUse',
+    'ClimateZone',
+]
+gas_lookup_key = [
+    'ProgramAdministrator',
+    'GasTargetSector',
+    'GasSavingsProfile',
+]
+
+# lookup keys matching input measures to rows of the rate schedules:
+electric_rate_lookup_key = [
+    'ProgramAdministrator',
+    'ElectricTargetSector',
+]
+gas_rate_lookup_key = [
+    'ProgramAdministrator',
+    'GasTargetSector',
+]
+
+# helper function to expose index levels (e.g., CET_ID on input measures or
+# the lookup key multiindex on avoided cost tables) as ordinary columns:
+def table_columns(data_frame):
+    if any(name is not None for name in data_frame.index.names):
+        data_frame = data_frame.reset_index()
+    return data_frame
+
+# helper function to join input measures to every avoided cost period sharing
+# their lookup key, keeping only periods within the measure's effective useful
+# life window [int(Qi), int(Qi + EULq)) used by 'filter_by_measure':
+def measure_quarter_pairs(measures, avoided_costs, lookup_key):
+    pairs = measures[lookup_key].reset_index(drop=True).assign(
+        MeasurePosition=np.arange(len(measures.index))
+    ).merge(
+        avoided_costs,
+        on=lookup_key,
+        how='inner'
+    )
+    position = pairs.MeasurePosition.to_numpy()
+    window_start = np.trunc(measures.Qi.to_numpy(dtype=float))[position]
+    window_end = np.trunc(
+        measures.Qi.to_numpy(dtype=float) + measures.EULq.to_numpy(dtype=float)
+    )[position]
+    avoided_cost_quarter = pairs.Qi.to_numpy(dtype=float)
+    pairs = pairs[(window_start <= avoided_cost_quarter) & (avoided_cost_quarter < window_end)]
+    return pairs
+
+# helper function to apply installation and realization rates and net-to-gross
+# ratios to summed present values of electric benefits for each measure:
+def avoided_electric_costs_output(measures, present_value_generation_benefits, present_value_transmission_and_distribution_benefits):
+    gross_energy_coefficient = measures[['Quantity','IRkWh','RRkWh']].product(axis='columns').to_numpy(dtype=float)
+    gross_demand_coefficient = measures[['Quantity','IRkW','RRkW']].product(axis='columns').to_numpy(dtype=float)
+    net_energy_coefficient = gross_energy_coefficient * measures[['NTGRkWh','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float)
+    net_demand_coefficient = gross_demand_coefficient * measures[['NTGRkW','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float)
+
+    generation_gross = gross_energy_coefficient * present_value_generation_benefits
+    transmission_and_distribution_gross = gross_demand_coefficient * present_value_transmission_and_distribution_benefits
+    generation_net = net_energy_coefficient * present_value_generation_benefits
+    transmission_and_distribution_net = net_demand_coefficient * present_value_transmission_and_distribution_benefits
+
+    avoided_electric_costs = pd.DataFrame({
+        'CET_ID'                                   : measures.CET_ID.to_numpy(),
+        'ProgramID'                                : measures.ProgramID.to_numpy(),
+        'Qi'                                       : measures.Qi.to_numpy(),
+        'GenerationBenefitsGross'                  : np.maximum(generation_gross, 0),
+        'TransmissionAndDistributionBenefitsGross' : np.maximum(transmission_and_distribution_gross, 0),
+        'ElectricBenefitsGross'                    : np.maximum(generation_gross + transmission_and_distribution_gross, 0),
+        'GenerationCostsGross'                     : np.maximum(-generation_gross, 0),
+        'TransmissionAndDistributionCostsGross'    : np.maximum(-transmission_and_distribution_gross, 0),
+        'ElectricCostsGross'                       : np.maximum(-generation_gross - transmission_and_distribution_gross, 0),
+        'GenerationBenefitsNet'                    : np.maximum(generation_net, 0),
+        'TransmissionAndDistributionBenefitsNet'   : np.maximum(transmission_and_distribution_net, 0),
+        'ElectricBenefitsNet'                      : np.maximum(generation_net + transmission_and_distribution_net, 0),
+        'GenerationCostsNet'                       : np.maximum(-generation_net, 0),
+        'TransmissionAndDistributionCostsNet'      : np.maximum(-transmission_and_distribution_net, 0),
+        'ElectricCostsNet'                         : np.maximum(-generation_net - transmission_and_distribution_net, 0),
+    })
+
+    return avoided_electric_costs
+
+# helper function to apply installation and realization rates and net-to-gross
+# ratios to summed present values of gas benefits for each measure:
+def avoided_gas_costs_output(measures, pv_gas):
+    gross_gas_coefficient = measures[['Quantity','IRTherm','RRTherm']].product(axis='columns').to_numpy(dtype=float)
+    net_gas_coefficient = gross_gas_coefficient * measures[['NTGRTherm','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float)
+
+    avoided_gas_costs = pd.DataFrame({
+        'CET_ID'           : measures.CET_ID.to_numpy(),
+        'ProgramID'        : measures.ProgramID.to_numpy(),
+        'Qi'               : measures.Qi.to_numpy(),
+        'GasBenefitsGross' : np.maximum(gross_gas_coefficient * pv_gas, 0),
+        'GasCostsGross'    : np.maximum(-gross_gas_coefficient * pv_gas, 0),
+        'GasBenefitsNet'   : np.maximum(net_gas_coefficient * pv_gas, 0),
+        'GasCostsNet'      : np.maximum(-net_gas_coefficient * pv_gas, 0),
+    })
+
+    return avoided_gas_costs
+
+def calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors=None, batch_size=10000):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostElectric : an instance of an 'AvoidedCostElectric' object
+    ###         of class 'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     batch_size : an int limiting the number of measures joined to the
+    ###         avoided cost table at once, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_avoided_electric_costs'
+
+    measures = table_columns(InputMeasures.data)
+    avoided_cost_electric = table_columns(AvoidedCostElectric.data)[
+        electric_lookup_key + ['Qi','Gen','TD','DSType']
+    ]
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+
+    number_of_measures = len(measures.index)
+    present_value_generation_benefits = np.zeros(number_of_measures)
+    present_value_transmission_and_distribution_benefits = np.zeros(number_of_measures)
+
+    for batch_start in range(0, number_of_measures, batch_size):
+        batch = measures.iloc[batch_start:batch_start + batch_size]
+        pairs = measure_quarter_pairs(batch, avoided_cost_electric, electric_lookup_key)
+        position = pairs.MeasurePosition.to_numpy()
+
+        # gather measure-level values for each measure-quarter pair:
+        measure_values = lambda c: batch[c].to_numpy(dtype=float)[position]
+        quarterly_discount = discount_factors.quarterly_array(
+            batch.ProgramAdministrator.to_numpy()[position],
+            pairs.Qi
+        )
+
+        generation_benefits = qcv.present_value_generation_benefits(
+            pairs.Qi,
+            pairs.Gen,
+            measure_values('Qi'),
+            measure_values('EULq1'),
+            measure_values('EULq2'),
+            measure_values('kWh1'),
+            measure_values('kWh2'),
+            quarterly_discount
+        )
+        transmission_and_distribution_benefits = qcv.present_value_transmission_and_distribution_benefits(
+            pairs.Qi,
+            pairs.TD,
+            pairs.DSType,
+            measure_values('Qi'),
+            measure_values('EULq1'),
+            measure_values('EULq2'),
+            measure_values('kWh1'),
+            measure_values('kWh2'),
+            measure_values('kW1'),
+            measure_values('kW2'),
+            quarterly_discount
+        )
+
+        # sum quarterly benefits by measure:
+        batch_slice = slice(batch_start, batch_start + len(batch.index))
+        present_value_generation_benefits[batch_slice] = np.bincount(
+            position, weights=generation_benefits, minlength=len(batch.index)
+        )
+        present_value_transmission_and_distribution_benefits[batch_slice] = np.bincount(
+            position, weights=transmission_and_distribution_benefits, minlength=len(batch.index)
+        )
+
+    return avoided_electric_costs_output(
+        measures,
+        present_value_generation_benefits,
+        present_value_transmission_and_distribution_benefits
+    )
+
+def calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors=None, batch_size=10000):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostGas : an instance of an 'AvoidedCostGas' object of class
+    ###         'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     batch_size : an int limiting the number of measures joined to the
+    ###         avoided cost table at once, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_avoided_gas_costs'
+
+    measures = table_columns(InputMeasures.data)
+    avoided_cost_gas = table_columns(AvoidedCostGas.data)[
+        gas_lookup_key + ['Qi','Cost']
+    ]
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+
+    number_of_measures = len(measures.index)
+    pv_gas = np.zeros(number_of_measures)
+
+    for batch_start in range(0, number_of_measures, batch_size):
+        batch = measures.iloc[batch_start:batch_start + batch_size]
+        pairs = measure_quarter_pairs(batch, avoided_cost_gas, gas_lookup_key)
+        position = pairs.MeasurePosition.to_numpy()
+
+        # gather measure-level values for each measure-quarter pair:
+        measure_values = lambda c: batch[c].to_numpy(dtype=float)[position]
+        quarterly_discount = discount_factors.quarterly_array(
+            batch.ProgramAdministrator.to_numpy()[position],
+            pairs.Qi
+        )
+
+        gas_benefits = qcv.present_value_gas_benefits(
+            pairs.Qi,
+            pairs.Cost,
+            measure_values('Qi'),
+            measure_values('EULq1'),
+            measure_values('EULq2'),
+            measure_values('Therm1'),
+            measure_values('Therm2'),
+            quarterly_discount
+        )
+
+        # sum quarterly benefits by measure:
+        pv_gas[batch_start:batch_start + len(batch.index)] = np.bincount(
+            position, weights=gas_benefits, minlength=len(batch.index)
+        )
+
+    return avoided_gas_costs_output(measures, pv_gas)
+
+# helper function to evaluate the savings of a group of measures sharing a
+# lookup key against every quarter of their avoided cost block as a matrix
+# with one row per measure and one column per avoided cost quarter, zeroed
+# outside each measure's window [int(Qi), int(Qi + EULq)):
+def savings_matrix(measures, avoided_cost_quarters, savings_1, savings_2):
+    measure_quarter = measures.Qi.to_numpy(dtype=float)[:,np.newaxis]
+    eulq = measures.EULq.to_numpy(dtype=float)[:,np.newaxis]
+    eulq_1 = measures.EULq1.to_numpy(dtype=float)[:,np.newaxis]
+    eulq_2 = measures.EULq2.to_numpy(dtype=float)[:,np.newaxis]
+    quarters = avoided_cost_quarters[np.newaxis,:]
+
+    savings = qcv.savings_rate(
+        quarters,
+        measure_quarter,
+        measure_quarter + eulq_1,
+        measure_quarter + eulq_2,
+        eulq_1,
+        eulq_2,
+        savings_1,
+        savings_2
+    )
+    in_window = (
+        (np.trunc(measure_quarter) <= quarters) &
+        (quarters < np.trunc(measure_quarter + eulq))
+    )
+    return np.where(in_window, savings, 0.0)
+
+# helper function to yield the positions of input measures sharing each lookup
+# key along with the positions of the matching avoided cost rows, so each
+# avoided cost block is sliced once per key rather than once per measure:
+def lookup_key_groups(measures, avoided_costs, lookup_key, batch_size):
+    avoided_cost_groups = avoided_costs.groupby(lookup_key, sort=False).indices
+    for key, measure_positions in measures.groupby(lookup_key, sort=False).indices.items():
+        avoided_cost_positions = avoided_cost_groups.get(key)
+        if avoided_cost_positions is None:
+            continue
+        for batch_start in range(0, len(measure_positions), batch_size):
+            yield (
+                measure_positions[batch_start:batch_start + batch_size],
+                avoided_cost_positions
+            )
+
+# helper function to sum the present values of generation and transmission and
+# distribution benefits of a group of measures sharing a lookup key over their
+# block of avoided cost quarters:
+def group_electric_benefits(group, block, discount_factors):
+    avoided_cost_quarters = block.Qi.to_numpy(dtype=float)
+    quarterly_discount = discount_factors.quarterly_array(
+        block.ProgramAdministrator.to_numpy(),
+        avoided_cost_quarters
+    )
+
+    # demand savings use kWh or kW according to each quarter's DSType:
+    energy_savings_type = (block.DSType.to_numpy() == 'kWh')[np.newaxis,:]
+    group_values = lambda c: group[c].to_numpy(dtype=float)[:,np.newaxis]
+
+    electric_savings = savings_matrix(
+        group,
+        avoided_cost_quarters,
+        group_values('kWh1'),
+        group_values('kWh2')
+    )
+    demand_reductions = savings_matrix(
+        group,
+        avoided_cost_quarters,
+        np.where(energy_savings_type, group_values('kWh1'), group_values('kW1')),
+        np.where(energy_savings_type, group_values('kWh2'), group_values('kW2'))
+    )
+
+    return (
+        electric_savings @ (block.Gen.to_numpy(dtype=float) / quarterly_discount),
+        demand_reductions @ (block.TD.to_numpy(dtype=float) / quarterly_discount)
+    )
+
+def calculate_avoided_electric_costs_by_lookup_key(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors=None, batch_size=10000):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostElectric : an instance of an 'AvoidedCostElectric' object
+    ###         of class 'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     batch_size : an int limiting the number of measures in each
+    ###         measures-by-quarters matrix, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_avoided_electric_costs'
+
+    measures = table_columns(InputMeasures.data)
+    avoided_cost_electric = table_columns(AvoidedCostElectric.data)[
+        electric_lookup_key + ['Qi','Gen','TD','DSType']
+    ]
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+
+    present_value_generation_benefits = np.zeros(len(measures.index))
+    present_value_transmission_and_distribution_benefits = np.zeros(len(measures.index))
+
+    for measure_positions, avoided_cost_positions in lookup_key_groups(measures, avoided_cost_electric, electric_lookup_key, batch_size):
+        (
+            present_value_generation_benefits[measure_positions],
+            present_value_transmission_and_distribution_benefits[measure_positions]
+        ) = group_electric_benefits(
+            measures.iloc[measure_positions],
+            avoided_cost_electric.iloc[avoided_cost_positions],
+            discount_factors
+        )
+
+    return avoided_electric_costs_output(
+        measures,
+        present_value_generation_benefits,
+        present_value_transmission_and_distribution_benefits
+    )
+
+def calculate_avoided_gas_costs_by_lookup_key(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors=None, batch_size=10000):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostGas : an instance of an 'AvoidedCostGas' object of class
+    ###         'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     batch_size : an int limiting the number of measures in each
+    ###         measures-by-quarters matrix, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_avoided_gas_costs'
+
+    measures = table_columns(InputMeasures.data)
+    avoided_cost_gas = table_columns(AvoidedCostGas.data)[
+        gas_lookup_key + ['Qi','Cost']
+    ]
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+
+    pv_gas = np.zeros(len(measures.index))
+
+    for measure_positions, avoided_cost_positions in lookup_key_groups(measures, avoided_cost_gas, gas_lookup_key, batch_size):
+        group = measures.iloc[measure_positions]
+        block = avoided_cost_gas.iloc[avoided_cost_positions]
+        avoided_cost_quarters = block.Qi.to_numpy(dtype=float)
+        quarterly_discount = discount_factors.quarterly_array(
+            block.ProgramAdministrator.to_numpy(),
+            avoided_cost_quarters
+        )
+
+        gas_savings = savings_matrix(
+            group,
+            avoided_cost_quarters,
+            group.Therm1.to_numpy(dtype=float)[:,np.newaxis],
+            group.Therm2.to_numpy(dtype=float)[:,np.newaxis]
+        )
+
+        pv_gas[measure_positions] = gas_savings @ (
+            block.Cost.to_numpy(dtype=float) / quarterly_discount
+        )
+
+    return avoided_gas_costs_output(measures, pv_gas)
+
+# helper function to get the cumulative present values built along with an
+# avoided cost table by 'tables.setup_avoided_cost_electric' or
+# 'tables.setup_avoided_cost_gas' if discounted to the same first year at the
+# same rates as the run, or else to build them with the run's discount factors:
+def table_cumulative_avoided_costs(AvoidedCosts, build_function, Settings, first_year, discount_factors):
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+    cumulative_avoided_costs = getattr(AvoidedCosts, 'cumulative_avoided_costs', None)
+    if cumulative_avoided_costs is not None and discount_factors.equals(cumulative_avoided_costs.discount_factors):
+        return cumulative_avoided_costs
+    return build_function(table_columns(AvoidedCosts.data), discount_factors)
+
+def calculate_avoided_electric_costs_from_cumulative_sums(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors=None):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostElectric : an instance of class
+    ###         'AvoidedCostElectricTable', with cumulative present values built
+    ###         by 'tables.setup_avoided_cost_electric' reused if discounted
+    ###         like the run
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_avoided_electric_costs'
+
+    measures = table_columns(InputMeasures.data)
+    cumulative_avoided_costs = table_cumulative_avoided_costs(
+        AvoidedCostElectric,
+        electric_cumulative_avoided_costs,
+        Settings,
+        first_year,
+        discount_factors
+    )
+
+    key_codes = cumulative_avoided_costs.key_codes(measures)
+    measure_values = lambda c: measures[c].to_numpy(dtype=float)
+    present_values = lambda name, savings_1, savings_2: cumulative_avoided_costs.present_values(
+        name,
+        key_codes,
+        measure_values('Qi'),
+        measure_values('EULq'),
+        measure_values('EULq1'),
+        measure_values('EULq2'),
+        measure_values(savings_1),
+        measure_values(savings_2)
+    )
+
+    present_value_generation_benefits = present_values('Gen', 'kWh1', 'kWh2')
+    present_value_transmission_and_distribution_benefits = (
+        present_values('TDkWh', 'kWh1', 'kWh2') +
+        present_values('TDkW', 'kW1', 'kW2')
+    )
+
+    return avoided_electric_costs_output(
+        measures,
+        present_value_generation_benefits,
+        present_value_transmission_and_distribution_benefits
+    )
+
+def calculate_avoided_gas_costs_from_cumulative_sums(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors=None):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostGas : an instance of class 'AvoidedCostGasTable', with
+    ###         cumulative present values built by 'tables.setup_avoided_cost_gas'
+    ###         reused if discounted like the run
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_avoided_gas_costs'
+
+    measures = table_columns(InputMeasures.data)
+    cumulative_avoided_costs = table_cumulative_avoided_costs(
+        AvoidedCostGas,
+        gas_cumulative_avoided_costs,
+        Settings,
+        first_year,
+        discount_factors
+    )
+
+    pv_gas = cumulative_avoided_costs.present_values(
+        'Cost',
+        cumulative_avoided_costs.key_codes(measures),
+        measures.Qi.to_numpy(dtype=float),
+        measures.EULq.to_numpy(dtype=float),
+        measures.EULq1.to_numpy(dtype=float),
+        measures.EULq2.to_numpy(dtype=float),
+        measures.Therm1.to_numpy(dtype=float),
+        measures.Therm2.to_numpy(dtype=float)
+    )
+
+    return avoided_gas_costs_output(measures, pv_gas)
+
+# helper function to weigh program costs by measure benefits as a share of
+# program benefits where program benefits are positive, otherwise by count:
+def program_weighting(measure_benefits, program_benefits, program_count):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(
+            program_benefits > 0,
+            measure_benefits / program_benefits,
+            1 / program_count
+        )
+
+# helper function to divide benefits by costs, or return 0 for zero costs:
+def cost_ratio(benefits, costs):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(costs != 0, benefits / costs, 0)
+
+def total_resource_cost_test(measures, programs, Settings, first_year, discount_factors=None, program_costs=None):
+    ### parameters:
+    ###     measures : a pandas DataFrame of input measures and corresponding
+    ###         calculated avoided costs
+    ###     programs : a pandas DataFrame containing summed measure benefits
+    ###         rolled up at the program level along with program costs
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year of programs in a cet
+    ###         run
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     program_costs : an instance of class 'ProgramCosts' shared across
+    ###         the cost tests; built from programs if not provided
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.total_resource_cost_test'
+
+    measures = table_columns(measures)
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+    if program_costs is None:
+        program_costs = ProgramCosts(measures, programs, Settings, first_year, discount_factors)
+    program_totals = program_costs.measure_totals(measures)
+
+    measure_values = lambda c: measures[c].to_numpy(dtype=float)
+    measure_sums = lambda c: measures[c].sum(axis='columns').to_numpy(dtype=float)
+    program_values = lambda c: program_totals[c].to_numpy(dtype=float)
+
+    program_administrators = measures.ProgramAdministrator.to_numpy()
+    quarterly_discount_rate = pd.Series(program_administrators).map(
+        discount_factors.quarterly_discount_rates
+    ).to_numpy(dtype=float)
+    quarterly_measure_inflation_rate = 1 + measure_values('AnnualInflationRate') / 4
+    quarterly_discount = discount_factors.quarterly_array(program_administrators, measure_values('Qi'))
+    quantity = measure_values('Quantity')
+
+    # present values of measure-level costs, as in quarter_calculations.py:
+    present_value_external_costs = (
+        quantity *
+        measure_sums(['UnitIncentiveToOthers','UnitLaborCost','UnitMaterialsCost','UnitEndUserRebate']) /
+        quarterly_discount
+    )
+    present_value_gross_measure_cost = np.where(
+        measure_values('RUL') > 0,
+        quantity *
+        (
+            measure_values('UnitGrossCost1') -
+            (
+                measure_values('UnitGrossCost1') -
+                measure_values('UnitGrossCost2')
+            ) *
+            (
+                quarterly_measure_inflation_rate /
+                quarterly_discount_rate
+            ) ** measure_values('RULq')
+        ) /
+        quarterly_discount,
+        quantity *
+        discount_factors.quarterly_array(program_administrators, measure_values('Qi') + 1)
+    )
+    present_value_incentives_and_direct_installation = (
+        quantity *
+        measure_sums(['UnitIncentiveToOthers','UnitLaborCost','UnitMaterialsCost']) /
+        quarterly_discount
+    )
+    present_value_rebates = quantity * measure_values('UnitEndUserRebate') / quarterly_discount
+    present_value_excess_incentives = np.maximum(
+        quantity *
+        (
+            measure_values('UnitIncentiveToOthers') +
+            measure_values('UnitLaborCost') +
+            measure_values('UnitMaterialsCost') -
+            measure_values('UnitGrossCost1')
+        ) /
+        quarterly_discount,
+        0
+    )
+
+    present_value_gross_participant_costs = (
+        present_value_gross_measure_cost -
+        (
+            present_value_incentives_and_direct_installation +
+            present_value_rebates
+        ) +
+        present_value_excess_incentives
+    )
+    present_value_net_participant_costs = (
+        measure_sums(['NTGRCost','MarketEffectsCosts']) *
+        present_value_gross_participant_costs
+    )
+
+    program_weighting_gross = program_weighting(
+        measure_sums(['ElectricBenefitsGross','GasBenefitsGross']),
+        program_values('ElectricBenefitsGross') + program_values('GasBenefitsGross'),
+        program_values('Count')
+    )
+    program_weighting_net = program_weighting(
+        measure_sums(['ElectricBenefitsNet','GasBenefitsNet']),
+        program_values('ElectricBenefitsNet') + program_values('GasBenefitsNet'),
+        program_values('Count')
+    )
+    present_value_program_costs = program_values('PresentValueProgramCosts')
+
+    total_resource_cost_gross_no_admin = (
+        present_value_external_costs +
+        present_value_gross_participant_costs +
+        measure_values('ElectricCostsGross') +
+        measure_values('GasCostsGross')
+    )
+    total_resource_cost_gross = (
+        program_weighting_gross * present_value_program_costs +
+        total_resource_cost_gross_no_admin
+    )
+    total_resource_cost_net_no_admin = (
+        present_value_external_costs +
+        present_value_net_participant_costs +
+        measure_values('ElectricCostsNet') +
+        measure_values('GasCostsNet')
+    )
+    total_resource_cost_net = (
+        program_weighting_net * present_value_program_costs +
+        total_resource_cost_net_no_admin
+    )
+
+    net_benefits = measure_sums(['ElectricBenefitsNet','GasBenefitsNet'])
+
+    return pd.DataFrame({
+        'CET_ID'                        : measures.CET_ID.to_numpy(),
+        'TotalResourceCostGross'        : total_resource_cost_gross,
+        'TotalResourceCostGrossNoAdmin' : total_resource_cost_gross_no_admin,
+        'TotalResourceCostNet'          : total_resource_cost_net,
+        'TotalResourceCostNetNoAdmin'   : total_resource_cost_net_no_admin,
+        'TotalResourceCostRatio'        : cost_ratio(net_benefits, total_resource_cost_net),
+        'TotalResourceCostRatioNoAdmin' : cost_ratio(net_benefits, total_resource_cost_net_no_admin),
+    })
+
+def program_administrator_cost_test(measures, programs, Settings, first_year, discount_factors=None, program_costs=None):
+    ### parameters:
+    ###     measures : a pandas DataFrame of input measures and corresponding
+    ###         calculated avoided costs
+    ###     programs : a pandas DataFrame containing summed measure benefits
+    ###         rolled up at the program level along with program costs
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year of programs in a cet
+    ###         run
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     program_costs : an instance of class 'ProgramCosts' shared across
+    ###         the cost tests; built from programs if not provided
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.program_administrator_cost_test'
+
+    measures = table_columns(measures)
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+    if program_costs is None:
+        program_costs = ProgramCosts(measures, programs, Settings, first_year, discount_factors)
+    program_totals = program_costs.measure_totals(measures)
+
+    measure_sums = lambda c: measures[c].sum(axis='columns').to_numpy(dtype=float)
+    program_values = lambda c: program_totals[c].to_numpy(dtype=float)
+
+    quarterly_discount = discount_factors.quarterly_array(
+        measures.ProgramAdministrator.to_numpy(),
+        measures.Qi.to_numpy(dtype=float)
+    )
+    present_value_external_costs = (
+        measures.Quantity.to_numpy(dtype=float) *
+        measure_sums(['UnitIncentiveToOthers','UnitLaborCost','UnitMaterialsCost','UnitEndUserRebate']) /
+        quarterly_discount
+    )
+
+    net_benefits = measure_sums(['ElectricBenefitsNet','GasBenefitsNet'])
+    weighting = program_weighting(
+        net_benefits,
+        program_values('ElectricBenefitsNet') + program_values('GasBenefitsNet'),
+        program_values('Count')
+    )
+
+    program_administrator_cost = (
+        weighting *
+        program_values('PresentValueProgramCosts') +
+        present_value_external_costs
+    )
+    program_administrator_cost_no_admin = present_value_external_costs
+
+    return pd.DataFrame({
+        'CET_ID'                               : measures.CET_ID.to_numpy(),
+        'ProgramAdministratorCost'             : program_administrator_cost,
+        'ProgramAdministratorCostNoAdmin'      : program_administrator_cost_no_admin,
+        'ProgramAdministratorCostRatio'        : cost_ratio(net_benefits, program_administrator_cost),
+        'ProgramAdministratorCostRatioNoAdmin' : cost_ratio(net_benefits, program_administrator_cost_no_admin),
+    })
+
+# helper function to evaluate the savings of measures against every year of
+# their rows of the rate matrices, zeroed outside each measure's window
+# [int(Qi / 4), int((Qi + EULq) / 4)) used by 'filter_by_measure', and sum the
+# present values of bill savings by measure. also returns whether each measure
+# has any rate schedule rows within its window:
+def present_value_bill_savings(measures, annual_rates, rates, rate_counts, savings_1, savings_2, discount_factors):
+    years = annual_rates.years[np.newaxis,:]
+    measure_values = lambda c: measures[c].to_numpy(dtype=float)[:,np.newaxis]
+    measure_install_year = np.floor(measure_values('Qi') / 4)
+
+    savings = qcv.savings_rate(
+        years,
+        measure_install_year,
+        measure_install_year + measure_values('EUL1'),
+        measure_install_year + measure_values('EUL2'),
+        measure_values('EUL1'),
+        measure_values('EUL2'),
+        measure_values(savings_1),
+        measure_values(savings_2)
+    )
+    in_window = (
+        (np.trunc(measure_values('Qi') / 4) <= years) &
+        (years < np.trunc((measure_values('Qi') + measure_values('EULq')) / 4))
+    )
+    annual_discount = discount_factors.annual_array(
+        np.repeat(measures.ProgramAdministrator.to_numpy(), years.shape[1]),
+        np.tile(annual_rates.years, len(measures.index))
+    ).reshape(len(measures.index), years.shape[1])
+
+    present_values = (np.where(in_window, savings, 0.0) * rates / annual_discount).sum(axis=1)
+    has_rates = (in_window & (rate_counts > 0)).any(axis=1)
+    return present_values, has_rates
+
+def ratepayer_impact_measure(measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, discount_factors=None, batch_size=10000):
+    ### parameters:
+    ###     measures : a pandas DataFrame of input measures with Program
+    ###         Administrator Cost test results appended
+    ###     RateScheduleElectric : an instance of a 'RateScheduleElectric' object
+    ###         of class 'EDCS_Table' or 'EDCS_Query_Results'
+    ###     RateScheduleGas : an instance of a 'RateScheduleGas' object of class
+    ###         'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     first_year : an int representing the first year for the program
+    ###         through which the input measures are implemented
+    ###     discount_factors : an instance of class 'DiscountFactors' shared
+    ###         across the run; built from Settings if not provided
+    ###     batch_size : an int limiting the number of measures in each
+    ###         measures-by-years matrix, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.ratepayer_impact_measure'
+
+    measures = table_columns(measures)
+    if discount_factors is None:
+        discount_factors = DiscountFactors(Settings, first_year)
+
+    # rate schedules as matrices by lookup key and year, built once:
+    electric_rates = AnnualRates(table_columns(RateScheduleElectric.data), electric_rate_lookup_key, 'ElectricRate')
+    gas_rates = AnnualRates(table_columns(RateScheduleGas.data), gas_rate_lookup_key, 'GasRate')
+
+    # electric rates include those applicable to all target sectors:
+    electric_rate_codes = electric_rates.key_codes(measures)
+    all_sector_rate_codes = electric_rates.key_codes(
+        measures[['ProgramAdministrator']].assign(ElectricTargetSector='ALL')
+    )
+    gas_rate_codes = gas_rates.key_codes(measures)
+
+    number_of_measures = len(measures.index)
+    present_value_bill_savings_electric = np.zeros(number_of_measures)
+    present_value_bill_savings_gas = np.zeros(number_of_measures)
+    has_electric_rates = np.zeros(number_of_measures, dtype=bool)
+    has_gas_rates = np.zeros(number_of_measures, dtype=bool)
+
+    for batch_start in range(0, number_of_measures, batch_size):
+        batch_slice = slice(batch_start, batch_start + batch_size)
+        batch = measures.iloc[batch_slice]
+        electric_codes = electric_rate_codes[batch_slice]
+        all_sector_codes = all_sector_rate_codes[batch_slice]
+        gas_codes = gas_rate_codes[batch_slice]
+
+        present_value_bill_savings_electric[batch_slice], has_electric_rates[batch_slice] = present_value_bill_savings(
+            batch,
+            electric_rates,
+            electric_rates.rates[electric_codes] + electric_rates.rates[all_sector_codes],
+            electric_rates.rate_counts[electric_codes] + electric_rates.rate_counts[all_sector_codes],
+            'kWh1',
+            'kWh2',
+            discount_factors
+        )
+        present_value_bill_savings_gas[batch_slice], has_gas_rates[batch_slice] = present_value_bill_savings(
+            batch,
+            gas_rates,
+            gas_rates.rates[gas_codes],
+            gas_rates.rate_counts[gas_codes],
+            'Therm1',
+            'Therm2',
+            discount_factors
+        )
+
+    ratepayer_impact_electric = np.where(
+        has_electric_rates,
+        measures[['Quantity','IRkWh','RRkWh']].product(axis='columns').to_numpy(dtype=float) *
+        measures[['NTGRkWh','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float) *
+        present_value_bill_savings_electric,
+        0
+    )
+    ratepayer_impact_gas = np.where(
+        has_gas_rates,
+        measures[['Quantity','IRTherm','RRTherm']].product(axis='columns').to_numpy(dtype=float) *
+        measures[['NTGRTherm','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float) *
+        present_value_bill_savings_gas,
+        0
+    )
+
+    return pd.DataFrame({
+        'CET_ID'                     : measures.CET_ID.to_numpy(),
+        'BillReductionElectric'      : ratepayer_impact_electric,
+        'BillReductionGas'           : ratepayer_impact_gas,
+        'RatepayerImpactMeasureCost' : (
+            ratepayer_impact_electric +
+            ratepayer_impact_gas +
+            measures.ProgramAdministratorCost.to_numpy(dtype=float)
+        ),
+    })
+
+# helper function to get the first row of a reference table for each lookup
+# key, matching 'filter_by_measure(measure).iloc[0]', joined to the measures:
+def first_rows_by_measure(measures, reference_table, lookup_key, measure_key, columns):
+    reference_rows = table_columns(reference_table)
+    reference_rows = reference_rows[~reference_rows.duplicated(lookup_key, keep='first')]
+    return measures[measure_key].merge(
+        reference_rows[lookup_key + columns].rename(columns=dict(zip(lookup_key, measure_key))),
+        on=measure_key,
+        how='left'
+    )
+
+# helper function to sum the electric savings of a group of measures sharing a
+# lookup key over the first year and lifecycle of their block of avoided cost
+# quarters, sorted by quarter, unweighted and weighted by CO2:
+def group_electric_savings(group, block):
+    avoided_cost_quarters = block.Qi.to_numpy(dtype=float)[np.newaxis,:]
+    group_values = lambda c: group[c].to_numpy(dtype=float)[:,np.newaxis]
+
+    # electric savings begin the quarter before installation, as in
+    #     'quarter_calculations.emissions_reductions_electric':
+    savings = qcv.savings_rate(
+        avoided_cost_quarters,
+        group_values('Qi') - 1,
+        group_values('Qi') + group_values('EULq1') - 1,
+        group_values('Qi') + group_values('EULq2') - 1,
+        group_values('EULq1'),
+        group_values('EULq2'),
+        group_values('kWh1'),
+        group_values('kWh2')
+    )
+    in_window = (
+        (np.trunc(group_values('Qi')) <= avoided_cost_quarters) &
+        (avoided_cost_quarters < np.trunc(group_values('Qi') + group_values('EULq')))
+    )
+    first_year = in_window & (np.cumsum(in_window, axis=1) <= 4)
+    savings = np.nan_to_num(savings)
+    co2 = np.nan_to_num(block.CO2.to_numpy(dtype=float))
+
+    return (
+        np.where(first_year, savings, 0.0).sum(axis=1),
+        np.where(in_window, savings, 0.0).sum(axis=1),
+        np.where(first_year, savings, 0.0) @ co2,
+        np.where(in_window, savings, 0.0) @ co2
+    )
+
+def calculate_emissions_reductions(InputMeasures, AvoidedCostElectric, Emissions, CombustionTypes, Settings, batch_size=10000):
+    ### parameters:
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+    ###     AvoidedCostElectric : an instance of an 'AvoidedCostElectric' object
+    ###         of class 'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Emissions : an instance of an 'Emissions' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     CombustionTypes : an instance of a 'CombustionTypes' object of class
+    ###         'EDCS_Table' or 'EDCS_Query_Results'
+    ###     Settings : an instance of a 'Settings' object of class 'EDCS_Table'
+    ###         or 'EDCS_Query_Results'
+    ###     batch_size : an int limiting the number of measures in each
+    ###         measures-by-quarters matrix, bounding memory use
+    ###
+    ### returns:
+    ###     pandas DataFrame with one row per input measure containing the same
+    ###     columns as 'measure_calculations.calculate_emissions_reductions'
+
+    measures = table_columns(InputMeasures.data)
+    avoided_cost_electric = table_columns(AvoidedCostElectric.data)[
+        electric_lookup_key + ['Qi','CO2']
+    ]
+    number_of_measures = len(measures.index)
+
+    # quarterly savings rates are summed over each measure's avoided cost
+    #     quarters, weighted by CO2, for all quarters and for the first four,
+    #     visiting each avoided cost block once per lookup key as for benefits:
+    electric_savings_first_year = np.zeros(number_of_measures)
+    electric_savings_lifecycle = np.zeros(number_of_measures)
+    co2_first_year = np.zeros(number_of_measures)
+    co2_lifecycle = np.zeros(number_of_measures)
+
+    for measure_positions, avoided_cost_positions in lookup_key_groups(measures, avoided_cost_electric, electric_lookup_key, batch_size):
+        block = avoided_cost_electric.iloc[avoided_cost_positions]
+        (
+            electric_savings_first_year[measure_positions],
+            electric_savings_lifecycle[measure_positions],
+            co2_first_year[measure_positions],
+            co2_lifecycle[measure_positions]
+        ) = group_electric_savings(
+            measures.iloc[measure_positions],
+            block.iloc[np.argsort(block.Qi.to_numpy(dtype=float), kind='stable')]
+        )
+
+    return emissions_reductions_output(
+        measures,
+        Emissions,
+        CombustionTypes,
+        Settings,
+        electric_savings_first_year,
+        electric_savings_lifecycle,
+        co2_first_year,
+        co2_lifecycle
+    )
+
+# helper function to combine the electric savings sums of each measure with
+# emissions rates and natural gas savings into emissions reductions:
+def emissions_reductions_output(measures, Emissions, CombustionTypes, Settings, electric_savings_first_year, electric_savings_lifecycle, co2_first_year, co2_lifecycle):
+    measure_values = lambda c: measures[c].to_numpy(dtype=float)
+
+    # NOx and PM10 emissions rates are quarterly, from the first emissions row
+    #     of each measure's lookup key:
+    emissions = first_rows_by_measure(measures, Emissions.data, electric_lookup_key, electric_lookup_key, ['NOx','PM10'])
+    emissions_nox = np.nan_to_num(emissions.NOx.to_numpy(dtype=float)) / 4
+    emissions_pm10 = np.nan_to_num(emissions.PM10.to_numpy(dtype=float)) / 4
+
+    # first year and lifecycle natural gas savings:
+    rul = measure_values('RUL')
+    eul = measure_values('EUL')
+    therm_1 = measure_values('Therm1')
+    therm_2 = measure_values('Therm2')
+    first_year_gas = np.select(
+        [
+            (rul > 0) & (rul >= 1),
+            (rul > 0) & (eul >= 1),
+            rul > 0,
+            eul >= 1,
+            eul > 0,
+        ],
+        [
+            therm_1,
+            therm_1 * rul + therm_2 * eul,
+            therm_1 * rul + therm_2 * (eul - rul),
+            therm_1,
+            therm_1 * eul,
+        ],
+        default=0.0
+    )
+    lifecycle_gas = therm_1 * measure_values('EUL1') + therm_2 * measure_values('EUL2')
+
+    combustion_types = first_rows_by_measure(measures, CombustionTypes.data, ['LookupCode'], ['CombustionType'], ['NOx'])
+    nox_gas = np.nan_to_num(combustion_types.NOx.to_numpy(dtype=float))
+    settings = first_rows_by_measure(measures, first_settings_rows(Settings), ['ProgramAdministrator'], ['ProgramAdministrator'], ['CO2Gas'])
+    co2_gas = settings.CO2Gas.to_numpy(dtype=float)
+
+    gross_electric_coefficient = measures[['Quantity','IRkWh','RRkWh']].product(axis='columns').to_numpy(dtype=float)
+    net_electric_coefficient = gross_electric_coefficient * measures[['NTGRkWh','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float)
+    gross_gas_coefficient = measures[['Quantity','IRTherm','RRTherm']].product(axis='columns').to_numpy(dtype=float)
+    net_gas_coefficient = gross_gas_coefficient * measures[['NTGRTherm','MarketEffectsBenefits']].sum(axis='columns').to_numpy(dtype=float)
+
+    electric = {
+        'CO2FirstYear'  : co2_first_year,
+        'CO2Lifecycle'  : co2_lifecycle,
+        'NOxFirstYear'  : electric_savings_first_year * emissions_nox,
+        'NOxLifecycle'  : electric_savings_lifecycle * emissions_nox,
+        'PM10FirstYear' : electric_savings_first_year * emissions_pm10,
+        'PM10Lifecycle' : electric_savings_lifecycle * emissions_pm10,
+    }
+    gas = {
+        'CO2FirstYear' : first_year_gas * co2_gas,
+        'CO2Lifecycle' : lifecycle_gas * co2_gas,
+        'NOxFirstYear' : first_year_gas * nox_gas,
+        'NOxLifecycle' : lifecycle_gas * nox_gas,
+    }
+
+    emissions_reductions = {'CET_ID' : measures.CET_ID.to_numpy()}
+    for pollutant in ['CO2','NOx']:
+        for savings_type, electric_coefficient, gas_coefficient in [
+                ('Gross', gross_electric_coefficient, gross_gas_coefficient),
+                ('Net', net_electric_coefficient, net_gas_coefficient)
+            ]:
+            for period in ['FirstYear','Lifecycle']:
+                emissions_reductions[pollutant + savings_type + 'Electric' + period] = electric_coefficient * electric[pollutant + period]
+                emissions_reductions[pollutant + savings_type + 'Gas' + period] = gas_coefficient * gas[pollutant + period]
+                emissions_reductions[pollutant + savings_type + period] = (
+                    electric_coefficient * electric[pollutant + period] +
+                    gas_coefficient * gas[pollutant + period]
+                )
+
+    # gross PM10 reductions are weighed by the gas coefficient, as in
+    #     'measure_calculations.calculate_emissions_reductions':
+    emissions_reductions.update({
+        'PM10GrossFirstYear' : gross_gas_coefficient * electric['PM10FirstYear'],
+        'PM10GrossLifecycle' : gross_gas_coefficient * electric['PM10Lifecycle'],
+        'PM10NetFirstYear'   : net_electric_coefficient * electric['PM10FirstYear'],
+        'PM10NetLifecycle'   : net_electric_coefficient * electric['PM10Lifecycle'],
+    })
+
+    return pd.DataFrame(emissions_reductions)
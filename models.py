@@ -1,4 +1,5 @@
-import datetime, pyodbc, sys
+import datetime, os, pyodbc, sys, threading
+from contextlib import contextmanager
 import numpy as np, pandas as pd
 # Note: this was tested in in a linux environment with a pyodbc library dependent
 #       on the ODBC driver provided with FreeTDS
@@ -8,13 +9,35 @@ import numpy as np, pandas as pd
 #           /etc/freetds/freetds.conf
 #       See https://gist.github.com/rduplain/1293636 for setup guide
 
-# defines connector class for accessing EDCS sql server:
+# defines connector class for accessing EDCS sql server. lookup keys pushed
+# down for a query are bulk inserted into a temporary table of the connection's
+# session, which the query joins on. the statements creating and dropping the
+# table depend on the connection's sql dialect--'mssql' for edcs, or 'sqlite'
+# for sqlite3 connections opened by a connection pool's 'connect' function.
+# sql server creates temporary tables in tempdb, so lookup keys take the
+# collation of the database queried in order to join with its columns:
 class EDCS_Connection:
     login_credentials = {}
     connection_str = ''
     connection = None
     cursor = None
-    def __init__(self,uid,passwd):
+    dialect = 'mssql'
+    lookup_key_table = '#LookupKeys'
+    lookup_key_table_sql = {
+        'mssql' : {
+            'table'  : '#LookupKeys',
+            'create' : 'CREATE TABLE {} (LookupKey VARCHAR(255) COLLATE DATABASE_DEFAULT PRIMARY KEY)',
+            'insert' : 'INSERT INTO {} (LookupKey) VALUES (?)',
+            'drop'   : "IF OBJECT_ID('tempdb..{0}') IS NOT NULL DROP TABLE {0}",
+        },
+        'sqlite' : {
+            'table'  : 'temp.LookupKeys',
+            'create' : 'CREATE TABLE {} (LookupKey VARCHAR(255) PRIMARY KEY)',
+            'insert' : 'INSERT INTO {} (LookupKey) VALUES (?)',
+            'drop'   : 'DROP TABLE IF EXISTS {}',
+        },
+    }
+    def __init__(self,uid,passwd,connection=None,dialect='mssql'):
         self.login_credentials = {
             'data_source_name' : 'edcs',
             'database_name'    : 'EDStaff_CET_2020',
@@ -29,13 +52,26 @@ class EDCS_Connection:
             'UID={user[id]};' \
             'PWD={user[passwd]};' \
             'DATABASE={database_name};'.format(**self.login_credentials)
-        self.connection = pyodbc.connect(self.connection_str)
+        # use a given open connection, e.g., from a connection pool's connect
+        #     function, or else connect to edcs:
+        if connection is None:
+            connection = pyodbc.connect(self.connection_str)
+        self.connection = connection
         self.cursor = self.connection.cursor()
-    def fetch_sql(self,sql_str):
+        self.dialect = dialect
+        self.lookup_key_table = self.lookup_key_table_sql[dialect]['table']
+    def fetch_sql(self,sql_str,lookup_keys=None):
         print('_' * 80)
         print('\n< Executing SQL Retreival Script: >\n\n\'{}\'\n\n< Retrieving ... >'.format(sql_str),end='')
         start_time = datetime.datetime.now()
-        results = pd.read_sql_query(sql_str,self.connection)
+        if lookup_keys is None:
+            results = pd.read_sql_query(sql_str,self.connection)
+        else:
+            try:
+                self.push_lookup_keys(lookup_keys)
+                results = pd.read_sql_query(sql_str,self.connection)
+            finally:
+                self.drop_lookup_keys()
         end_time = datetime.datetime.today()
         retrieval_time = 1000 * (end_time - start_time).total_seconds()
         if retrieval_time > 1000:
@@ -43,17 +79,169 @@ class EDCS_Connection:
         else:
             print('\n\n< Retrieved in {:,.1f} milliseconds. >'.format(retrieval_time))
         return results
+    def fetch_sql_chunks(self,sql_str,chunksize,lookup_keys=None,metrics=None):
+        # yields the results of a query as pandas DataFrames of up to
+        #     'chunksize' rows, read from a DB-API cursor with 'fetchmany' so
+        #     the full results are never buffered at once. the number of rows
+        #     and chunks, time spent fetching, and rows per second are kept in
+        #     the 'metrics' dictionary, if given:
+        if metrics is None:
+            metrics = {}
+        metrics.update({'rows' : 0, 'chunks' : 0, 'seconds' : 0.0, 'rows_per_second' : 0.0})
+        print('_' * 80)
+        print('\n< Executing SQL Retreival Script: >\n\n\'{}\'\n\n< Streaming ... >'.format(sql_str))
+        cursor = None
+        try:
+            if lookup_keys is not None:
+                self.push_lookup_keys(lookup_keys)
+            start_time = datetime.datetime.now()
+            cursor = self.connection.cursor()
+            cursor.execute(sql_str)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                metrics['seconds'] += (datetime.datetime.now() - start_time).total_seconds()
+                metrics['rows'] += len(rows)
+                metrics['rows_per_second'] = metrics['rows'] / max(metrics['seconds'], 1e-9)
+                if not rows:
+                    break
+                metrics['chunks'] += 1
+                print('< {:,} rows at {:,.0f} rows/second >'.format(metrics['rows'],metrics['rows_per_second']))
+                yield pd.DataFrame.from_records([tuple(row) for row in rows],columns=columns)
+                start_time = datetime.datetime.now()
+            # keep the columns of empty results:
+            if metrics['chunks'] == 0:
+                yield pd.DataFrame(columns=columns)
+        finally:
+            # close the cursor, including when chunks are no longer read, so
+            #     its pending results do not block dropping the lookup keys:
+            if cursor is not None:
+                cursor.close()
+            if lookup_keys is not None:
+                self.drop_lookup_keys()
+        print('\n< Retrieved {:,} rows in {:,.3} seconds. >'.format(metrics['rows'],metrics['seconds']))
     def execute_sql(self,sql_str):
         print('\n< Executing SQL Script: >\n\'{}\'\n'.format(sql_str))
         self.cursor = self.cursor.execute(sql_str)
+    def push_lookup_keys(self,lookup_keys):
+        # create the session's lookup key table, replacing any left by a failed
+        #     query, and insert the distinct keys in one batch, using pyodbc's
+        #     array binding where available:
+        self.drop_lookup_keys()
+        cursor = self.connection.cursor()
+        cursor.execute(self.lookup_key_table_sql[self.dialect]['create'].format(self.lookup_key_table))
+        if hasattr(cursor,'fast_executemany'):
+            cursor.fast_executemany = True
+        cursor.executemany(
+            self.lookup_key_table_sql[self.dialect]['insert'].format(self.lookup_key_table),
+            [(lookup_key,) for lookup_key in dict.fromkeys(lookup_keys)]
+        )
+    def drop_lookup_keys(self):
+        # drop the table if it exists, so the connection may be reused by a
+        #     pool:
+        cursor = self.connection.cursor()
+        cursor.execute(self.lookup_key_table_sql[self.dialect]['drop'].format(self.lookup_key_table))
+    def is_healthy(self,health_check_sql='SELECT 1'):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(health_check_sql)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+# pool of open connections to edcs shared by all table loads of a cet scenario,
+# so each table borrows an idle connection instead of opening its own. idle
+# connections are checked with a simple query before reuse and replaced if the
+# check fails. the 'connect' function opening new connections may be replaced,
+# e.g., with one returning sqlite3 connections of the 'sqlite' dialect for
+# testing without edcs:
+class EDCS_ConnectionPool:
+    uid = ''
+    passwd = ''
+    pool_size = 4
+    health_check_sql = 'SELECT 1'
+    connect = None
+    dialect = 'mssql'
+    idle_connections = []
+    lock = None
+    available = None
+    def __init__(self,uid,passwd,pool_size=4,health_check_sql='SELECT 1',connect=None,dialect='mssql'):
+        self.uid = uid
+        self.passwd = passwd
+        self.pool_size = pool_size
+        self.health_check_sql = health_check_sql
+        self.connect = connect
+        self.dialect = dialect
+        self.idle_connections = []
+        self.lock = threading.Lock()
+        self.available = threading.BoundedSemaphore(pool_size)
+    def open_connection(self):
+        if self.connect is None:
+            return EDCS_Connection(self.uid,self.passwd)
+        else:
+            return EDCS_Connection(self.uid,self.passwd,connection=self.connect(),dialect=self.dialect)
+    def acquire(self):
+        # wait until fewer than 'pool_size' connections are in use, then reuse
+        #     a healthy idle connection or open a new one:
+        self.available.acquire()
+        try:
+            while True:
+                with self.lock:
+                    connection = self.idle_connections.pop() if self.idle_connections else None
+                if connection is None:
+                    return self.open_connection()
+                if connection.is_healthy(self.health_check_sql):
+                    return connection
+                connection.close()
+        except:
+            self.available.release()
+            raise
+    def release(self,connection):
+        with self.lock:
+            self.idle_connections.append(connection)
+        self.available.release()
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+    def close(self):
+        with self.lock:
+            idle_connections, self.idle_connections = self.idle_connections, []
+        for connection in idle_connections:
+            connection.close()
+
 # generic sql object class:
 class SQL_Object:
     connection = None
+    connection_pool = None
     source = ''
     data = pd.DataFrame()
     fetch_init = None
     def __init__(self):
         pass
+    def fetch_sql(self,sql_str,lookup_keys=None):
+        # borrow a connection from the pool, if any, for the duration of the
+        #     query and of any lookup key table it joins on:
+        if self.connection_pool is None:
+            return self.connection.fetch_sql(sql_str,lookup_keys)
+        with self.connection_pool.connection() as connection:
+            return connection.fetch_sql(sql_str,lookup_keys)
+    def fetch_sql_chunks(self,sql_str,chunksize,lookup_keys=None,metrics=None):
+        # hold a pooled connection, if any, until all chunks are read:
+        if self.connection_pool is None:
+            yield from self.connection.fetch_sql_chunks(sql_str,chunksize,lookup_keys,metrics)
+        else:
+            with self.connection_pool.connection() as connection:
+                yield from connection.fetch_sql_chunks(sql_str,chunksize,lookup_keys,metrics)
     def set_table_cols(self,column_name_list):
         self.data = pd.DataFrame(columns=column_name_list)
     def column_map(self,column_name,modifier_function):
@@ -67,8 +255,10 @@ class SQL_Object:
 # class representing sql table on edcs, extends sql object class:
 class EDCS_Table(SQL_Object):
     table_name = ''
-    def __init__(self,table_name,uid,passwd,fetch_init=True):
-        self.connection = EDCS_Connection(uid,passwd)
+    def __init__(self,table_name,uid,passwd,fetch_init=True,connection_pool=None):
+        self.connection_pool = connection_pool
+        if self.connection_pool is None:
+            self.connection = EDCS_Connection(uid,passwd)
         self.source = 'database'
         self.table_name = table_name
         self.fetch_init = fetch_init
@@ -76,22 +266,61 @@ class EDCS_Table(SQL_Object):
             self.fetch_table()
     def fetch_table(self):
         sql_str = 'SELECT * FROM {}'.format(self.table_name)
-        self.data = self.connection.fetch_sql(sql_str)
+        self.data = self.fetch_sql(sql_str)
 
-# class representing results of a query from edcs, extends sql object class:
+# class representing results of a query from edcs, extends sql object class.
+# a 'TableSchema' from 'table_schemas' projects the results' columns and sets
+# their dtypes as they are retrieved. 'lookup_keys', if given, are inserted
+# into the connection's lookup key table before the query is executed. with a
+# 'chunksize', results are streamed in chunks, each typed by the schema as it
+# arrives, before the chunks are combined:
 class EDCS_Query_Results(SQL_Object):
     sql_str = ''
-    def __init__(self,sql_str,uid,passwd,fetch_init=True):
-        self.connection = EDCS_Connection(uid,passwd)
+    schema = None
+    lookup_keys = None
+    chunksize = None
+    fetch_metrics = {}
+    def __init__(self,sql_str,uid,passwd,fetch_init=True,connection_pool=None,schema=None,lookup_keys=None,chunksize=None):
+        self.connection_pool = connection_pool
+        self.schema = schema
+        self.lookup_keys = lookup_keys
+        self.chunksize = chunksize
+        self.fetch_metrics = {}
+        if self.connection_pool is None:
+            self.connection = EDCS_Connection(uid,passwd)
         self.source = 'database'
         self.sql_str = sql_str
         self.fetch_init = fetch_init
         if self.fetch_init:
             self.fetch_results()
     def fetch_results(self):
-        self.data = self.connection.fetch_sql(self.sql_str)
+        if self.chunksize is None:
+            self.data = self.fetch_sql(self.sql_str,self.lookup_keys)
+            if self.schema is not None:
+                self.data = self.schema.apply(self.data)
+        else:
+            chunks = []
+            for chunk in self.iterate_results():
+                chunks.append(chunk)
+            if chunks:
+                self.data = pd.concat(chunks,ignore_index=True)
+                # categories differing between chunks are combined by casting
+                #     again:
+                if self.schema is not None:
+                    self.data = self.schema.apply(self.data)
+    def iterate_results(self):
+        # yields typed chunks of the results:
+        for chunk in self.fetch_sql_chunks(self.sql_str,self.chunksize,self.lookup_keys,self.fetch_metrics):
+            if self.schema is not None:
+                chunk = self.schema.apply(chunk)
+            yield chunk
 
-# class representing a local file:
+# class representing a local file. in filter mode, the file is read in large
+# chunks, each reduced to the rows selected by 'filter_function', which takes a
+# chunk and returns a boolean array and should be vectorized over the chunk's
+# columns. 'usecols' optionally limits the columns read from the file, and a
+# 'TableSchema' from 'table_schemas' projects columns and sets their dtypes as
+# the file is read:
 class Local_CSV:
     source = ''
     file_name = ''
@@ -100,40 +329,54 @@ class Local_CSV:
     filter_csv = None
     filter_function = None
     fetch_init = None
-    def __init__(self,file_name,delimiter='|',filter_csv=False,filter_function=None,fetch_init=True):
+    usecols = None
+    chunksize = 2**17
+    schema = None
+    def __init__(self,file_name,delimiter='|',filter_csv=False,filter_function=None,fetch_init=True,usecols=None,chunksize=2**17,schema=None):
         self.source = 'csv'
         self.file_name = file_name
         self.delimiter = delimiter
         self.filter_csv = filter_csv
         self.filter_function = filter_function
         self.fetch_init = fetch_init
+        self.usecols = usecols
+        self.chunksize = chunksize
+        self.schema = schema
+        if self.usecols is None and self.schema is not None:
+            self.usecols = self.schema.usecols()
         if self.fetch_init:
             self.read_file()
+    def dtypes(self):
+        return None if self.schema is None else self.schema.dtypes()
     def read_file(self):
         if self.filter_csv:
             print('\n< Loading CSV as iterator: >\n\n{}\n\n< Reading ...      >'.format(self.file_name),end='')
-            with open(self.file_name) as f:
-                count_rows = np.sum(1 for row in f) - 1
-                f.seek(0)
-                current_row = 0
+            # report progress by the share of the file's bytes read, rather than
+            #     reading the file once more to count rows:
+            file_size = max(os.path.getsize(self.file_name), 1)
+            with open(self.file_name,'rb') as f:
                 sys.stdout.write('\b' * 6)
-                print_str = '{:3.0f}% >'.format(current_row / count_rows * 100)
+                print_str = '{:3.0f}% >'.format(0)
                 print(print_str,end='')
-                iter_csv = pd.read_csv(f,delimiter=self.delimiter,iterator=True,chunksize=140)
+                iter_csv = pd.read_csv(f,delimiter=self.delimiter,usecols=self.usecols,dtype=self.dtypes(),iterator=True,chunksize=self.chunksize)
                 filtered_chunks = []
                 for chunk in iter_csv:
-                    filtered_chunks.extend([self.data, chunk[self.filter_function(chunk)]])
-                    current_row = current_row + len(chunk.index)
+                    filtered_chunks.append(chunk[np.asarray(self.filter_function(chunk))])
                     sys.stdout.write('\b' * 6)
-                    print_str = '{:3.0f}% >'.format(current_row / count_rows * 100)
+                    print_str = '{:3.0f}% >'.format(min(f.tell() / file_size, 1) * 100)
                     print(print_str,end='')
-                self.data = pd.concat(filtered_chunks)
+                if filtered_chunks:
+                    self.data = pd.concat(filtered_chunks)
+                    # categories differing between chunks are combined by
+                    #     casting again:
+                    if self.schema is not None:
+                        self.data = self.schema.apply(self.data)
                 print('')
             print('_' * 80)
         else:
             print('\n< Loading CSV: >\n\n{}\n\n< Reading ... >'.format(self.file_name))
             with open(self.file_name) as f:
-                self.data = pd.read_csv(f,delimiter=self.delimiter)
+                self.data = pd.read_csv(f,delimiter=self.delimiter,usecols=self.usecols,dtype=self.dtypes())
             print('_' * 80)
     def set_table_cols(self,column_name_list):
         self.data = pd.DataFrame(columns=column_name_list)
@@ -3,6 +3,62 @@ import os, numpy as np, pandas as pd
 import multiprocessing as mp
 import dill as pickle
 
+# reference tables used by the parallel path are the same indexed tables used
+# by the serial path:
+from reference_tables import SettingsTable, EmissionsTable, \
+    CombustionTypesTable, AvoidedCostElectricTable, AvoidedCostGasTable, \
+    RateScheduleElectricTable, RateScheduleGasTable
+
+# reference tables preloaded into each process of a 'WorkerPool' by its
+# initializer, keyed by table name:
+worker_tables = {}
+
+def initialize_worker(tables):
+    worker_tables.update(tables)
+
+# stand-in for a reference table preloaded into worker processes--pickled as
+# the table's name only, and resolved to the worker's copy of the table on
+# attribute access:
+class PreloadedTable:
+    name = ''
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        return getattr(worker_tables[self.name], attribute)
+
+# pool of worker processes started once per cet scenario and reused by every
+# parallelized calculation stage:
+class WorkerPool:
+    pool = None
+    number_of_threads = 1
+    tables = {}
+
+    def __init__(self, tables, number_of_threads=None):
+        ### parameters:
+        ###     tables : a dictionary of reference tables keyed by name, loaded
+        ###         once into each worker process
+        ###     number_of_threads : number of worker processes, by default
+        ###         twice the number of cpus
+        if number_of_threads is None:
+            number_of_threads = 2 * os.cpu_count()
+        self.number_of_threads = number_of_threads
+        self.pool = mp.Pool(
+            self.number_of_threads,
+            initializer=initialize_worker,
+            initargs=(tables,)
+        )
+        self.tables = {name : PreloadedTable(name) for name in tables}
+
+    def map(self, function, chunks):
+        return self.pool.map(function, chunks)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
 
 # helper classes to parallelize iteration through measures:
 class Table:
@@ -16,39 +72,67 @@ class MultiprocessingApplier:
     dataframe_chunks = None
     aggregation_function = None
     number_of_threads = 1
+    worker_pool = None
     
     def __init__(self):
         pass
 
-    def set_threads(self):
-        self.number_of_threads = 2 * os.cpu_count()
+    def set_threads(self, worker_pool=None):
+        self.worker_pool = worker_pool
+        if worker_pool is None:
+            self.number_of_threads = 2 * os.cpu_count()
+        else:
+            self.number_of_threads = worker_pool.number_of_threads
+
+    def split(self, measures):
+        # split measures into contiguous chunks of rows, one per thread:
+        bounds = np.linspace(0, len(measures.index), self.number_of_threads + 1).astype(int)
+        return [measures.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
 
     def apply_function(self, dataframe_row):
         pass
 
+    def optional_arguments(self, **arguments):
+        # optional arguments are passed to the applied function by keyword
+        # and only when set, as the functions matching the sql version of the
+        # cet do not accept them:
+        return {name : value for name, value in arguments.items() if value is not None}
+
     def map_function(self, dataframe_chunk):
         return dataframe_chunk.apply(self.apply_function, axis='columns')
 
     def calculate(self):
+        if self.worker_pool is not None:
+            return pd.concat(self.worker_pool.map(self.map_function, self.dataframe_chunks))
         with mp.Pool(self.number_of_threads) as mp_pool:
             output = pd.concat(mp_pool.map(self.map_function, self.dataframe_chunks))
         return output
 
+    def __getstate__(self):
+        # workers receive the applier with each chunk, but need neither the
+        # pool nor the other chunks:
+        state = self.__dict__.copy()
+        state.pop('worker_pool', None)
+        state.pop('dataframe_chunks', None)
+        return state
+
 class MultiprocessingAvoidedCosts(MultiprocessingApplier):
     AvoidedCost = None
     Settings = None
     first_year = None
+    discount_factors = None
 
-    def __init__(self, measures, AvoidedCost, Settings, first_year, avoided_cost_function):
-        self.set_threads()
-        self.dataframe_chunks = np.array_split(measures, self.number_of_threads)
+    def __init__(self, measures, AvoidedCost, Settings, first_year, avoided_cost_function, discount_factors=None, worker_pool=None):
+        self.set_threads(worker_pool)
+        self.dataframe_chunks = self.split(measures)
         self.AvoidedCost = AvoidedCost
         self.Settings = Settings
         self.first_year = first_year
         self.aggregation_function = avoided_cost_function
+        self.discount_factors = discount_factors
 
     def apply_function(self, measure):
-        output = self.aggregation_function(measure, self.AvoidedCost, self.Settings, self.first_year)
+        output = self.aggregation_function(measure, self.AvoidedCost, self.Settings, self.first_year, **self.optional_arguments(discount_factors=self.discount_factors))
         return output
 
 class MultiprocessingEmissionsReductions(MultiprocessingApplier):
@@ -57,9 +141,9 @@ class MultiprocessingEmissionsReductions(MultiprocessingApplier):
     CombustionTypes = None
     Settings = None
     
-    def __init__(self, measures, AvoidedCostElectric, Emissions, CombustionTypes, Settings, emissions_reductions_function):
-        self.set_threads()
-        self.dataframe_chunks = np.array_split(measures, self.number_of_threads)
+    def __init__(self, measures, AvoidedCostElectric, Emissions, CombustionTypes, Settings, emissions_reductions_function, worker_pool=None):
+        self.set_threads(worker_pool)
+        self.dataframe_chunks = self.split(measures)
         self.AvoidedCostElectric = AvoidedCostElectric
         self.Emissions = Emissions
         self.CombustionTypes = CombustionTypes
@@ -74,17 +158,21 @@ class MultiprocessingCostTest(MultiprocessingApplier):
     programs = pd.DataFrame
     Settings = None
     first_year = None
+    discount_factors = None
+    program_costs = None
 
-    def __init__(self, measures, programs, Settings, first_year, test_function):
-        self.set_threads()
-        self.dataframe_chunks = np.array_split(measures,self.number_of_threads)
+    def __init__(self, measures, programs, Settings, first_year, test_function, discount_factors=None, worker_pool=None, program_costs=None):
+        self.set_threads(worker_pool)
+        self.dataframe_chunks = self.split(measures)
         self.programs = programs
         self.Settings = Settings
         self.first_year = first_year
         self.aggregation_function = test_function
+        self.discount_factors = discount_factors
+        self.program_costs = program_costs
 
     def apply_function(self, measure):
-        output = self.aggregation_function(measure, self.programs, self.Settings, self.first_year)
+        output = self.aggregation_function(measure, self.programs, self.Settings, self.first_year, **self.optional_arguments(discount_factors=self.discount_factors, program_costs=self.program_costs))
         return output
 
 class MultiprocessingRatepayerImpactMeasure(MultiprocessingApplier):
@@ -92,91 +180,18 @@ class MultiprocessingRatepayerImpactMeasure(MultiprocessingApplier):
     RateScheduleGas = None
     Settings = None
     first_year = None
+    discount_factors = None
 
-    def __init__(self, measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, ratepayer_impact_measure_function):
-        self.set_threads()
-        self.dataframe_chunks = np.array_split(measures,self.number_of_threads)
+    def __init__(self, measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, ratepayer_impact_measure_function, discount_factors=None, worker_pool=None):
+        self.set_threads(worker_pool)
+        self.dataframe_chunks = self.split(measures)
         self.RateScheduleElectric = RateScheduleElectric
         self.RateScheduleGas = RateScheduleGas
         self.Settings = Settings
         self.first_year = first_year
         self.aggregation_function = ratepayer_impact_measure_function
+        self.discount_factors = discount_factors
 
     def apply_function(self, measure):
-        output = self.aggregation_function(measure, self.RateScheduleElectric, self.RateScheduleGas, self.Settings, self.first_year)
+        output = self.aggregation_function(measure, self.RateScheduleElectric, self.RateScheduleGas, self.Settings, self.first_year, **self.optional_arguments(discount_factors=self.discount_factors))
         return output
-
-class MultiprocessingTable:
-    data = pd.DataFrame()
-    def __init__(self, data):
-        self.data = data
-
-class SettingsTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_settings = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator)
-        )
-        return filtered_settings
-
-class EmissionsTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_emissions = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.ElectricTargetSector == measure.ElectricTargetSector) & \
-            (self.data.ElectricEndUse == measure.ElectricEndUse) & \
-            (self.data.ClimateZone == measure.ClimateZone)
-        )
-        return filtered_emissions
-
-class CombustionTypesTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_combustion_type = self.data.get(
-            self.data.LookupCode == measure.CombustionType
-        )
-        return filtered_combustion_type
-
-class AvoidedCostElectricTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_avoided_costs_electric = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.ElectricTargetSector == measure.ElectricTargetSector) & \
-            (self.data.ElectricEndUse == measure.ElectricEndUse) & \
-            (self.data.ClimateZone == measure.ClimateZone) & \
-            (self.data.Qi >= measure.Qi + 1) & \
-            (self.data.Qi < measure.Qi + measure.EULq + 1)
-        )
-        return filtered_avoided_costs_electric
-
-class AvoidedCostGasTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_avoided_costs_gas = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.GasTargetSector == measure.GasTargetSector) & \
-            (self.data.GasSavingsProfile == measure.GasSavingsProfile) & \
-            (self.data.Qi >= measure.Qi + 1) & \
-            (self.data.Qi < measure.Qi + measure.EULq + 1)
-        )
-        return filtered_avoided_costs_gas
-
-class RateScheduleElectricTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_electric_rates = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.ApplicableYear * 4 >= measure.Qi) & \
-            (self.data.ApplicableYear * 4 < measure.Qi + measure.EULq) & \
-            (
-                (self.data.ElectricTargetSector == measure.ElectricTargetSector) | \
-                (self.data.ElectricTargetSector == 'ALL')
-            )
-        )
-        return filtered_electric_rates
-
-class RateScheduleGasTable(MultiprocessingTable):
-    def filter_by_measure(self, measure):
-        filtered_gas_rates = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.ApplicableYear * 4 >= measure.Qi) & \
-            (self.data.ApplicableYear * 4 < measure.Qi + measure.EULq) & \
-            (self.data.GasTargetSector == measure.GasTargetSector)
-        )
-        return filtered_gas_rates
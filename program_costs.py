@@ -0,0 +1,98 @@
+import pandas as pd
+
+from discount_factors import DiscountFactors
+
+# program-level cost columns discounted and summed by the cost tests:
+program_cost_columns = [
+    'AdminCostsOverheadAndGA',
+    'AdminCostsOther',
+    'MarketingOutreach',
+    'DIActivity',
+    'DIInstallation',
+    'DIHardwareAndMaterials',
+    'DIRebateAndInspection',
+    'EMV',
+    'UserInputIncentive',
+    'CostsRecoveredFromOtherSources',
+]
+
+# program-level sums of measure benefits used to weigh program costs:
+program_sum_columns = [
+    'Count',
+    'ElectricBenefitsGross',
+    'ElectricBenefitsNet',
+    'GasBenefitsGross',
+    'GasBenefitsNet',
+]
+
+# class holding the present value of program costs over all quarters of each
+# program, along with its summed benefits and count of measures, so the total
+# resource cost and program administrator cost tests look up
+#     sum(program_cost_columns) / (1 + DiscountRateQtr) ** (Qi - first_year * 4)
+# summed over the program's quarters, instead of recalculating it for every
+# measure. program costs are discounted at the rate of the measure's program
+# administrator, so totals are kept for each pair of program and program
+# administrator among the input measures:
+class ProgramCosts:
+    program_totals = pd.DataFrame()
+    programs = {}
+
+    def __init__(self, measures, programs, Settings, first_year, discount_factors=None):
+        ### parameters:
+        ###     measures : a pandas DataFrame of input measures with
+        ###         'ProgramID' and 'ProgramAdministrator' columns
+        ###     programs : a pandas DataFrame of program costs by quarter with
+        ###         summed measure benefits merged, as built in 'calc'
+        ###     Settings : an instance of a 'Settings' object of class
+        ###         'EDCS_Table', 'EDCS_Query_Results', or 'Local_CSV'
+        ###     first_year : an int representing the first year of programs in
+        ###         a cet run
+        ###     discount_factors : an instance of class 'DiscountFactors' shared
+        ###         across the run; built from Settings if not provided
+
+        if discount_factors is None:
+            discount_factors = DiscountFactors(Settings, first_year)
+        if any(name is not None for name in programs.index.names):
+            programs = programs.reset_index()
+
+        program_administrators = measures[['ProgramID','ProgramAdministrator']].drop_duplicates()
+        program_quarters = programs[['ProgramID','Qi'] + program_cost_columns + program_sum_columns].merge(
+            program_administrators,
+            on='ProgramID'
+        )
+        quarterly_discount = discount_factors.quarterly_array(
+            program_quarters.ProgramAdministrator.to_numpy(),
+            program_quarters.Qi
+        )
+        program_quarters['PresentValueProgramCosts'] = (
+            program_quarters[program_cost_columns].sum(axis='columns').to_numpy(dtype=float) /
+            quarterly_discount
+        )
+
+        self.program_totals = program_quarters.groupby(
+            ['ProgramID','ProgramAdministrator'], observed=True
+        )[['PresentValueProgramCosts'] + program_sum_columns].sum().reset_index()
+        self.programs = {
+            (program_id, program_administrator) : totals
+            for program_id, program_administrator, (_, totals) in zip(
+                self.program_totals.ProgramID,
+                self.program_totals.ProgramAdministrator,
+                self.program_totals[['PresentValueProgramCosts'] + program_sum_columns].iterrows()
+            )
+        }
+
+    def lookup(self, measure):
+        ### returns a pandas Series of the present value of program costs
+        ### ('PresentValueProgramCosts') and the program's summed benefits and
+        ### count for a single measure
+        return self.programs[(measure.ProgramID, measure.ProgramAdministrator)]
+
+    def measure_totals(self, measures):
+        ### returns a pandas DataFrame with the program totals of each measure,
+        ### in the order of the measures, with missing values for measures of
+        ### programs without costs
+        return measures[['ProgramID','ProgramAdministrator']].merge(
+            self.program_totals,
+            on=['ProgramID','ProgramAdministrator'],
+            how='left'
+        )
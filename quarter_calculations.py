@@ -1,8 +1,20 @@
 import numpy as np
 import pandas as pd
 
+# helper functions returning the discount divisor for a single quarter or
+# year, looked up from a 'DiscountFactors' instance where one is provided:
+def quarterly_discount(measure, quarter, quarterly_discount_rate, first_year, discount_factors=None):
+    if discount_factors is None:
+        return quarterly_discount_rate ** (quarter - first_year * 4)
+    return discount_factors.quarterly(measure.ProgramAdministrator, quarter)
+
+def annual_discount(measure, year, annual_discount_rate, first_year, discount_factors=None):
+    if discount_factors is None:
+        return annual_discount_rate ** (year - first_year)
+    return discount_factors.annual(measure.ProgramAdministrator, year)
+
 # calculate the quarterly generation benefits per unit--installation and realization rates, and net-to-gross is handled in the calculate_avoided_electric_costs functions in the aggregation file:
-def present_value_generation_benefits(avoided_cost_electric, measure, settings, first_year):
+def present_value_generation_benefits(avoided_cost_electric, measure, settings, first_year, discount_factors=None):
     ### parameters:
     ###     avoided_cost_electric : a single row from the 'data' variable of an
     ###         'AvoidedCostElectric' object of class 'EDCS_Table' or
@@ -14,6 +26,8 @@ def present_value_generation_benefits(avoided_cost_electric, measure, settings,
     ###         object of class 'EDCS_Table' or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year for the program
     ###         through which the input measure is implemented
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         from which discount divisors are looked up
     ###
     ### returns:
     ###     float with the calculated present value of generation benefits
@@ -42,11 +56,11 @@ def present_value_generation_benefits(avoided_cost_electric, measure, settings,
         annual_electric_savings_rate = 0
 
     # correct generation_benefits calculation:
-    generation_benefits = annual_electric_savings_rate * avoided_cost_electric.Gen / quarterly_discount_rate ** (avoided_cost_electric.Qi - first_year * 4)
+    generation_benefits = annual_electric_savings_rate * avoided_cost_electric.Gen / quarterly_discount(measure, avoided_cost_electric.Qi, quarterly_discount_rate, first_year, discount_factors)
 
     return generation_benefits
 
-def present_value_transmission_and_distribution_benefits(avoided_cost_electric, measure, settings, first_year):
+def present_value_transmission_and_distribution_benefits(avoided_cost_electric, measure, settings, first_year, discount_factors=None):
     ### parameters:
     ###     avoided_cost_electric : a single row from the 'data' variable of an
     ###         'AvoidedCostElectric' object of class 'EDCS_Table' or
@@ -58,6 +72,8 @@ def present_value_transmission_and_distribution_benefits(avoided_cost_electric,
     ###         object of class 'EDCS_Table' or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year for the program
     ###         through which the input measure is implemented
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         from which discount divisors are looked up
     ###
     ### returns:
     ###     float with the calculated present value of transmission and
@@ -92,11 +108,11 @@ def present_value_transmission_and_distribution_benefits(avoided_cost_electric,
     else:
         annual_demand_reduction = 0
 
-    transmission_and_distribution_benefits = annual_demand_reduction * avoided_cost_electric.TD / quarterly_discount_rate ** (avoided_cost_electric.Qi - first_year * 4)
+    transmission_and_distribution_benefits = annual_demand_reduction * avoided_cost_electric.TD / quarterly_discount(measure, avoided_cost_electric.Qi, quarterly_discount_rate, first_year, discount_factors)
 
     return transmission_and_distribution_benefits
 
-def present_value_gas_benefits(avoided_cost_gas, measure, settings, first_year):
+def present_value_gas_benefits(avoided_cost_gas, measure, settings, first_year, discount_factors=None):
     ### parameters:
     ###     avoided_cost_gas : a single row from the 'data' variable of an
     ###         'AvoidedCostGas' object of class 'EDCS_Table' or
@@ -108,6 +124,8 @@ def present_value_gas_benefits(avoided_cost_gas, measure, settings, first_year):
     ###         object of class 'EDCS_Table' or 'EDCS_Query_Results'
     ###     first_year : an int representing the first year for the program
     ###         through which the input measure is implemented
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         from which discount divisors are looked up
     ###
     ### returns:
     ###     float with the calculated present value of natural gas benefits 
@@ -120,7 +138,6 @@ def present_value_gas_benefits(avoided_cost_gas, measure, settings, first_year):
 
     avoided_cost_quarter = avoided_cost_gas.Qi
 
-    quarterly_discount_rate = 1 + settings.DiscountRateQtr
     quarterly_discount_rate = 1 + settings.DiscountRateQtr
 
     if measure_install <= avoided_cost_quarter and avoided_cost_quarter <= measure_phase_1 - 1:
@@ -136,7 +153,7 @@ def present_value_gas_benefits(avoided_cost_gas, measure, settings, first_year):
     else:
         annual_gas_savings_rate = 0
 
-    gas_benefits = annual_gas_savings_rate * avoided_cost_gas.Cost / quarterly_discount_rate ** (avoided_cost_gas.Qi - first_year * 4)
+    gas_benefits = annual_gas_savings_rate * avoided_cost_gas.Cost / quarterly_discount(measure, avoided_cost_gas.Qi, quarterly_discount_rate, first_year, discount_factors)
 
     return gas_benefits
 
@@ -232,7 +249,7 @@ def emissions_reductions_gas(measure, combustion_type, settings):
 
     return emissions_reductions_gas
 
-def present_value_external_costs(measure, quarterly_discount_rate, first_year):
+def present_value_external_costs(measure, quarterly_discount_rate, first_year, discount_factors=None):
     present_value_external_costs = (
         measure.Quantity *
         measure[[
@@ -241,11 +258,11 @@ def present_value_external_costs(measure, quarterly_discount_rate, first_year):
             'UnitMaterialsCost',
             'UnitEndUserRebate'
         ]].sum() /
-        quarterly_discount_rate ** (measure.Qi - first_year * 4)
+        quarterly_discount(measure, measure.Qi, quarterly_discount_rate, first_year, discount_factors)
     )
     return present_value_external_costs
 
-def present_value_gross_measure_cost(measure, quarterly_measure_inflation_rate, quarterly_discount_rate, first_year):
+def present_value_gross_measure_cost(measure, quarterly_measure_inflation_rate, quarterly_discount_rate, first_year, discount_factors=None):
     if measure.RUL > 0:
         present_value_gross_measure_cost = (
             measure.Quantity *
@@ -260,16 +277,16 @@ def present_value_gross_measure_cost(measure, quarterly_measure_inflation_rate,
                     quarterly_discount_rate
                 ) ** measure.RULq
             ) /
-            quarterly_discount_rate ** ( measure.Qi - first_year * 4 )
+            quarterly_discount(measure, measure.Qi, quarterly_discount_rate, first_year, discount_factors)
         )
     else:
         present_value_gross_measure_cost = (
             measure.Quantity * 
-            quarterly_discount_rate ** ( measure.Qi - 4 * first_year + 1)
+            quarterly_discount(measure, measure.Qi + 1, quarterly_discount_rate, first_year, discount_factors)
         )
     return present_value_gross_measure_cost
 
-def present_value_incentives_and_direct_installation(measure, quarterly_discount_rate, first_year):
+def present_value_incentives_and_direct_installation(measure, quarterly_discount_rate, first_year, discount_factors=None):
     present_value_incentives_and_direct_installation = (
         measure.Quantity *
         measure[[
@@ -277,20 +294,20 @@ def present_value_incentives_and_direct_installation(measure, quarterly_discount
             'UnitLaborCost',
             'UnitMaterialsCost'
         ]].sum() /
-        quarterly_discount_rate ** (measure.Qi - first_year * 4)
+        quarterly_discount(measure, measure.Qi, quarterly_discount_rate, first_year, discount_factors)
     )
 
     return present_value_incentives_and_direct_installation
 
-def present_value_rebates(measure, quarterly_discount_rate, first_year):
+def present_value_rebates(measure, quarterly_discount_rate, first_year, discount_factors=None):
     present_value_rebates = (
         measure.Quantity *
         measure.UnitEndUserRebate /
-       quarterly_discount_rate ** (measure.Qi - first_year * 4)
+       quarterly_discount(measure, measure.Qi, quarterly_discount_rate, first_year, discount_factors)
     )
     return present_value_rebates
 
-def present_value_excess_incentives(measure, quarterly_discount_rate, first_year):
+def present_value_excess_incentives(measure, quarterly_discount_rate, first_year, discount_factors=None):
     present_value_excess_incentives = (
         measure.Quantity *
         (
@@ -299,11 +316,11 @@ def present_value_excess_incentives(measure, quarterly_discount_rate, first_year
             measure.UnitMaterialsCost -
             measure.UnitGrossCost1
         ) /
-        quarterly_discount_rate ** (measure.Qi - first_year * 4)
+        quarterly_discount(measure, measure.Qi, quarterly_discount_rate, first_year, discount_factors)
     )
     return max(present_value_excess_incentives, 0)
 
-def present_value_bill_savings_electric(rate_schedule_electric, measure, settings, first_year):
+def present_value_bill_savings_electric(rate_schedule_electric, measure, settings, first_year, discount_factors=None):
     measure_install_year = np.floor(measure.Qi / 4)
     measure_phase_1 = measure_install_year + measure.EUL1
     measure_phase_2 = measure_install_year + measure.EUL2
@@ -328,12 +345,12 @@ def present_value_bill_savings_electric(rate_schedule_electric, measure, setting
     present_value_bill_savings_electric = (
         annual_electric_savings_rate *
         rate_schedule_electric.ElectricRate /
-        annual_discount_rate ** (rate_schedule_year - first_year)
+        annual_discount(measure, rate_schedule_year, annual_discount_rate, first_year, discount_factors)
     )
 
     return present_value_bill_savings_electric
 
-def present_value_bill_savings_gas(rate_schedule_gas, measure, settings, first_year):
+def present_value_bill_savings_gas(rate_schedule_gas, measure, settings, first_year, discount_factors=None):
     measure_install_year = np.floor(measure.Qi / 4)
     measure_phase_1 = measure_install_year + measure.EUL1
     measure_phase_2 = measure_install_year + measure.EUL2
@@ -358,7 +375,7 @@ def present_value_bill_savings_gas(rate_schedule_gas, measure, settings, first_y
     present_value_bill_savings_gas = (
         annual_gas_savings_rate *
         rate_schedule_gas.GasRate /
-        annual_discount_rate ** (rate_schedule_year - first_year)
+        annual_discount(measure, rate_schedule_year, annual_discount_rate, first_year, discount_factors)
     )
 
     return present_value_bill_savings_gas
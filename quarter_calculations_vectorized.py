@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+# array versions of the equations in quarter_calculations.py--each function
+# accepts numpy arrays (or pandas Series) of equal length with one element per
+# measure and avoided cost period pair, and returns a numpy array:
+def savings_rate(period, measure_install, measure_phase_1, measure_phase_2, eul_1, eul_2, savings_1, savings_2):
+    ### parameters:
+    ###     period : array of avoided cost or rate schedule periods (quarter
+    ###         indices or years) to evaluate
+    ###     measure_install : array of measure installation periods
+    ###     measure_phase_1 : array of periods at which first baseline savings
+    ###         end, i.e., the installation period plus the first baseline
+    ###         useful life
+    ###     measure_phase_2 : array of periods at which second baseline
+    ###         savings end
+    ###     eul_1 : array of first baseline useful lives, used to weigh the
+    ###         fractional period at the end of the first baseline
+    ###     eul_2 : array of second baseline useful lives, used to weigh the
+    ###         fractional period at the end of the second baseline
+    ###     savings_1 : array of annual first baseline savings
+    ###     savings_2 : array of annual second baseline savings
+    ###
+    ### returns:
+    ###     numpy array of annual savings rates applicable to each period,
+    ###     following the same precedence as the if/elif chains in
+    ###     quarter_calculations.py
+
+    period = np.asarray(period, dtype=float)
+    measure_install = np.asarray(measure_install, dtype=float)
+    measure_phase_1 = np.asarray(measure_phase_1, dtype=float)
+    measure_phase_2 = np.asarray(measure_phase_2, dtype=float)
+    fraction_1 = np.asarray(eul_1, dtype=float) % 1
+    fraction_2 = np.asarray(eul_2, dtype=float) % 1
+    savings_1 = np.asarray(savings_1, dtype=float)
+    savings_2 = np.asarray(savings_2, dtype=float)
+
+    conditions = [
+        (measure_install <= period) & (period <= measure_phase_1 - 1),
+        (measure_phase_1 - 1 < period) & (period < measure_phase_1),
+        (measure_phase_1 <= period) & (period <= measure_phase_2 - 1),
+        (measure_phase_2 - 1 < period) & (period < measure_phase_2),
+    ]
+    choices = [
+        savings_1,
+        savings_1 * fraction_1 + savings_2 * (1 - fraction_1),
+        savings_2,
+        savings_2 * fraction_2,
+    ]
+
+    return np.select(conditions, choices, default=0.0)
+
+def present_value_generation_benefits(avoided_cost_quarter, generation_cost, measure_quarter, eulq_1, eulq_2, kwh_1, kwh_2, quarterly_discount):
+    ### parameters:
+    ###     avoided_cost_quarter : array of quarter indices from the avoided
+    ###         cost electric table
+    ###     generation_cost : array of avoided generation costs ('Gen') for
+    ###         each avoided cost quarter
+    ###     measure_quarter : array of measure installation quarter indices
+    ###     eulq_1, eulq_2 : arrays of first and second baseline useful lives
+    ###         in quarters
+    ###     kwh_1, kwh_2 : arrays of first and second baseline annual
+    ###         electric savings
+    ###     quarterly_discount : array of discount divisors for each avoided
+    ###         cost quarter, i.e., (1 + DiscountRateQtr) ** (Qi - first_year * 4),
+    ###         as provided by 'DiscountFactors.quarterly_array'
+    ###
+    ### returns:
+    ###     numpy array of present values of generation benefits for each
+    ###     measure-quarter pair
+
+    measure_quarter = np.asarray(measure_quarter, dtype=float)
+    annual_electric_savings_rate = savings_rate(
+        avoided_cost_quarter,
+        measure_quarter,
+        measure_quarter + eulq_1,
+        measure_quarter + eulq_2,
+        eulq_1,
+        eulq_2,
+        kwh_1,
+        kwh_2
+    )
+
+    generation_benefits = (
+        annual_electric_savings_rate *
+        np.asarray(generation_cost, dtype=float) /
+        np.asarray(quarterly_discount, dtype=float)
+    )
+
+    return generation_benefits
+
+def present_value_transmission_and_distribution_benefits(avoided_cost_quarter, transmission_and_distribution_cost, demand_savings_type, measure_quarter, eulq_1, eulq_2, kwh_1, kwh_2, kw_1, kw_2, quarterly_discount):
+    ### parameters:
+    ###     avoided_cost_quarter : array of quarter indices from the avoided
+    ###         cost electric table
+    ###     transmission_and_distribution_cost : array of avoided transmission
+    ###         and distribution costs ('TD') for each avoided cost quarter
+    ###     demand_savings_type : array of 'DSType' values for each avoided
+    ###         cost quarter, selecting kWh or kW savings
+    ###     measure_quarter : array of measure installation quarter indices
+    ###     eulq_1, eulq_2 : arrays of first and second baseline useful lives
+    ###         in quarters
+    ###     kwh_1, kwh_2 : arrays of first and second baseline annual
+    ###         electric savings
+    ###     kw_1, kw_2 : arrays of first and second baseline demand reductions
+    ###     quarterly_discount : array of discount divisors for each avoided
+    ###         cost quarter, i.e., (1 + DiscountRateQtr) ** (Qi - first_year * 4),
+    ###         as provided by 'DiscountFactors.quarterly_array'
+    ###
+    ### returns:
+    ###     numpy array of present values of transmission and distribution
+    ###     benefits for each measure-quarter pair
+
+    energy_savings_type = np.asarray(demand_savings_type) == 'kWh'
+    ds_1 = np.where(energy_savings_type, kwh_1, kw_1)
+    ds_2 = np.where(energy_savings_type, kwh_2, kw_2)
+
+    measure_quarter = np.asarray(measure_quarter, dtype=float)
+    annual_demand_reduction = savings_rate(
+        avoided_cost_quarter,
+        measure_quarter,
+        measure_quarter + eulq_1,
+        measure_quarter + eulq_2,
+        eulq_1,
+        eulq_2,
+        ds_1,
+        ds_2
+    )
+
+    transmission_and_distribution_benefits = (
+        annual_demand_reduction *
+        np.asarray(transmission_and_distribution_cost, dtype=float) /
+        np.asarray(quarterly_discount, dtype=float)
+    )
+
+    return transmission_and_distribution_benefits
+
+def present_value_gas_benefits(avoided_cost_quarter, gas_cost, measure_quarter, eulq_1, eulq_2, therm_1, therm_2, quarterly_discount):
+    ### parameters:
+    ###     avoided_cost_quarter : array of quarter indices from the avoided
+    ###         cost gas table
+    ###     gas_cost : array of avoided natural gas costs ('Cost') for each
+    ###         avoided cost quarter
+    ###     measure_quarter : array of measure installation quarter indices
+    ###     eulq_1, eulq_2 : arrays of first and second baseline useful lives
+    ###         in quarters
+    ###     therm_1, therm_2 : arrays of first and second baseline annual
+    ###         natural gas savings
+    ###     quarterly_discount : array of discount divisors for each avoided
+    ###         cost quarter, i.e., (1 + DiscountRateQtr) ** (Qi - first_year * 4),
+    ###         as provided by 'DiscountFactors.quarterly_array'
+    ###
+    ### returns:
+    ###     numpy array of present values of natural gas benefits for each
+    ###     measure-quarter pair
+
+    measure_quarter = np.asarray(measure_quarter, dtype=float)
+    annual_gas_savings_rate = savings_rate(
+        avoided_cost_quarter,
+        measure_quarter,
+        measure_quarter + eulq_1,
+        measure_quarter + eulq_2,
+        eulq_1,
+        eulq_2,
+        therm_1,
+        therm_2
+    )
+
+    gas_benefits = (
+        annual_gas_savings_rate *
+        np.asarray(gas_cost, dtype=float) /
+        np.asarray(quarterly_discount, dtype=float)
+    )
+
+    return gas_benefits
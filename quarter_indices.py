@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+# universal quarter indices, 4 * year + quarter - 1, of quarter labels of the
+# form 'YYYYQn', cached by label. labels repeat across the rows of a table and
+# across tables and sources, so each distinct label is parsed only once and
+# its index is broadcast to the rows by factorization codes:
+parsed_quarter_indices = {}
+
+def quarter_index(labels):
+    ### parameters:
+    ###     labels : a pandas Series of quarter labels, such as the
+    ###         'InstallationQuarter' or 'ApplicableQuarter' column of a table,
+    ###         as strings or categoricals
+    ###
+    ### returns:
+    ###     numpy array of int64 quarter indices, one per label
+
+    codes, uniques = pd.factorize(labels)
+    if (codes < 0).any():
+        raise ValueError('missing quarter labels have no quarter index')
+    for label in uniques:
+        if label not in parsed_quarter_indices:
+            year,quarter = list(map(int,str(label).split('Q')))
+            parsed_quarter_indices[label] = 4 * year + quarter - 1
+    indices = np.array([parsed_quarter_indices[label] for label in uniques], dtype=np.int64)
+    return indices[codes]
@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+from multiprocessing import shared_memory
+
+from avoided_cost_store import AvoidedCostStore, dictionary_encode
+
+# reference tables filtered by input measure in the cet calculations--each
+# table is sorted by its lookup key and period column, and keeps a dictionary
+# from lookup key to the contiguous block of rows sharing that key, so filtering
+# by measure is a hash lookup plus a binary search over the block's periods.
+# instances hold only a pandas DataFrame and numpy arrays, so they are
+# picklable by the standard library for use in multiprocessing pools. after
+# 'share_memory' is called, pickled copies carry only the names of shared
+# memory blocks holding the table's columns, and attach to them when unpickled;
+# likewise, after 'memory_map' is called, pickled copies carry only the
+# directory of the memory-mapped store of the table's columns:
+class ReferenceTable:
+    source = ''
+    data = pd.DataFrame()
+    lookup_key = []
+    measure_key = []
+    period_column = None
+    index = {}
+    periods = None
+    shared_columns = None
+    shared_memory_blocks = []
+    mapped_directory = None
+    slice_cache = None
+
+    def __init__(self, data, source=''):
+        ### parameters:
+        ###     data : a pandas DataFrame with the lookup key and period columns
+        ###         as either columns or index levels
+        ###     source : a string, either 'csv' or 'database', recording the
+        ###         source from which the data was retrieved
+
+        if any(name is not None for name in data.index.names):
+            data = data.reset_index()
+        sort_columns = self.lookup_key + ([self.period_column] if self.period_column else [])
+        self.data = data.sort_values(sort_columns, kind='stable').reset_index(drop=True)
+        self.source = source
+        self.build_index()
+
+    def build_index(self):
+        # map each lookup key to the bounds of its block of rows:
+        self.index = {}
+        for key, positions in self.data.groupby(self.lookup_key, sort=False).indices.items():
+            if not isinstance(key, tuple):
+                key = (key,)
+            self.index[key] = (positions[0], positions[-1] + 1)
+        if self.period_column:
+            self.periods = self.data[self.period_column].to_numpy(dtype=float)
+
+    def measure_lookup_key(self, measure):
+        return tuple(measure[c] for c in self.measure_key)
+
+    def measure_periods(self, measure):
+        # returns the half-open range [start, end) of periods applicable to the
+        # measure, or None for tables without a period column:
+        return None
+
+    def rows(self, key, periods=None):
+        ### returns a slice of the positions of rows matching the lookup key
+        ### and, if given, within the half-open range of periods
+        start, end = self.index.get(key, (0, 0))
+        if periods is not None and end > start:
+            block_periods = self.periods[start:end]
+            start, end = (
+                start + np.searchsorted(block_periods, periods[0], side='left'),
+                start + np.searchsorted(block_periods, periods[1], side='left')
+            )
+        return slice(start, end)
+
+    def filtered_rows(self, key, periods=None):
+        ### returns a pandas DataFrame with the rows matching the lookup key
+        ### and, if given, within the half-open range of periods
+        return self.data.iloc[self.rows(key, periods)]
+
+    def filter_by_measure(self, measure):
+        ### returns a pandas DataFrame with the rows matching a single input
+        ### measure, from the table's slice cache if one is set
+        key = self.measure_lookup_key(measure)
+        periods = self.measure_periods(measure)
+        if self.slice_cache is None:
+            return self.filtered_rows(key, periods)
+        return self.slice_cache.get(
+            (type(self).__name__, key, periods),
+            lambda: self.filtered_rows(key, periods)
+        )
+
+    def share_memory(self):
+        ### places each column of the table into a block of shared memory as
+        ### a numpy array--numeric columns as is and all others as integer
+        ### category codes--so worker processes attach to the arrays without
+        ### copying instead of receiving the table's data by pickle
+        if self.shared_columns is not None or self.mapped_directory is not None:
+            return self
+        self.shared_columns = []
+        self.shared_memory_blocks = []
+        for column in self.data.columns:
+            if self.data[column].dtype.kind in 'biuf':
+                values = self.data[column].to_numpy()
+                categorical_dtype = None
+            else:
+                values, categorical_dtype = dictionary_encode(self.data[column])
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+            self.shared_memory_blocks.append(block)
+            self.shared_columns.append(
+                (column, block.name, values.dtype.str, len(values), categorical_dtype)
+            )
+        return self
+
+    def attach_shared_memory(self):
+        # rebuild the table's data from arrays backed by shared memory:
+        self.shared_memory_blocks = []
+        columns = {}
+        for column, block_name, dtype, length, categorical_dtype in self.shared_columns:
+            block = shared_memory.SharedMemory(name=block_name)
+            self.shared_memory_blocks.append(block)
+            values = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+            if categorical_dtype is None:
+                columns[column] = values
+            else:
+                columns[column] = pd.Categorical.from_codes(values, dtype=categorical_dtype)
+        self.data = pd.DataFrame(columns, copy=False)
+        if self.period_column:
+            self.periods = self.data[self.period_column].to_numpy(dtype=float)
+
+    def release_shared_memory(self):
+        ### frees the shared memory blocks created by 'share_memory'; the
+        ### table's own data remains available in the creating process
+        for block in self.shared_memory_blocks:
+            block.close()
+            block.unlink()
+        self.shared_columns = None
+        self.shared_memory_blocks = []
+
+    def memory_map(self, directory, max_stores=None):
+        ### writes the table's columns to an 'AvoidedCostStore' in a
+        ### subdirectory of the given directory named by the table's content,
+        ### and replaces its data with read-only memory maps of the stored
+        ### arrays, shared through the operating system's page cache by every
+        ### process reading the table. at most 'max_stores' stores are kept
+        ### in the directory
+        self.mapped_directory = AvoidedCostStore.write_by_content(self.data, directory, max_stores).directory
+        self.attach_memory_map()
+        return self
+
+    def attach_memory_map(self):
+        self.data = AvoidedCostStore(self.mapped_directory).read()
+        if self.period_column:
+            self.periods = self.data[self.period_column].to_numpy(dtype=float)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('shared_memory_blocks', None)
+        if self.shared_columns is not None or self.mapped_directory is not None:
+            state.pop('data', None)
+            state.pop('periods', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.shared_columns is not None:
+            self.attach_shared_memory()
+        elif self.mapped_directory is not None:
+            self.attach_memory_map()
+
+class InputProgramsTable(ReferenceTable):
+    lookup_key = ['ProgramID']
+    measure_key = ['ProgramID']
+    period_column = 'Qi'
+
+    def measure_periods(self, measure):
+        return (measure.Qi, measure.Qi + 1)
+
+class SettingsTable(ReferenceTable):
+    lookup_key = ['ProgramAdministrator']
+    measure_key = ['ProgramAdministrator']
+
+class EmissionsTable(ReferenceTable):
+    lookup_key = [
+        'ProgramAdministrator',
+        'ElectricTargetSector',
+        'ElectricEndUse',
+        'ClimateZone'
+    ]
+    measure_key = lookup_key
+
+class CombustionTypesTable(ReferenceTable):
+    lookup_key = ['LookupCode']
+    measure_key = ['CombustionType']
+
+class AvoidedCostElectricTable(ReferenceTable):
+    lookup_key = [
+        'ProgramAdministrator',
+        'ElectricTargetSector',
+        'ElectricEndUse',
+        'ClimateZone'
+    ]
+    measure_key = lookup_key
+    period_column = 'Qi'
+    cumulative_avoided_costs = None
+
+    def measure_periods(self, measure):
+        return (int(measure.Qi), int(measure.Qi + measure.EULq))
+
+class AvoidedCostGasTable(ReferenceTable):
+    lookup_key = [
+        'ProgramAdministrator',
+        'GasTargetSector',
+        'GasSavingsProfile'
+    ]
+    measure_key = lookup_key
+    period_column = 'Qi'
+    cumulative_avoided_costs = None
+
+    def measure_periods(self, measure):
+        return (int(measure.Qi), int(measure.Qi + measure.EULq))
+
+class RateScheduleElectricTable(ReferenceTable):
+    lookup_key = [
+        'ProgramAdministrator',
+        'ElectricTargetSector'
+    ]
+    measure_key = lookup_key
+    period_column = 'ApplicableYear'
+
+    def measure_periods(self, measure):
+        return (int(measure.Qi / 4), int((measure.Qi + measure.EULq) / 4))
+
+    def filtered_rows(self, key, periods=None):
+        # include rates applicable to all target sectors:
+        program_administrator, target_sector = key
+        return pd.concat([
+            self.data.iloc[self.rows((program_administrator, sector), periods)]
+            for sector in [target_sector, 'ALL']
+        ])
+
+class RateScheduleGasTable(ReferenceTable):
+    lookup_key = [
+        'ProgramAdministrator',
+        'GasTargetSector'
+    ]
+    measure_key = lookup_key
+    period_column = 'ApplicableYear'
+
+    def measure_periods(self, measure):
+        return (int(measure.Qi / 4), int((measure.Qi + measure.EULq) / 4))
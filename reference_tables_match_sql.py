@@ -0,0 +1,13 @@
+from reference_tables import AvoidedCostElectricTable, AvoidedCostGasTable
+
+# avoided cost tables including an extra quarter following each measure's
+# effective useful life to match the sql version of the cet:
+class AvoidedCostElectricTableMatchSQL(AvoidedCostElectricTable):
+    def measure_periods(self, measure):
+        #INCLUDE EXTRA QUARTER TO MATCH SQL:
+        return (measure.Qi, measure.Qi + measure.EULq + 1)
+
+class AvoidedCostGasTableMatchSQL(AvoidedCostGasTable):
+    def measure_periods(self, measure):
+        #INCLUDE EXTRA QUARTER TO MATCH SQL:
+        return (measure.Qi, measure.Qi + measure.EULq + 1)
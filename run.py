@@ -1,6 +1,10 @@
 import numpy as np
 import pandas as pd
-import tables, tables_match_sql
+import tables, tables_match_sql, multiprocessing_helper
+from discount_factors import DiscountFactors
+from models import EDCS_ConnectionPool
+from table_cache import TableCache
+from slice_cache import SliceCache
 
 from calc import calculate_measure_cost_effectiveness, \
     calculate_program_cost_effectiveness, \
@@ -8,6 +12,8 @@ from calc import calculate_measure_cost_effectiveness, \
 
 import os
 import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime as dt
 import dill as pickle
 
 class CET_Scenario:
@@ -30,6 +36,14 @@ class CET_Scenario:
         },
     }
     user = None
+    ConnectionPool = None
+    owns_connection_pool = False
+    connection_pool_size = 4
+    TableCache = None
+    SliceCache = None
+    slice_cache_size = 2**16
+    memory_map_directory = None
+    memory_map_stores = 2
     acc_source = ''
     acc_version = None
     acc_source_directory = ''
@@ -48,6 +62,8 @@ class CET_Scenario:
     AvoidedCostGas = None
     RateScheduleElectric = None
     RateScheduleGas = None
+    DiscountFactors = None
+    WorkerPool = None
     OutputMeasures = None
     OutputPrograms = None
     OutputPortfolio = None
@@ -59,7 +75,30 @@ class CET_Scenario:
         'program_administrator_cost_test' : None,
         'ratepayer_impact_measure'        : None,
     }
+    retrieval_times = {}
+    # tables retrieved for a scenario, each with its setup method and the
+    #     tables on which the setup depends:
+    __table_dependencies__ = {
+        'InputMeasures'        : ('setup_input_measures', []),
+        'InputPrograms'        : ('setup_input_programs', []),
+        'Settings'             : ('setup_settings', ['InputMeasures']),
+        'DiscountFactors'      : ('setup_discount_factors', ['Settings']),
+        'Emissions'            : ('setup_emissions', ['InputMeasures']),
+        'CombustionTypes'      : ('setup_combustion_types', ['InputMeasures']),
+        'AvoidedCostElectric'  : ('setup_avoided_cost_electric', ['InputMeasures','DiscountFactors']),
+        'AvoidedCostGas'       : ('setup_avoided_cost_gas', ['InputMeasures','DiscountFactors']),
+        'RateScheduleElectric' : ('setup_rate_schedule_electric', ['InputMeasures']),
+        'RateScheduleGas'      : ('setup_rate_schedule_gas', ['InputMeasures']),
+    }
+    __concurrent_retrieval__ = False
     __parallelize__ = False
+    __share_memory__ = False
+    __vectorize__ = False
+    __group_by_lookup_key__ = False
+    __cumulative_sums__ = False
+    __fuse_stages__ = False
+    __float32_rates__ = False
+    __memoize_slices__ = False
     __match_sql__ = False
     __tbl__ = None
 
@@ -75,10 +114,33 @@ class CET_Scenario:
             first_year = 2018,
             market_effects_benefits = 0.05,
             market_effects_costs = 0.05,
+            concurrent_retrieval = False,
             parallelize = False,
-            match_sql = False
+            share_memory = False,
+            vectorize = False,
+            group_by_lookup_key = False,
+            cumulative_sums = False,
+            fuse_stages = False,
+            float32_rates = False,
+            memoize_slices = False,
+            slice_cache_size = 2**16,
+            match_sql = False,
+            discount_factors = None,
+            connection_pool = None,
+            connection_pool_size = 4,
+            cache_directory = None,
+            cache_size = 2**32,
+            memory_map_directory = None,
+            memory_map_stores = 2
     ):
         self.user = user
+        self.ConnectionPool = connection_pool
+        self.connection_pool_size = connection_pool_size
+        if cache_directory is not None:
+            self.TableCache = TableCache(cache_directory, cache_size)
+        self.memory_map_directory = memory_map_directory
+        self.memory_map_stores = memory_map_stores
+        self.slice_cache_size = slice_cache_size
         self.inputs_source = inputs_source
         self.input_measures_source_name = input_measures_source_name
         self.input_programs_source_name = input_programs_source_name
@@ -88,8 +150,17 @@ class CET_Scenario:
         self.first_year = first_year
         self.market_effects_benefits = market_effects_benefits
         self.market_effects_costs = market_effects_costs
+        self.set_concurrent_retrieval(concurrent_retrieval)
         self.set_parallelize(parallelize)
+        self.set_share_memory(share_memory)
+        self.set_vectorize(vectorize)
+        self.set_group_by_lookup_key(group_by_lookup_key)
+        self.set_cumulative_sums(cumulative_sums)
+        self.set_fuse_stages(fuse_stages)
+        self.set_float32_rates(float32_rates)
+        self.set_memoize_slices(memoize_slices)
         self.set_match_sql(match_sql)
+        self.DiscountFactors = discount_factors
 
         self.retrieve_all_tables()
         self.setup_output_measures()
@@ -104,7 +175,8 @@ class CET_Scenario:
                 self.first_year,
                 self.market_effects_benefits,
                 self.market_effects_costs,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool
             )
 
     def setup_input_programs(self):
@@ -112,7 +184,8 @@ class CET_Scenario:
             self.__tbl__.setup_input_programs(
                 self.inputs_source,
                 self.input_programs_source_name,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool
             )
 
     def setup_settings(self):
@@ -126,7 +199,8 @@ class CET_Scenario:
                 source_name,
                 self.acc_version,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool
             )
 
     def setup_emissions(self):
@@ -146,7 +220,8 @@ class CET_Scenario:
                 source_name,
                 self.acc_version,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool
             )
 
     def setup_combustion_types(self):
@@ -159,7 +234,8 @@ class CET_Scenario:
                 self.acc_source,
                 source_name,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool
             )
 
     def setup_avoided_cost_electric(self):
@@ -171,12 +247,31 @@ class CET_Scenario:
             )
         else:
             source_name = self.__acc_tbl_names__[self.acc_version]['electric']
+        # cumulative present values and cached tables are only used by the
+        #     standard calculations:
+        if self.match_sql:
+            discount_factors = {}
+        else:
+            discount_factors = {
+                'discount_factors' : self.DiscountFactors,
+                'table_cache'      : self.TableCache,
+                'acc_version'      : self.acc_version,
+            }
         self.AvoidedCostElectric = \
             self.__tbl__.setup_avoided_cost_electric(
                 self.acc_source,
                 source_name,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool,
+                **discount_factors
+            )
+        # optionally memory-map the table from a compact store on disk shared
+        #     by all processes:
+        if self.memory_map_directory is not None:
+            self.AvoidedCostElectric.memory_map(
+                os.path.join(self.memory_map_directory, 'AvoidedCostElectric'),
+                self.memory_map_stores
             )
 
     def setup_avoided_cost_gas(self):
@@ -188,12 +283,31 @@ class CET_Scenario:
             )
         else:
             source_name = self.__acc_tbl_names__[self.acc_version]['gas']
+        # cumulative present values and cached tables are only used by the
+        #     standard calculations:
+        if self.match_sql:
+            discount_factors = {}
+        else:
+            discount_factors = {
+                'discount_factors' : self.DiscountFactors,
+                'table_cache'      : self.TableCache,
+                'acc_version'      : self.acc_version,
+            }
         self.AvoidedCostGas = \
             self.__tbl__.setup_avoided_cost_gas(
                 self.acc_source,
                 source_name,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool,
+                **discount_factors
+            )
+        # optionally memory-map the table from a compact store on disk shared
+        #     by all processes:
+        if self.memory_map_directory is not None:
+            self.AvoidedCostGas.memory_map(
+                os.path.join(self.memory_map_directory, 'AvoidedCostGas'),
+                self.memory_map_stores
             )
 
     def setup_rate_schedule_electric(self):
@@ -210,7 +324,9 @@ class CET_Scenario:
                 source_name,
                 self.acc_version,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool,
+                rate_dtype=self.rate_dtype
             )
 
     def setup_rate_schedule_gas(self):
@@ -227,20 +343,78 @@ class CET_Scenario:
                 source_name,
                 self.acc_version,
                 self.InputMeasures,
-                self.user
+                self.user,
+                connection_pool=self.ConnectionPool,
+                rate_dtype=self.rate_dtype
             )
 
+    # database connections opened for the table loads are closed once all
+    #     tables are retrieved, or a retrieval fails:
     def retrieve_all_tables(self):
-        self.setup_input_measures()
-        self.setup_input_programs()
-        self.setup_settings()
-        self.setup_emissions()
-        self.setup_combustion_types()
-        self.setup_avoided_cost_electric()
-        self.setup_avoided_cost_gas()
-        self.setup_rate_schedule_electric()
-        self.setup_rate_schedule_gas()
+        self.setup_connection_pool()
+        self.retrieval_times = {}
+        try:
+            if self.concurrent_retrieval:
+                self.retrieve_tables_concurrently()
+            else:
+                for table_name in self.__table_dependencies__:
+                    self.retrieve_table(table_name)
+        finally:
+            self.close_connection_pool()
 
+    # run the setup method of a single table, recording its load time:
+    def retrieve_table(self, table_name):
+        setup_method, _ = self.__table_dependencies__[table_name]
+        start_time = dt.now()
+        getattr(self, setup_method)()
+        self.retrieval_times[table_name] = (dt.now() - start_time).total_seconds()
+
+    # retrieve tables in a pool of threads, starting each table's setup as
+    #     soon as the tables on which it depends are ready, so that independent
+    #     database queries and file reads overlap:
+    def retrieve_tables_concurrently(self):
+        waiting = dict(self.__table_dependencies__)
+        ready = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.connection_pool_size) as executor:
+            while waiting or running:
+                for table_name, (_, dependencies) in list(waiting.items()):
+                    if all(dependency in ready for dependency in dependencies):
+                        running[executor.submit(self.retrieve_table, table_name)] = table_name
+                        del waiting[table_name]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    ready.add(running.pop(future))
+        print('< Tables Retrieved Concurrently: {} >'.format(', '.join(
+            '{} {:.3f} s'.format(table_name, retrieval_time)
+            for table_name, retrieval_time in self.retrieval_times.items()
+        )))
+
+    # open database connections through one pool shared by all table loads,
+    #     unless all tables are read from local files:
+    def setup_connection_pool(self):
+        if self.ConnectionPool is None and 'database' in [self.inputs_source, self.acc_source]:
+            self.ConnectionPool = EDCS_ConnectionPool(
+                self.user['id'],
+                self.user['passwd'],
+                pool_size=self.connection_pool_size
+            )
+            self.owns_connection_pool = True
+
+    # close a pool opened by this scenario; a pool passed to the scenario is
+    #     left open for the other scenarios sharing it:
+    def close_connection_pool(self):
+        if self.ConnectionPool is not None and self.owns_connection_pool:
+            self.ConnectionPool.close()
+            self.ConnectionPool = None
+            self.owns_connection_pool = False
+
+    # build discount factor tables once per scenario, or reuse those of an
+    # earlier scenario with the same settings and first year:
+    def setup_discount_factors(self):
+        if self.DiscountFactors is None or not self.DiscountFactors.matches(self.Settings, self.first_year):
+            self.DiscountFactors = DiscountFactors(self.Settings, self.first_year)
 
     def setup_output_measures(self):
         self.OutputMeasures = \
@@ -254,13 +428,111 @@ class CET_Scenario:
         self.OutputPortfolio = \
             self.__tbl__.setup_output_portfolio()
 
+    # start a pool of worker processes with the reference tables preloaded in
+    # each worker, reused by every parallelized stage until stopped:
+    def start_worker_pool(self):
+        if self.WorkerPool is not None:
+            return
+        reference_tables = {
+            'Settings'             : self.Settings,
+            'Emissions'            : self.Emissions,
+            'CombustionTypes'      : self.CombustionTypes,
+            'AvoidedCostElectric'  : self.AvoidedCostElectric,
+            'AvoidedCostGas'       : self.AvoidedCostGas,
+            'RateScheduleElectric' : self.RateScheduleElectric,
+            'RateScheduleGas'      : self.RateScheduleGas,
+        }
+        # optionally place reference tables in shared memory, so each worker
+        # attaches to them instead of receiving pickled copies. the shared
+        # memory is released again if the pool fails to start:
+        try:
+            if self.share_memory:
+                for table in reference_tables.values():
+                    table.share_memory()
+            if not self.match_sql:
+                reference_tables['DiscountFactors'] = self.DiscountFactors
+            self.WorkerPool = multiprocessing_helper.WorkerPool(reference_tables)
+        except:
+            self.release_shared_memory()
+            raise
+
+    def stop_worker_pool(self):
+        if self.WorkerPool is None:
+            return
+        try:
+            self.WorkerPool.close()
+        finally:
+            self.WorkerPool = None
+            self.release_shared_memory()
+
+    def release_shared_memory(self):
+        if self.share_memory:
+            for table in self.reference_tables():
+                table.release_shared_memory()
+
     # calculate measure-level benefits and costs:
     def run_cet(self):
         print('< Calculating Cost Effectiveness ... >')
-        self.OutputMeasures.data = calculate_measure_cost_effectiveness(self)
+        self.setup_slice_cache()
+        try:
+            self.OutputMeasures.data = calculate_measure_cost_effectiveness(self)
+        finally:
+            self.release_slice_cache()
         self.OutputPrograms.data = calculate_program_cost_effectiveness(self)
         self.OutputPortfolio.data = calculate_portfolio_cost_effectiveness(self)
 
+    # share one cache of filtered reference table slices among all reference
+    #     tables for the duration of a serial run, counting hits and misses
+    #     anew. parallelized runs filter slices in worker processes, which are
+    #     not cached:
+    def setup_slice_cache(self):
+        if not self.memoize_slices or self.parallelize:
+            self.SliceCache = None
+            return
+        self.SliceCache = SliceCache(self.slice_cache_size)
+        for table in self.reference_tables():
+            table.slice_cache = self.SliceCache
+
+    # detach the cache from the reference tables and free its slices, keeping
+    #     its counts:
+    def release_slice_cache(self):
+        if self.SliceCache is None:
+            return
+        for table in self.reference_tables():
+            table.slice_cache = None
+        self.SliceCache.clear()
+        print('< Reference Slice Cache: {} hits, {} misses >'.format(
+            self.slice_cache_hits,
+            self.slice_cache_misses
+        ))
+
+    def reference_tables(self):
+        return [
+            self.Settings,
+            self.Emissions,
+            self.CombustionTypes,
+            self.AvoidedCostElectric,
+            self.AvoidedCostGas,
+            self.RateScheduleElectric,
+            self.RateScheduleGas,
+        ]
+
+    # counts of the last run's slice cache, or None if slices were not cached:
+    @property
+    def slice_cache_hits(self):
+        return self.SliceCache.hits if self.SliceCache is not None else None
+
+    @property
+    def slice_cache_misses(self):
+        return self.SliceCache.misses if self.SliceCache is not None else None
+
+    def set_concurrent_retrieval(self,b):
+        self.__concurrent_retrieval__ = b
+
+    @property
+    def concurrent_retrieval(self):
+        return self.__concurrent_retrieval__
+
     def set_parallelize(self,b):
         self.__parallelize__ = b
 
@@ -268,6 +540,64 @@ class CET_Scenario:
     def parallelize(self):
         return self.__parallelize__
 
+    def set_share_memory(self,b):
+        self.__share_memory__ = b
+
+    @property
+    def share_memory(self):
+        return self.__share_memory__
+
+    def set_vectorize(self,b):
+        self.__vectorize__ = b
+
+    @property
+    def vectorize(self):
+        return self.__vectorize__
+
+    def set_group_by_lookup_key(self,b):
+        self.__group_by_lookup_key__ = b
+
+    @property
+    def group_by_lookup_key(self):
+        return self.__group_by_lookup_key__
+
+    # calculate avoided costs from cumulative present values built with the
+    #     avoided cost tables:
+    def set_cumulative_sums(self,b):
+        self.__cumulative_sums__ = b
+
+    @property
+    def cumulative_sums(self):
+        return self.__cumulative_sums__
+
+    def set_fuse_stages(self,b):
+        self.__fuse_stages__ = b
+
+    @property
+    def fuse_stages(self):
+        return self.__fuse_stages__
+
+    # read electric and gas rates as 32-bit floats:
+    def set_float32_rates(self,b):
+        self.__float32_rates__ = b
+
+    @property
+    def float32_rates(self):
+        return self.__float32_rates__
+
+    @property
+    def rate_dtype(self):
+        return np.float32 if self.float32_rates else np.float64
+
+    # memoize reference table slices filtered by measure during each serial
+    #     run:
+    def set_memoize_slices(self,b):
+        self.__memoize_slices__ = b
+
+    @property
+    def memoize_slices(self):
+        return self.__memoize_slices__
+
     def set_match_sql(self,b):
         self.__match_sql__ = b
         if self.__match_sql__:
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+# bounded, least-recently-used cache of reference table rows filtered by
+# measure, keyed by table, lookup key, and period window, and shared by every
+# reference table of a serial cet run so a slice filtered for one stage (e.g.,
+# avoided electric costs) is reused by the next (e.g., emissions reductions)
+# and by other measures sharing the key and window. slices are filtered anew
+# on every call otherwise, most expensively for the electric rate schedule,
+# whose slices add the rows of the 'ALL' target sector:
+class SliceCache:
+    max_entries = 2**16
+    entries = None
+    hits = 0
+    misses = 0
+
+    def __init__(self, max_entries=2**16):
+        ### parameters:
+        ###     max_entries : an int, the number of slices above which the
+        ###         least recently used slices are removed
+
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, filter_function):
+        ### returns the cached slice for the key, or calls filter_function to
+        ### filter and cache it
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        rows = filter_function()
+        self.entries[key] = rows
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return rows
+
+    def clear(self):
+        ### removes all cached slices, keeping the hit and miss counts
+        self.entries = OrderedDict()
+
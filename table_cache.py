@@ -0,0 +1,110 @@
+import hashlib, os
+import pandas as pd
+
+# feather files are used when pyarrow is available, and pickle files otherwise:
+try:
+    import pyarrow
+    cache_file_format = 'feather'
+except ImportError:
+    cache_file_format = 'pickle'
+
+# on-disk cache of normalized tables, stored as one columnar file per table in
+# a cache directory and identified by a hash of the source name, a fingerprint
+# of the source, and any other parameters affecting the table. a changed source
+# produces a new key, so stale entries are never read and are removed by the
+# size-bounded, least-recently-used eviction:
+class TableCache:
+    directory = ''
+    max_bytes = 0
+    file_format = cache_file_format
+
+    def __init__(self, directory, max_bytes=2**32):
+        ### parameters:
+        ###     directory : a string containing the path of the cache directory,
+        ###         created if needed
+        ###     max_bytes : an int, the total size of cached files above which
+        ###         the least recently used files are removed
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, *parts):
+        ### returns a hexadecimal digest identifying a table by the string
+        ### representations of the given parts
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(repr(part).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def file_fingerprint(self, file_name):
+        ### returns a tuple of a file's absolute path, size, and modification
+        ### time in nanoseconds, which change whenever the file is rewritten,
+        ### so multi-gigabyte sources are not read to be identified
+        stat = os.stat(file_name)
+        return (os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns)
+
+    def path(self, key):
+        return os.path.join(self.directory, '{}.{}'.format(key, self.file_format))
+
+    def load(self, key):
+        ### returns the cached pandas DataFrame for the key, or None if the
+        ### table is not cached
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            if self.file_format == 'feather':
+                data = pd.read_feather(path)
+            else:
+                data = pd.read_pickle(path)
+        except Exception:
+            self.invalidate(key)
+            return None
+        # mark as recently used for eviction:
+        os.utime(path)
+        return data
+
+    def store(self, key, data):
+        ### writes a pandas DataFrame to the cache under the key, then evicts
+        ### least recently used files while the cache exceeds its size limit
+        path = self.path(key)
+        temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+        if self.file_format == 'feather':
+            data.reset_index(drop=True).to_feather(temporary_path)
+        else:
+            data.to_pickle(temporary_path)
+        os.replace(temporary_path, path)
+        self.evict()
+
+    def invalidate(self, key=None):
+        ### removes the cached file for the key, or all cached files if no key
+        ### is given
+        if key is None:
+            paths = [path for path, _, _ in self.cached_files()]
+        else:
+            paths = [self.path(key)]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cached_files(self):
+        # returns (path, size, last use time) of each cached file, least
+        #     recently used first:
+        cached_files = []
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith('.' + self.file_format):
+                path = os.path.join(self.directory, file_name)
+                stat = os.stat(path)
+                cached_files.append((path, stat.st_size, stat.st_mtime))
+        return sorted(cached_files, key=lambda f: f[2])
+
+    def evict(self):
+        cached_files = self.cached_files()
+        total_bytes = sum(size for _, size, _ in cached_files)
+        for path, size, _ in cached_files[:-1]:
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            total_bytes -= size
@@ -0,0 +1,126 @@
+import numpy as np
+
+# schema of a source table, naming the columns used by the cet calculations and
+# the dtypes with which they are read--categoricals for the repeated labels of
+# program administrators, sectors, end uses, and climate zones, and floats for
+# values. columns given a dtype of None are kept with their inferred dtype, and
+# 'rate' resolves to the schema's rate dtype. columns listed in a schema but
+# missing from a source are ignored, so optional columns such as 'CO2' may be
+# listed. with 'project' set, all other columns are dropped as the table is
+# read:
+class TableSchema:
+    columns = {}
+    project = True
+    rate_dtype = np.float64
+
+    def __init__(self, columns, project=True, rate_dtype=np.float64):
+        ### parameters:
+        ###     columns : a dictionary from source column name to a dtype, such
+        ###         as 'category' or np.float64, 'rate', or None
+        ###     project : a bool, whether columns not in the schema are dropped
+        ###     rate_dtype : the dtype of 'rate' columns, np.float32 to halve
+        ###         the memory of rate schedules
+
+        self.columns = columns
+        self.project = project
+        self.rate_dtype = rate_dtype
+
+    def with_rate_dtype(self, rate_dtype):
+        ### returns a copy of the schema reading 'rate' columns as rate_dtype,
+        ### so each scenario sets its rate dtype without changing the shared
+        ### schemas of 'table_schemas'
+        return TableSchema(self.columns, self.project, rate_dtype)
+
+    def dtypes(self):
+        ### returns a dictionary from column name to dtype for the columns
+        ### with a declared dtype, for use as the 'dtype' of pandas.read_csv
+        return {
+            column : self.rate_dtype if dtype == 'rate' else dtype
+            for column, dtype in self.columns.items() if dtype is not None
+        }
+
+    def usecols(self):
+        ### returns a function selecting the schema's columns, for use as the
+        ### 'usecols' of pandas.read_csv, or None if columns are not projected
+        if not self.project:
+            return None
+        return lambda column: column in self.columns
+
+    def apply(self, data):
+        ### returns a pandas DataFrame, such as the results of a query, with
+        ### its columns projected and cast to the schema's dtypes
+        if self.project:
+            data = data[[c for c in data.columns if c in self.columns]]
+        dtypes = {c : d for c, d in self.dtypes().items() if c in data.columns}
+        return data.astype(dtypes) if dtypes else data
+
+# schemas of the reference tables as retrieved from their sources, before
+# columns are renamed by the loaders in 'tables' and 'tables_match_sql'. 'Qac'
+# is used by the calculations matching the sql implementation:
+table_schemas = {
+    'Settings' : TableSchema({
+        'PA'                    : 'category',
+    }, project=False),
+    'Emissions' : TableSchema({
+        'PA'                    : 'category',
+        'TS'                    : 'category',
+        'EU'                    : 'category',
+        'CZ'                    : 'category',
+        'Version'               : None,
+        'NOx'                   : np.float64,
+        'PM10'                  : np.float64,
+    }),
+    'CombustionTypes' : TableSchema({
+        'LookupCode'            : 'category',
+        'NOx'                   : np.float64,
+    }),
+    'AvoidedCostElectric' : TableSchema({
+        'PA'                    : 'category',
+        'TS'                    : 'category',
+        'EU'                    : 'category',
+        'CZ'                    : 'category',
+        'Qtr'                   : 'category',
+        'Qac'                   : None,
+        'DSType'                : 'category',
+        'Gen'                   : np.float64,
+        'TD'                    : np.float64,
+        'CO2'                   : np.float64,
+    }),
+    'AvoidedCostGas' : TableSchema({
+        'PA'                    : 'category',
+        'GS'                    : 'category',
+        'GP'                    : 'category',
+        'Qtr'                   : 'category',
+        'Qac'                   : None,
+        'Total'                 : np.float64,
+        'Cost'                  : np.float64,
+    }),
+    'RateScheduleElectric' : TableSchema({
+        'PA'                    : 'category',
+        'Version'               : None,
+        'Schedule'              : 'category',
+        'TargetSector'          : 'category',
+        'Year'                  : None,
+        'RateE'                 : 'rate',
+    }),
+    'RateScheduleElectricMapping' : TableSchema({
+        'PA'                    : 'category',
+        'Version'               : None,
+        'Schedule'              : 'category',
+        'TargetSector'          : 'category',
+    }),
+    'RateScheduleGas' : TableSchema({
+        'PA'                    : 'category',
+        'Version'               : None,
+        'Schedule'              : 'category',
+        'GasSector'             : 'category',
+        'Year'                  : None,
+        'RateG'                 : 'rate',
+    }),
+    'RateScheduleGasMapping' : TableSchema({
+        'PA'                    : 'category',
+        'Version'               : None,
+        'GasRateSchedule'       : 'category',
+        'GasSector'             : 'category',
+    }),
+}
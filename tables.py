@@ -1,9 +1,33 @@
 from models import EDCS_Connection,EDCS_Table,EDCS_Query_Results,Local_CSV
+from reference_tables import InputProgramsTable, SettingsTable, \
+    EmissionsTable, CombustionTypesTable, AvoidedCostElectricTable, \
+    AvoidedCostGasTable, RateScheduleElectricTable, RateScheduleGasTable
+from cumulative_avoided_costs import electric_cumulative_avoided_costs, gas_cumulative_avoided_costs
+from table_schemas import table_schemas
+from quarter_indices import quarter_index
 
 import numpy as np
-import types, re
-
-def setup_input_measures(source, source_name, first_year, market_effects_benefits, market_effects_costs, user={}):
+import pandas as pd
+import re
+
+# helper function calculating the universal quarter index of installation
+#     and the lifetimes of the first and second baselines, in years and in
+#     quarters, for all input measures at once:
+def input_measure_calculated_columns(data):
+    rul_quarters = 4 * data.RUL
+    eul_quarters = 4 * data.EUL
+    single_baseline = rul_quarters == 0
+    return pd.DataFrame({
+        'Qi'    : quarter_index(data.InstallationQuarter).astype(float),
+        'EUL1'  : data.EUL.where(single_baseline, data.RUL),
+        'EUL2'  : data.EUL.where(~single_baseline, 0),
+        'EULq1' : eul_quarters.where(single_baseline, rul_quarters),
+        'EULq2' : eul_quarters.where(~single_baseline, 0),
+        'RULq'  : rul_quarters,
+        'EULq'  : eul_quarters,
+    }, index=data.index)
+
+def setup_input_measures(source, source_name, first_year, market_effects_benefits, market_effects_costs, user={}, connection_pool=None):
     ### Creates a table object of type EDCS_Table or Local_CSV containing input
     ### measure data retrieved from the EDCS database or a local file in any of
     ### several formats.
@@ -24,6 +48,9 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
     ###     user : a dictionary containing items labelled 'id' and 'passwd'
     ###         with strings corresponding to login information for the
     ###         EDCS Microsoft SQL Server
+    ###     connection_pool : an optional instance of class
+    ###         'EDCS_ConnectionPool' from which database connections are
+    ###         borrowed instead of opening new ones
 
     # load data from indicated source:
     if source == 'csv':
@@ -32,9 +59,9 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
         else:
             InputMeasures = Local_CSV(source_name, delimiter=',')
     elif source == 'database':
-        InputMeasures = EDCS_Table(source_name,user['id'],user['passwd'])
+        InputMeasures = EDCS_Table(source_name,user['id'],user['passwd'],connection_pool=connection_pool)
     else:
-        InputMeasures = EDCS_Table('InputMeasureCEDARS',user['id'],user['passwd'])
+        InputMeasures = EDCS_Table('InputMeasureCEDARS',user['id'],user['passwd'],connection_pool=connection_pool)
 
     # fix input measure column name and type issues:
     column_name_map = [
@@ -110,54 +137,27 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
     for old_name,new_name in column_name_map:
         InputMeasures.rename_column(old_name,new_name)
 
+    data = InputMeasures.data
+
     # Set values for missing columns:
-    if 'ImpactType' not in InputMeasures.data.columns:
-        new_column = {'ImpactType':[''] * InputMeasures.data.CET_ID.count()}
-        InputMeasures.append_columns(new_column)
-    if 'AnnualInflationRate' not in InputMeasures.data.columns:
-        new_column = {'AnnualInflationRate':[0] * InputMeasures.data.CET_ID.count()}
-        InputMeasures.append_columns(new_column)
-
-    InputMeasures.column_map('ClimateZone',lambda s: str(s).upper())
-    InputMeasures.column_map('ElectricEndUse',lambda s: s.upper())
-    InputMeasures.column_map('ElectricTargetSector',lambda s: s.upper())
-    InputMeasures.column_map('GasSavingsProfile',lambda s: str(s) or '')
-    InputMeasures.column_map('GasSavingsProfile',lambda s: s.upper())
-    InputMeasures.column_map('GasTargetSector',lambda s: str(s) or '')
-    InputMeasures.column_map('GasTargetSector',lambda s: s.upper())
-
-    # helper functions to replace missing measure-level market effects with default values:
-    f = lambda x: market_effects_benefits if x is None else x
-    InputMeasures.column_map('MarketEffectsBenefits', f)
-
-    f = lambda x: market_effects_costs if x is None else x
-    InputMeasures.column_map('MarketEffectsCosts', f)
-
-    # helper function to calculate additional columns for input measure table:
-    def input_measure_calculated_columns(data_frame_row):
-        year,quarter = list(map(int,data_frame_row.InstallationQuarter.split('Q')))
-        quarter_index = 4 * year + quarter - 1
-        rul_quarters = 4 * data_frame_row.RUL
-        eul_quarters = 4 * data_frame_row.EUL
-        if rul_quarters == 0:
-            EUL = [data_frame_row.EUL,0]
-            EULq = [eul_quarters,0]
-        else:
-            EUL = [data_frame_row.RUL,data_frame_row.EUL]
-            EULq = [rul_quarters,eul_quarters]
-        calculated_columns = {
-            'Qi'    : quarter_index,
-            'EUL1'  : EUL[0],
-            'EUL2'  : EUL[1],
-            'EULq1' : EULq[0],
-            'EULq2' : EULq[1],
-            'RULq'  : rul_quarters,
-            'EULq'  : eul_quarters,
-        }
-        return calculated_columns
+    if 'ImpactType' not in data.columns:
+        data['ImpactType'] = ''
+    if 'AnnualInflationRate' not in data.columns:
+        data['AnnualInflationRate'] = 0
+
+    # standardize lookup key columns, converting values to strings as 'str'
+    #     does, e.g., missing values to 'nan':
+    for column in ['ClimateZone','GasSavingsProfile','GasTargetSector']:
+        data[column] = pd.Series(data[column].to_numpy(dtype=object).astype(str), index=data.index)
+    for column in ['ClimateZone','ElectricEndUse','ElectricTargetSector','GasSavingsProfile','GasTargetSector']:
+        data[column] = data[column].str.upper()
+
+    # replace missing measure-level market effects with default values:
+    for column,default in [['MarketEffectsBenefits',market_effects_benefits],['MarketEffectsCosts',market_effects_costs]]:
+        data[column] = data[column].mask(np.equal(data[column].to_numpy(dtype=object), None), default)
 
     # append input measures with calculated columns:
-    InputMeasures.append_columns(InputMeasures.data.apply(input_measure_calculated_columns, axis='columns', result_type='expand'))
+    data = pd.concat([data, input_measure_calculated_columns(data)], axis='columns')
 
     nan_to_num_columns = ['Quantity','EUL','RUL','NTGRkW','NTGRkWh','NTGRTherm',
         'NTGRCost','IRkW','IRkWh','IRTherm','AnnualInflationRate','RRkW',
@@ -165,8 +165,7 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
         'kW2','kWh1','kWh2','Therm1','Therm2','UnitGrossCost1','UnitGrossCost2',
         'UnitLaborCost','UnitMaterialsCost','UnitEndUserRebate',
         'UnitIncentiveToOthers','EULq1','EULq2','RULq','EULq']
-    for column in nan_to_num_columns:
-        InputMeasures.column_map(column,np.nan_to_num)
+    data[nan_to_num_columns] = np.nan_to_num(data[nan_to_num_columns].to_numpy(dtype=float))
 
     nan_to_str_columns = [
         'ElectricTargetSector',
@@ -175,24 +174,23 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
         'ElectricEndUse',
         'CombustionType',
     ]
-    for column in nan_to_str_columns:
-        InputMeasures.column_map(column,lambda x: '' if x is np.nan else x)
+    data[nan_to_str_columns] = data[nan_to_str_columns].fillna('')
 
     # set CET_ID as dataframe index:
-    InputMeasures.data.set_index('CET_ID',inplace=True)
+    InputMeasures.data = data.set_index('CET_ID')
 
     return InputMeasures
 
-def setup_input_programs(source,source_name,user={}):
+def setup_input_programs(source,source_name,user={},connection_pool=None):
     if source == 'csv':
         if re.split('/|\\\\',source_name)[-1] == 'ProgramCost.csv':
             InputPrograms = Local_CSV(source_name, delimiter='|')
         else:
             InputPrograms = Local_CSV(source_name, delimiter=',')
     elif source == 'database':
-        InputPrograms = EDCS_Table(source_name,user['id'],user['passwd'])
+        InputPrograms = EDCS_Table(source_name,user['id'],user['passwd'],connection_pool=connection_pool)
     else:
-        InputPrograms = EDCS_Table('InputProgramCEDARS',user['id'],user['passwd'])
+        InputPrograms = EDCS_Table('InputProgramCEDARS',user['id'],user['passwd'],connection_pool=connection_pool)
 
     # fix input program column names:
     column_name_map = [
@@ -205,41 +203,19 @@ def setup_input_programs(source,source_name,user={}):
         InputPrograms.rename_column(old_name,new_name)
 
     # add column with universal quarter index:
-    def input_program_calculated_columns(data_frame_row):
-        year,quarter = list(map(int,data_frame_row.InstallationQuarter.split('Q')))
-        quarter_index = 4 * year + quarter - 1
-        calculated_columns = {
-            'Qi' : quarter_index,
-        }
-        return calculated_columns
-
-    InputPrograms.append_columns(InputPrograms.data.apply(input_program_calculated_columns, axis='columns', result_type='expand'))
-
-    # set ProgramID and Qi as dataframe multiindex:
-    InputPrograms.data.set_index(['ProgramID','Qi'],inplace=True)
-    InputPrograms.data.sort_index(inplace=True)
-
-    # add method to get input program data filtered by a single input measure:
-    def filter_by_measure(self, measure):
-        filtered_input_programs = self.data.loc[
-            (
-                measure.ProgramID,
-                measure.Qi
-            ),
-            :
-        ]
-        return filtered_input_programs
-    InputPrograms.filter_by_measure = \
-        types.MethodType(filter_by_measure,InputPrograms)
+    InputPrograms.data['Qi'] = quarter_index(InputPrograms.data.InstallationQuarter)
+
+    # index by ProgramID and Qi for filtering by input measure:
+    InputPrograms = InputProgramsTable(InputPrograms.data, InputPrograms.source)
 
     return InputPrograms
 
-def setup_settings(source, source_name, avoided_cost_calculator_version, InputMeasures, user={}):
+def setup_settings(source, source_name, avoided_cost_calculator_version, InputMeasures, user={}, connection_pool=None):
     if source == 'csv':
-        Settings = Local_CSV(source_name, delimiter=',')
+        Settings = Local_CSV(source_name, delimiter=',', schema=table_schemas['Settings'])
     else:
         sql_str = 'SELECT * FROM E3Settings WHERE Version={}'.format(avoided_cost_calculator_version)
-        Settings = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        Settings = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['Settings'])
 
     column_name_map = [
         ['PA','ProgramAdministrator'],
@@ -249,24 +225,16 @@ def setup_settings(source, source_name, avoided_cost_calculator_version, InputMe
 
     Settings.column_map('ProgramAdministrator',lambda s: s.strip())
 
-    # set ProgramAdministrator as dataframe index:
-    Settings.data.set_index('ProgramAdministrator',inplace=True)
-
-    # add method to get settings data filtered by a single input measure:
-    def filter_by_measure(self, measure):
-        filtered_settings = self.data.loc[
-            measure.ProgramAdministrator,
-            :
-        ]
-        return filtered_settings
-    Settings.filter_by_measure = types.MethodType(filter_by_measure,Settings)
+    # index by ProgramAdministrator for filtering by input measure:
+    Settings = SettingsTable(Settings.data, Settings.source)
 
     return Settings
 
-def setup_emissions(source, source_name, avoided_cost_calculator_version, InputMeasures, user={}):
+def setup_emissions(source, source_name, avoided_cost_calculator_version, InputMeasures, user={}, connection_pool=None):
     if source=='csv':
-        Emissions = Local_CSV(source_name, ',')
+        Emissions = Local_CSV(source_name, ',', schema=table_schemas['Emissions'])
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             if InputMeasures.table_name == 'InputMeasure':
                 sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE PA + \'|\' + ' \
@@ -284,20 +252,18 @@ def setup_emissions(source, source_name, avoided_cost_calculator_version, InputM
                     '\n\t\tFROM InputMeasureCEDARS\n\t)\n\tAND Version={}' \
                     '\n'.format(source_name, avoided_cost_calculator_version)
         else:
-            lookup_keys = ',\n\t\t'.join(list(dict.fromkeys([
-                '\''+'|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'ElectricTargetSector',
-                    'ElectricEndUse',
-                    'ClimateZone'
-                ]])+'\'' for r in InputMeasures.data.iterrows()
-            ])))
+            lookup_keys, pushed_lookup_keys = lookup_key_pushdown(measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'ElectricTargetSector',
+                'ElectricEndUse',
+                'ClimateZone'
+            ]))
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE PA + \'|\' + ' \
                 'UPPER(TS) + \'|\' + UPPER(EU) + \'|\' + CZ' \
                 '\n\tIN (\n\t\t{}\n\t)\n\tAND Version={}' \
                 '\n'.format(source_name,lookup_keys,avoided_cost_calculator_version)
 
-        Emissions = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        Emissions = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['Emissions'],lookup_keys=pushed_lookup_keys)
 
     column_name_map = [
         ['PA','ProgramAdministrator'],
@@ -314,40 +280,17 @@ def setup_emissions(source, source_name, avoided_cost_calculator_version, InputM
     Emissions.column_map('ElectricEndUse',lambda s: s.upper())
     Emissions.column_map('ClimateZone',lambda s: s.upper())
 
-    # set ProgramAdministrator, ElectricTargetSector, ElectricEndUse, and
-    #     ClimateZone as dataframe multiindex:
-    Emissions.data.set_index(
-        [
-            'ProgramAdministrator',
-            'ElectricTargetSector',
-            'ElectricEndUse',
-            'ClimateZone'
-        ],
-        inplace=True
-    )
-    Emissions.data.sort_index(inplace=True)
-
-    # add method to get emissions data filtered by single input measure:
-    def filter_by_measure(self, measure):
-        filtered_emissions = self.data.loc[
-            (
-                measure.ProgramAdministrator,
-                measure.ElectricTargetSector,
-                measure.ElectricEndUse,
-                measure.ClimateZone
-            ),
-            :
-        ]
-        return filtered_emissions
-    Emissions.filter_by_measure = \
-        types.MethodType(filter_by_measure,Emissions)
+    # index by ProgramAdministrator, ElectricTargetSector, ElectricEndUse, and
+    #     ClimateZone for filtering by input measure:
+    Emissions = EmissionsTable(Emissions.data, Emissions.source)
 
     return Emissions
 
-def setup_combustion_types(source, source_name, InputMeasures, user={}):
+def setup_combustion_types(source, source_name, InputMeasures, user={}, connection_pool=None):
     if source == 'csv':
-        CombustionTypes = Local_CSV(source_name, delimiter=',')
+        CombustionTypes = Local_CSV(source_name, delimiter=',', schema=table_schemas['CombustionTypes'])
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE LookupCode IN' \
                 '\n\t\t( SELECT CombustionType FROM {} )'.format(
@@ -355,39 +298,82 @@ def setup_combustion_types(source, source_name, InputMeasures, user={}):
                     InputMeasures.table_name
                 )
         else:
-            lookup_keys = ',\n\t\t'.join(list(dict.fromkeys(
-                ['\'' + r[1].CombustionType + '\'' for r in InputMeasures.data.iterrows()]
-            )))
+            lookup_keys, pushed_lookup_keys = lookup_key_pushdown(
+                measure_lookup_keys(InputMeasures, ['CombustionType'])
+            )
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE LookupCode IN' \
                 '\n\t\t( {} )'.format(source_name,lookup_keys)
 
-        CombustionTypes = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        CombustionTypes = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['CombustionTypes'],lookup_keys=pushed_lookup_keys)
 
-    # set as dataframe index:
-    CombustionTypes.data.set_index('LookupCode',inplace=True)
-    CombustionTypes.data.sort_index(inplace=True)
+    # index by LookupCode for filtering by input measure:
+    CombustionTypes = CombustionTypesTable(CombustionTypes.data, CombustionTypes.source)
 
-    def filter_by_measure(self, measure):
-        filtered_combustion_type = self.data.loc[measure.CombustionType, :]
-        return filtered_combustion_type
+    return CombustionTypes
 
-    CombustionTypes.filter_by_measure = \
-        types.MethodType(filter_by_measure,CombustionTypes)
+# number of rows per chunk in which avoided cost query results are streamed:
+avoided_cost_fetch_chunksize = 2**16
 
-    return CombustionTypes
+# number of distinct lookup keys above which the keys are pushed down to the
+#     database through a temporary table instead of listed in a query:
+lookup_key_pushdown_threshold = 200
 
-def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user={}):
-    ### parameters:
-    ###     acc_source : a string, either 'csv' or 'database', indicating whether
-    ###         the avoided cost electric table should be retrieved from a 
-    ###         comma separated value text file or a Microsoft SQL Server
-    ###         database
-    ###     source_name : a string containing the file path if source is 'csv'
-    ###         or the database object name if source is 'database'
-    ###     InputMeasures : an instance of an 'InputMeasures' object of class
-    ###         'EDCS_Table' or 'EDCS_Query_Results'
-    ###     user : a dictionary containing items labelled 'id' and 'passwd'
-    ###         which provide login credentials for the database if needed
+# helper function returning the distinct lookup keys of the input measures,
+#     each the measure's values of the given columns joined by '|':
+def measure_lookup_keys(InputMeasures, columns):
+    return [
+        '|'.join(key) for key in InputMeasures.data[columns].drop_duplicates()
+            .astype(str).itertuples(index=False, name=None)
+    ]
+
+# helper function returning the sql for the IN clause matching lookup keys and
+#     the keys to be pushed down with the query--a quoted list of the keys for
+#     small sets of keys, or else a subquery on the lookup key table into which
+#     'EDCS_Query_Results' bulk inserts the keys:
+def lookup_key_pushdown(lookup_keys):
+    lookup_keys = list(dict.fromkeys(lookup_keys))
+    if len(lookup_keys) <= lookup_key_pushdown_threshold:
+        return ',\n\t\t'.join(
+            ['\'' + k.replace('\'','\'\'') + '\'' for k in lookup_keys]
+        ), None
+    return 'SELECT LookupKey FROM {}'.format(EDCS_Connection.lookup_key_table), lookup_keys
+
+# helper function returning a vectorized filter function for 'Local_CSV',
+#     selecting the rows of a csv chunk whose lookup key columns, joined by '|',
+#     are among the given lookup keys; columns listed in 'upper_columns' are
+#     compared in upper case. keys are matched as tuples of column values
+#     against a MultiIndex, without building a string per row:
+def lookup_key_filter(lookup_keys, key_columns, upper_columns=[]):
+    lookup_key_tuples = list(set(tuple(k.split('|')) for k in lookup_keys))
+    def filter_function(dataframe_chunk):
+        key_arrays = []
+        for column in key_columns:
+            values = dataframe_chunk[column].astype(str)
+            if column in upper_columns:
+                values = values.str.upper()
+            key_arrays.append(values)
+        return pd.MultiIndex.from_arrays(key_arrays).isin(lookup_key_tuples)
+    return filter_function
+
+# helper function identifying a normalized avoided cost table in a table cache
+#     by its source and avoided cost version, a fingerprint of the source, and
+#     the lookup keys of the input measures by which the table is filtered:
+def avoided_cost_cache_key(table_cache, acc_source, acc_version, source_name, InputMeasures, lookup_key, user={}, connection_pool=None):
+    if acc_source == 'csv':
+        source_fingerprint = table_cache.file_fingerprint(source_name)
+    else:
+        sql_str = 'SELECT COUNT(*) AS Count, CHECKSUM_AGG(BINARY_CHECKSUM(*)) AS Checksum FROM {}'.format(source_name)
+        source_fingerprint = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool).data.to_csv(index=False)
+    lookup_keys = sorted(set(
+        InputMeasures.data[lookup_key].astype(str).itertuples(index=False, name=None)
+    ))
+    return table_cache.key(acc_source, acc_version, source_name, source_fingerprint, lookup_keys)
+
+def retrieve_avoided_cost_electric(acc_source, source_name, InputMeasures, user={}, connection_pool=None):
+    ### retrieves the avoided cost electric table from a file or database and
+    ### normalizes its column names and values, returning an object of class
+    ### 'Local_CSV' or 'EDCS_Query_Results'; see 'setup_avoided_cost_electric'
+    ### for parameters
 
     if acc_source == 'csv':
         if InputMeasures.source == 'database':
@@ -407,28 +393,27 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user={})
                 EDCS_Query_Results(
                     sql_str,
                     user['id'],
-                    user['passwd']
+                    user['passwd'],
+                    connection_pool=connection_pool
                 ).data.LookupKey
             )
         else:
-            lookup_keys = list(dict.fromkeys([
-                '|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'ElectricTargetSector',
-                    'ElectricEndUse',
-                    'ClimateZone'
-                ]]) for r in InputMeasures.data.iterrows()
-            ]))
-        def filter_function(dataframe_chunk):
-            f = lambda r: r['PA'] + '|' + r['TS'].upper() + '|' + r['EU'].upper() + '|' + str(r['CZ']) in lookup_keys
-            return dataframe_chunk.apply(f,axis='columns')
+            lookup_keys = measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'ElectricTargetSector',
+                'ElectricEndUse',
+                'ClimateZone'
+            ])
+        filter_function = lookup_key_filter(lookup_keys, ['PA','TS','EU','CZ'], ['TS','EU'])
         AvoidedCostElectric = Local_CSV(
             source_name,
             delimiter=',',
             filter_csv=True,
-            filter_function=filter_function
+            filter_function=filter_function,
+            schema=table_schemas['AvoidedCostElectric']
         )
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             # use the following query string when input measures are loaded into database:
             if InputMeasures.table_name == 'InputMeasure':
@@ -451,18 +436,16 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user={})
                 sql_str = 'SELECT * FROM {}'.format(source_name)
         else:
             # use the following query string when input measures are from a file:
-            lookup_keys = ',\n\t\t'.join(list(dict.fromkeys([
-                '\''+'|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'ElectricTargetSector',
-                    'ElectricEndUse',
-                    'ClimateZone'
-                ]])+'\'' for r in InputMeasures.data.iterrows()
-            ])))
+            lookup_keys, pushed_lookup_keys = lookup_key_pushdown(measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'ElectricTargetSector',
+                'ElectricEndUse',
+                'ClimateZone'
+            ]))
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE PA + \'|\' + ' \
                 'UPPER(TS) + \'|\' + UPPER(EU) + \'|\' + CZ' \
                 '\n\tIN (\n\t\t{}\n\t)\n'.format(source_name,lookup_keys)
-        AvoidedCostElectric = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        AvoidedCostElectric = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['AvoidedCostElectric'],lookup_keys=pushed_lookup_keys,chunksize=avoided_cost_fetch_chunksize)
 
     column_name_map = [
         ['PA','ProgramAdministrator'],
@@ -480,40 +463,59 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user={})
     AvoidedCostElectric.column_map('ClimateZone',lambda s: str(s).upper())
 
     # apply universal quarter indices:
-    def quarter_index(data_frame_row):
-        year,quarter = list(map(int,data_frame_row.ApplicableQuarter.split('Q')))
-        return {'Qi' : 4 * year + quarter - 1}
-    AvoidedCostElectric.append_columns(AvoidedCostElectric.data.apply(quarter_index,axis='columns',result_type='expand'))
-
-    # set ProgramAdministrator, ElectricTargetSector, ElectricEndUse,
-    #     ClimateZone, and Qi as dataframe multiindex:
-    AvoidedCostElectric.data.set_index(
-        [
-            'ProgramAdministrator',
-            'ElectricTargetSector',
-            'ElectricEndUse',
-            'ClimateZone',
-            'Qi'
-        ],
-        inplace=True
-    )
-    AvoidedCostElectric.data.sort_index(inplace=True)
-
-    # add method to get avoided cost electric data filtered by a single input measure:
-    def filter_by_measure(self, measure):
-        filtered_avoided_costs_electric = self.data.loc[
-            (
-                measure.ProgramAdministrator,
-                measure.ElectricTargetSector,
-                measure.ElectricEndUse,
-                measure.ClimateZone,
-                range(int(measure.Qi), int(measure.Qi + measure.EULq))
-            ),
-            :
-        ]
-        return filtered_avoided_costs_electric
-    AvoidedCostElectric.filter_by_measure = \
-        types.MethodType(filter_by_measure,AvoidedCostElectric)
+    AvoidedCostElectric.data['Qi'] = quarter_index(AvoidedCostElectric.data.ApplicableQuarter)
+
+    return AvoidedCostElectric
+
+def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user={}, discount_factors=None, connection_pool=None, table_cache=None, acc_version=None):
+    ### parameters:
+    ###     acc_source : a string, either 'csv' or 'database', indicating whether
+    ###         the avoided cost electric table should be retrieved from a 
+    ###         comma separated value text file or a Microsoft SQL Server
+    ###         database
+    ###     source_name : a string containing the file path if source is 'csv'
+    ###         or the database object name if source is 'database'
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table' or 'EDCS_Query_Results'
+    ###     user : a dictionary containing items labelled 'id' and 'passwd'
+    ###         which provide login credentials for the database if needed
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         used to build cumulative present values of avoided costs
+    ###     connection_pool : an optional instance of class
+    ###         'EDCS_ConnectionPool' from which database connections are
+    ###         borrowed instead of opening new ones
+    ###     table_cache : an optional instance of class 'TableCache' holding
+    ###         normalized avoided cost tables from earlier runs
+    ###     acc_version : the avoided cost version of the source, identifying
+    ###         cached tables along with the source
+
+    # reuse the normalized table cached for the same source content and input
+    #     measure lookup keys, if any, skipping retrieval and normalization:
+    cached_data = None
+    if table_cache is not None:
+        cache_key = avoided_cost_cache_key(table_cache, acc_source, acc_version, source_name, InputMeasures, AvoidedCostElectricTable.lookup_key, user, connection_pool)
+        cached_data = table_cache.load(cache_key)
+
+    if cached_data is not None:
+        AvoidedCostElectric = AvoidedCostElectricTable(cached_data, acc_source)
+    else:
+        AvoidedCostElectric = retrieve_avoided_cost_electric(acc_source, source_name, InputMeasures, user, connection_pool)
+
+        # index by ProgramAdministrator, ElectricTargetSector, ElectricEndUse,
+        #     ClimateZone, and Qi for filtering by input measure:
+        AvoidedCostElectric = AvoidedCostElectricTable(AvoidedCostElectric.data, AvoidedCostElectric.source)
+
+        if table_cache is not None:
+            table_cache.store(cache_key, AvoidedCostElectric.data)
+
+    # build cumulative present values of generation and transmission and
+    #     distribution costs, split by demand savings type, and cumulative
+    #     CO2 if available, by lookup key:
+    if discount_factors is not None:
+        AvoidedCostElectric.cumulative_avoided_costs = electric_cumulative_avoided_costs(
+            AvoidedCostElectric.data,
+            discount_factors
+        )
 
     return AvoidedCostElectric
 
@@ -533,18 +535,11 @@ def setup_electric_generation(source_dir, InputMeasures):
 
     filenames = ['PG&E_Gen.xlsb','SCE_Gen.xlsb','SDG&E_Gen.xlsb']
 
-def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user={}):
-    ### parameters:
-    ###     acc_source : a string, either 'csv' or 'database', indicating whether
-    ###         the avoided cost electric table should be retrieved from a 
-    ###         comma separated value text file or a Microsoft SQL Server
-    ###         database
-    ###     source_name : a string containing the file path if source is 'csv'
-    ###         or the database object name if source is 'database'
-    ###     InputMeasures : an instance of an 'InputMeasures' object of class
-    ###         'EDCS_Table' or 'EDCS_Query_Results'
-    ###     user : a dictionary containing items labelled 'id' and 'passwd'
-    ###         which provide login credentials for the database if needed
+def retrieve_avoided_cost_gas(acc_source, source_name, InputMeasures, user={}, connection_pool=None):
+    ### retrieves the avoided cost gas table from a file or database and
+    ### normalizes its column names and values, returning an object of class
+    ### 'Local_CSV' or 'EDCS_Query_Results'; see 'setup_avoided_cost_gas'
+    ### for parameters
 
     if acc_source == 'csv':
         if InputMeasures.source == 'database':
@@ -560,27 +555,26 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user={}):
                 EDCS_Query_Results(
                     sql_str,
                     user['id'],
-                    user['passwd']
+                    user['passwd'],
+                    connection_pool=connection_pool
                 ).data.LookupKey
             )
         else:
-            lookup_keys = list(dict.fromkeys([
-                '|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'GasTargetSector',
-                    'GasSavingsProfile',
-                ]]) for r in InputMeasures.data.iterrows()
-            ]))
-        def filter_function(dataframe_chunk):
-            f = lambda r: r['PA'] + '|' + r['GS'].upper() + '|' + r['GP'].upper() in lookup_keys
-            return dataframe_chunk.apply(f, axis='columns')
+            lookup_keys = measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'GasTargetSector',
+                'GasSavingsProfile',
+            ])
+        filter_function = lookup_key_filter(lookup_keys, ['PA','GS','GP'], ['GS','GP'])
         AvoidedCostGas = Local_CSV(
             source_name,
             delimiter=',',
             filter_csv=True,
-            filter_function=filter_function
+            filter_function=filter_function,
+            schema=table_schemas['AvoidedCostGas']
         )
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             # use the following query string when input measures are loaded into database:
             if InputMeasures.table_name == 'InputMeasure':
@@ -598,17 +592,15 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user={}):
             else:
                 sql_str = 'SELECT * FROM {}'.format(source_name)
         else:
-            lookup_keys = ',\n\t\t'.join(list(dict.fromkeys([
-                '\''+'|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'GasTargetSector',
-                    'GasSavingsProfile',
-                ]])+'\'' for r in InputMeasures.data.iterrows()
-            ])))
+            lookup_keys, pushed_lookup_keys = lookup_key_pushdown(measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'GasTargetSector',
+                'GasSavingsProfile',
+            ]))
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE PA + \'|\' + UPPER(GS) + ' \
                 '\'|\' + UPPER(GP)\n\tIN ' \
                 '(\n\t\t{}\n\t)\n'.format(source_name,lookup_keys)
-        AvoidedCostGas = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        AvoidedCostGas = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['AvoidedCostGas'],lookup_keys=pushed_lookup_keys,chunksize=avoided_cost_fetch_chunksize)
 
     column_name_map = [
         ['PA','ProgramAdministrator'],
@@ -625,47 +617,67 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user={}):
     AvoidedCostGas.column_map('GasSavingsProfile',lambda s: s.upper())
 
     # apply universal quarter indices:
-    def quarter_index(r):
-        year,quarter = list(map(int,r.ApplicableQuarter.split('Q')))
-        return {'Qi' : year * 4 + quarter - 1}
-    AvoidedCostGas.append_columns(AvoidedCostGas.data.apply(quarter_index,axis='columns',result_type='expand'))
-
-    # set ProgramAdministrator, GasTargetSector, GasSavingsProfile, and Qi as
-    #     dataframe multiindex:
-    AvoidedCostGas.data.set_index(
-        [
-            'ProgramAdministrator',
-            'GasTargetSector',
-            'GasSavingsProfile',
-            'Qi'
-        ],
-        inplace=True
-    )
-    AvoidedCostGas.data.sort_index(inplace=True)
-
-    # add method to get avoided cost gas data filtered by a single input measure:
-    def filter_by_measure(self, measure):
-        filtered_avoided_costs_gas = self.data.loc[
-            (
-                measure.ProgramAdministrator,
-                measure.GasTargetSector,
-                measure.GasSavingsProfile,
-                range(int(measure.Qi), int(measure.Qi + measure.EULq))
-            ),
-            :
-        ]
-        return filtered_avoided_costs_gas
-    AvoidedCostGas.filter_by_measure = \
-        types.MethodType(filter_by_measure,AvoidedCostGas)
+    AvoidedCostGas.data['Qi'] = quarter_index(AvoidedCostGas.data.ApplicableQuarter)
 
     return AvoidedCostGas
 
-def setup_rate_schedule_electric(source, source_name, rate_schedule_version, InputMeasures, user={}):
+def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user={}, discount_factors=None, connection_pool=None, table_cache=None, acc_version=None):
+    ### parameters:
+    ###     acc_source : a string, either 'csv' or 'database', indicating whether
+    ###         the avoided cost electric table should be retrieved from a 
+    ###         comma separated value text file or a Microsoft SQL Server
+    ###         database
+    ###     source_name : a string containing the file path if source is 'csv'
+    ###         or the database object name if source is 'database'
+    ###     InputMeasures : an instance of an 'InputMeasures' object of class
+    ###         'EDCS_Table' or 'EDCS_Query_Results'
+    ###     user : a dictionary containing items labelled 'id' and 'passwd'
+    ###         which provide login credentials for the database if needed
+    ###     discount_factors : an optional instance of class 'DiscountFactors'
+    ###         used to build cumulative present values of avoided costs
+    ###     connection_pool : an optional instance of class
+    ###         'EDCS_ConnectionPool' from which database connections are
+    ###         borrowed instead of opening new ones
+    ###     table_cache : an optional instance of class 'TableCache' holding
+    ###         normalized avoided cost tables from earlier runs
+    ###     acc_version : the avoided cost version of the source, identifying
+    ###         cached tables along with the source
+
+    # reuse the normalized table cached for the same source content and input
+    #     measure lookup keys, if any, skipping retrieval and normalization:
+    cached_data = None
+    if table_cache is not None:
+        cache_key = avoided_cost_cache_key(table_cache, acc_source, acc_version, source_name, InputMeasures, AvoidedCostGasTable.lookup_key, user, connection_pool)
+        cached_data = table_cache.load(cache_key)
+
+    if cached_data is not None:
+        AvoidedCostGas = AvoidedCostGasTable(cached_data, acc_source)
+    else:
+        AvoidedCostGas = retrieve_avoided_cost_gas(acc_source, source_name, InputMeasures, user, connection_pool)
+
+        # index by ProgramAdministrator, GasTargetSector, GasSavingsProfile, and Qi
+        #     for filtering by input measure:
+        AvoidedCostGas = AvoidedCostGasTable(AvoidedCostGas.data, AvoidedCostGas.source)
+
+        if table_cache is not None:
+            table_cache.store(cache_key, AvoidedCostGas.data)
+
+    # build cumulative present values of gas costs by lookup key:
+    if discount_factors is not None:
+        AvoidedCostGas.cumulative_avoided_costs = gas_cumulative_avoided_costs(
+            AvoidedCostGas.data,
+            discount_factors
+        )
+
+    return AvoidedCostGas
+
+def setup_rate_schedule_electric(source, source_name, rate_schedule_version, InputMeasures, user={}, connection_pool=None, rate_dtype=np.float64):
+    schema = table_schemas['RateScheduleElectric'].with_rate_dtype(rate_dtype)
     if source == 'csv':
-        RateScheduleElectric = Local_CSV(source_name, delimiter=',')
+        RateScheduleElectric = Local_CSV(source_name, delimiter=',', schema=schema)
 
         mapping_source_name = source_name.split('.csv')[0] + 'Mapping.csv'
-        RateScheduleElectricMapping = Local_CSV(mapping_source_name, delimiter=',')
+        RateScheduleElectricMapping = Local_CSV(mapping_source_name, delimiter=',', schema=table_schemas['RateScheduleElectricMapping'])
         
         RateScheduleElectric.data = \
             RateScheduleElectric.data[[
@@ -684,6 +696,7 @@ def setup_rate_schedule_electric(source, source_name, rate_schedule_version, Inp
                 on=['PA','Version','Schedule']
             )
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             if InputMeasures.table_name == 'InputMeasure':
                 rate_schedule_metadata = '\n\tSELECT DISTINCT\n\t\tCASE' + \
@@ -704,16 +717,18 @@ def setup_rate_schedule_electric(source, source_name, rate_schedule_version, Inp
                 rate_schedule_metadata = \
                     rate_schedule_metadata.format(InputMeasures.table_name)
         else:
-            def get_lookup_key(r):
-                if r.ProgramAdministrator == 'PGE' or r.ProgramAdministrator == 'SDGE':
-                    lookup_key = '\'{}|{}\''.format(r.ProgramAdministrator,r.ElectricTargetSector) 
+            def get_lookup_key(program_administrator,electric_target_sector):
+                if program_administrator == 'PGE' or program_administrator == 'SDGE':
+                    lookup_key = '{}|{}'.format(program_administrator,electric_target_sector)
                 else:
-                    lookup_key = '\'{}|ALL\''.format(r.ProgramAdministrator)
+                    lookup_key = '{}|ALL'.format(program_administrator)
                 return lookup_key
-            rate_schedule_metadata = \
-                ','.join(list(dict.fromkeys(
-                    InputMeasures.data.apply(get_lookup_key,axis='columns')
-                )))
+            rate_schedule_metadata, pushed_lookup_keys = lookup_key_pushdown([
+                get_lookup_key(*key) for key in InputMeasures.data[[
+                    'ProgramAdministrator',
+                    'ElectricTargetSector'
+                ]].drop_duplicates().itertuples(index=False, name=None)
+            ])
         sql_str = '\nSELECT' \
             '\n\tRates.PA,\n\tRates.Version,\n\tRates.Schedule,' \
             '\n\tMap.TargetSector,\n\tRates.Year,\n\tRates.RateE' \
@@ -727,7 +742,7 @@ def setup_rate_schedule_electric(source, source_name, rate_schedule_version, Inp
                 rate_schedule_metadata,
                 rate_schedule_version
             )
-        RateScheduleElectric = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        RateScheduleElectric = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=schema,lookup_keys=pushed_lookup_keys)
 
     column_name_map= [
         ['PA','ProgramAdministrator'],
@@ -744,38 +759,19 @@ def setup_rate_schedule_electric(source, source_name, rate_schedule_version, Inp
     RateScheduleElectric.column_map('CustomerType',lambda s: s.upper())
     RateScheduleElectric.column_map('ElectricTargetSector',lambda s: s.upper())
 
-    # set ProgramAdministrator and Qi as dataframe multiindex:
-    RateScheduleElectric.data.set_index(
-        [
-            'ProgramAdministrator',
-            'ElectricTargetSector',
-            'ApplicableYear'
-        ],
-        inplace=True
-    )
-    RateScheduleElectric.data.sort_index(inplace=True)
-
-    def filter_by_measure(self, measure):
-        filtered_electric_rates = self.data.loc[
-            [
-                measure.ProgramAdministrator,
-                (measure.ElectricTargetSector, 'ALL'),
-                range(int(measure.Qi/4), int((measure.Qi + measure.EULq)/4))
-            ],
-            :
-        ]
-        return filtered_electric_rates
-    RateScheduleElectric.filter_by_measure = \
-        types.MethodType(filter_by_measure,RateScheduleElectric)
+    # index by ProgramAdministrator, ElectricTargetSector, and ApplicableYear
+    #     for filtering by input measure:
+    RateScheduleElectric = RateScheduleElectricTable(RateScheduleElectric.data, RateScheduleElectric.source)
 
     return RateScheduleElectric
 
-def setup_rate_schedule_gas(source, source_name, rate_schedule_version, InputMeasures, user={}):
+def setup_rate_schedule_gas(source, source_name, rate_schedule_version, InputMeasures, user={}, connection_pool=None, rate_dtype=np.float64):
+    schema = table_schemas['RateScheduleGas'].with_rate_dtype(rate_dtype)
     if source == 'csv':
-        RateScheduleGas = Local_CSV(source_name, delimiter=',')
+        RateScheduleGas = Local_CSV(source_name, delimiter=',', schema=schema)
 
         mapping_source_name = source_name.split('.')[0] + 'Mapping.csv'
-        RateScheduleGasMapping = Local_CSV(mapping_source_name, delimiter=',')
+        RateScheduleGasMapping = Local_CSV(mapping_source_name, delimiter=',', schema=table_schemas['RateScheduleGasMapping'])
         RateScheduleGasMapping.rename_column('GasRateSchedule','Schedule')
 
         RateScheduleGas.data = \
@@ -795,6 +791,7 @@ def setup_rate_schedule_gas(source, source_name, rate_schedule_version, InputMea
                 on = ['PA','Version','Schedule']
             )
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             if InputMeasures.table_name == 'InputMeasure':
                 rate_schedule_metadata = '\n\tSELECT DISTINCT' \
@@ -807,12 +804,9 @@ def setup_rate_schedule_gas(source, source_name, rate_schedule_version, InputMea
                     'UPPER(COALESCE(E3GasSector,E3TargetSector)) AS LookupKey' \
                     '\n\t\tFROM {}'.format(InputMeasures.table_name)
         else:
-            def get_lookup_key(r):
-                lookup_key = '\'{}|{}\''.format(r.ProgramAdministrator,r.GasTargetSector) 
-                return lookup_key
-            rate_schedule_metadata = ','.join(list(dict.fromkeys(
-                InputMeasures.data.apply(get_lookup_key,axis='columns')
-            )))
+            rate_schedule_metadata, pushed_lookup_keys = lookup_key_pushdown(
+                measure_lookup_keys(InputMeasures, ['ProgramAdministrator','GasTargetSector'])
+            )
         sql_str = '\nSELECT' \
             '\n\tRates.PA,\n\tRates.Version,\n\tRates.Schedule,' \
             '\n\tMap.GasSector,\n\tRates.Year,\n\tRates.RateG' \
@@ -827,7 +821,7 @@ def setup_rate_schedule_gas(source, source_name, rate_schedule_version, InputMea
                 rate_schedule_metadata,
                 rate_schedule_version
             )
-        RateScheduleGas = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        RateScheduleGas = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=schema,lookup_keys=pushed_lookup_keys)
 
     column_name_map= [
         ['PA','ProgramAdministrator'],
@@ -844,29 +838,9 @@ def setup_rate_schedule_gas(source, source_name, rate_schedule_version, InputMea
     RateScheduleGas.column_map('CustomerType',lambda s: s.upper())
     RateScheduleGas.column_map('GasTargetSector',lambda s: s.strip().upper())
 
-    # set ProgramAdministrator, Schedule, and GasSector as dataframe multiindex:
-    RateScheduleGas.data.set_index(
-        [
-            'ProgramAdministrator',
-            'GasTargetSector',
-            'ApplicableYear'
-        ],
-        inplace=True
-    )
-    RateScheduleGas.data.sort_index(inplace=True)
-
-    def filter_by_measure(self, measure):
-        filtered_gas_rates = self.data.loc[
-            (
-                measure.ProgramAdministrator,
-                measure.GasTargetSector,
-                range(int(measure.Qi/4), int((measure.Qi + measure.EULq)/4))
-            ),
-            :
-        ]
-        return filtered_gas_rates
-    RateScheduleGas.filter_by_measure = \
-        types.MethodType(filter_by_measure,RateScheduleGas)
+    # index by ProgramAdministrator, GasTargetSector, and ApplicableYear for
+    #     filtering by input measure:
+    RateScheduleGas = RateScheduleGasTable(RateScheduleGas.data, RateScheduleGas.source)
 
     return RateScheduleGas
 
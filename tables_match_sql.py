@@ -1,25 +1,32 @@
 import numpy as np
-import types
+import pandas as pd
 from models import EDCS_Connection, EDCS_Table, EDCS_Query_Results, Local_CSV
+from table_schemas import table_schemas
+from quarter_indices import quarter_index
+from reference_tables_match_sql import AvoidedCostElectricTableMatchSQL, \
+    AvoidedCostGasTableMatchSQL
 
 from tables import setup_input_programs, setup_settings, \
     setup_emissions, \
     setup_combustion_types, \
-    setup_output_measures, setup_output_programs, setup_output_portfolio,\
+    setup_output_measures, lookup_key_filter, \
+    measure_lookup_keys, lookup_key_pushdown, avoided_cost_fetch_chunksize, \
+    input_measure_calculated_columns, \
+    setup_output_programs, setup_output_portfolio,\
     setup_rate_schedule_electric, setup_rate_schedule_gas
 
 from login import user
 
-def setup_input_measures(source, source_name, first_year, market_effects_benefits, market_effects_costs, user):
+def setup_input_measures(source, source_name, first_year, market_effects_benefits, market_effects_costs, user, connection_pool=None):
     if source == 'csv':
         if source_name == 'Measure.csv':
             InputMeasures = Local_CSV(source_name, delimiter='|')
         else:
             InputMeasures = Local_CSV(source_name, delimiter=',')
     elif source == 'database':
-        InputMeasures = EDCS_Table(source_name,user['id'],user['passwd'])
+        InputMeasures = EDCS_Table(source_name,user['id'],user['passwd'],connection_pool=connection_pool)
     else:
-        InputMeasures = EDCS_Table('InputMeasureCEDARS',user['id'],user['passwd'])
+        InputMeasures = EDCS_Table('InputMeasureCEDARS',user['id'],user['passwd'],connection_pool=connection_pool)
 
     # fix input measure column name and type issues:
     column_name_map = [
@@ -95,53 +102,27 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
     for old_name,new_name in column_name_map:
         InputMeasures.rename_column(old_name,new_name)
 
+    data = InputMeasures.data
+
     # Set values for missing columns:
-    if 'ImpactType' not in InputMeasures.data.columns:
-        new_column = {'ImpactType':[''] * InputMeasures.data.CET_ID.count()}
-        InputMeasures.append_columns(new_column)
-    if 'AnnualInflationRate' not in InputMeasures.data.columns:
-        new_column = {'AnnualInflationRate':[0] * InputMeasures.data.CET_ID.count()}
-        InputMeasures.append_columns(new_column)
+    if 'ImpactType' not in data.columns:
+        data['ImpactType'] = ''
+    if 'AnnualInflationRate' not in data.columns:
+        data['AnnualInflationRate'] = 0
 
-    InputMeasures.column_map('ClimateZone',lambda s: str(s).upper())
-    InputMeasures.column_map('ElectricEndUse',lambda s: s.upper())
-    InputMeasures.column_map('ElectricTargetSector',lambda s: s.upper())
-    InputMeasures.column_map('GasSavingsProfile',lambda s: s or '')
-    InputMeasures.column_map('GasSavingsProfile',lambda s: s.upper())
-    InputMeasures.column_map('GasTargetSector',lambda s: s or '')
-    InputMeasures.column_map('GasTargetSector',lambda s: s.upper())
+    data['ClimateZone'] = pd.Series(data.ClimateZone.to_numpy(dtype=object).astype(str), index=data.index)
+    for column in ['GasSavingsProfile','GasTargetSector']:
+        data[column] = data[column].fillna('')
+    for column in ['ClimateZone','ElectricEndUse','ElectricTargetSector','GasSavingsProfile','GasTargetSector']:
+        data[column] = data[column].str.upper()
 
     #INCORRECT OVERWRITE MEASURE-LEVEL MARKET EFFECTS BENEFITS TO MATCH SQL:
-    InputMeasures.data.MarketEffectsBenefits = market_effects_benefits
-
-    f = lambda x: market_effects_costs if x is None else x
-    InputMeasures.column_map('MarketEffectsCosts', f)
+    data['MarketEffectsBenefits'] = market_effects_benefits
 
-    # helper function to calculate additional columns for input measure table:
-    def input_measure_calculated_columns(data_frame_row):
-        year,quarter = list(map(int,data_frame_row.InstallationQuarter.split('Q')))
-        quarter_index = 4 * year + quarter - 1
-        rul_quarters = 4 * data_frame_row.RUL
-        eul_quarters = 4 * data_frame_row.EUL
-        if rul_quarters == 0:
-            EUL = [data_frame_row.EUL,0]
-            EULq = [eul_quarters,0]
-        else:
-            EUL = [data_frame_row.RUL,data_frame_row.EUL]
-            EULq = [rul_quarters,eul_quarters]
-        calculated_columns = {
-            'Qi'    : quarter_index,
-            'EUL1'  : EUL[0],
-            'EUL2'  : EUL[1],
-            'EULq1' : EULq[0],
-            'EULq2' : EULq[1],
-            'RULq'  : rul_quarters,
-            'EULq'  : eul_quarters,
-        }
-        return calculated_columns
+    data['MarketEffectsCosts'] = data.MarketEffectsCosts.mask(np.equal(data.MarketEffectsCosts.to_numpy(dtype=object), None), market_effects_costs)
 
     # append input measures with calculated columns:
-    InputMeasures.append_columns(InputMeasures.data.apply(input_measure_calculated_columns, axis='columns', result_type='expand'))
+    data = pd.concat([data, input_measure_calculated_columns(data)], axis='columns')
 
     nan_to_num_columns = ['Quantity','EUL','RUL','NTGRkW','NTGRkWh','NTGRTherm',
         'NTGRCost','IRkW','IRkWh','IRTherm','AnnualInflationRate','RRkW',
@@ -149,8 +130,7 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
         'kW2','kWh1','kWh2','Therm1','Therm2','UnitGrossCost1','UnitGrossCost2',
         'UnitLaborCost','UnitMaterialsCost','UnitEndUserRebate',
         'UnitIncentiveToOthers','EULq1','EULq2','RULq','EULq']
-    for column in nan_to_num_columns:
-        InputMeasures.column_map(column,np.nan_to_num)
+    data[nan_to_num_columns] = np.nan_to_num(data[nan_to_num_columns].to_numpy(dtype=float))
 
     nan_to_str_columns = [
         'ElectricTargetSector',
@@ -159,12 +139,13 @@ def setup_input_measures(source, source_name, first_year, market_effects_benefit
         'ElectricEndUse',
         'CombustionType',
     ]
-    for column in nan_to_str_columns:
-        InputMeasures.column_map(column,lambda x: '' if x is np.nan else x)
+    data[nan_to_str_columns] = data[nan_to_str_columns].fillna('')
+
+    InputMeasures.data = data
 
     return InputMeasures
 
-def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user):
+def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user, connection_pool=None):
     ### parameters:
     ###     acc_source : a string, either 'csv' or 'database', indicating whether
     ###         the avoided cost electric table should be retrieved from a 
@@ -176,6 +157,9 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user):
     ###         'EDCS_Table' or 'EDCS_Query_Results'
     ###     user : a dictionary containing items labelled 'id' and 'passwd'
     ###         which provide login credentials for the database if needed
+    ###     connection_pool : an optional instance of class
+    ###         'EDCS_ConnectionPool' from which database connections are
+    ###         borrowed instead of opening new ones
 
     if acc_source == 'csv':
         if InputMeasures.source == 'database':
@@ -195,28 +179,27 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user):
                 EDCS_Query_Results(
                     sql_str,
                     user['id'],
-                    user['passwd']
+                    user['passwd'],
+                    connection_pool=connection_pool
                 ).data.LookupKey
             )
         else:
-            lookup_keys = list(dict.fromkeys([
-                '|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'ElectricTargetSector',
-                    'ElectricEndUse',
-                    'ClimateZone'
-                ]]) for r in InputMeasures.data.iterrows()
-            ]))
-        def filter_function(dataframe_chunk):
-            f = lambda r: r['PA'] + '|' + r['TS'].upper() + '|' + r['EU'].upper() + '|' + str(r['CZ']) in lookup_keys
-            return dataframe_chunk.apply(f,axis='columns')
+            lookup_keys = measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'ElectricTargetSector',
+                'ElectricEndUse',
+                'ClimateZone'
+            ])
+        filter_function = lookup_key_filter(lookup_keys, ['PA','TS','EU','CZ'], ['TS','EU'])
         AvoidedCostElectric = Local_CSV(
             source_name,
             delimiter=',',
             filter_csv=True,
-            filter_function=filter_function
+            filter_function=filter_function,
+            schema=table_schemas['AvoidedCostElectric']
         )
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             # use the following query string when input measures are loaded into database:
             if InputMeasures.table_name == 'InputMeasure':
@@ -236,25 +219,17 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user):
                     'FROM InputMeasureCEDARS\n\t)\n'.format(source_name)
         else:
             # use the following query string when input measures are from a file:
-            lookup_keys = ',\n\t\t'.join(
-                list(
-                    dict.fromkeys([
-                        '\''+'|'.join(
-                            r[1][[
-                                'ProgramAdministrator',
-                                'ElectricTargetSector',
-                                'ElectricEndUse',
-                                'ClimateZone'
-                            ]]
-                        )+'\'' for r in InputMeasures.data.iterrows()
-                    ])
-                )
-            )
+            lookup_keys, pushed_lookup_keys = lookup_key_pushdown(measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'ElectricTargetSector',
+                'ElectricEndUse',
+                'ClimateZone'
+            ]))
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE PA + \'|\' + '\
                 'UPPER(TS) + \'|\' + UPPER(EU) + \'|\' + UPPER(CZ)' \
                 '\n\tIN (\n\t\t{}\n\t)\n'.format(source_name,lookup_keys)
 
-        AvoidedCostElectric = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        AvoidedCostElectric = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['AvoidedCostElectric'],lookup_keys=pushed_lookup_keys,chunksize=avoided_cost_fetch_chunksize)
 
     rename_columns = [
         ['PA','ProgramAdministrator'],
@@ -272,29 +247,15 @@ def setup_avoided_cost_electric(acc_source, source_name, InputMeasures, user):
     AvoidedCostElectric.column_map('ClimateZone',lambda s: str(s).upper())
 
     # apply universal quarter indices:
-    def quarter_index(r):
-        year,quarter = list(map(int,r.UsageQuarter.split('Q')))
-        return {'Qi' : year * 4 + quarter - 1}
-    AvoidedCostElectric.append_columns(AvoidedCostElectric.data.apply(quarter_index,axis='columns',result_type='expand'))
+    AvoidedCostElectric.data['Qi'] = quarter_index(AvoidedCostElectric.data.UsageQuarter)
 
-    # add method to get avoided cost electric data filtered by a single input measure:
-    def filter_by_measure(self, measure):
-        filtered_avoided_costs_electric = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.ElectricTargetSector == measure.ElectricTargetSector) & \
-            (self.data.ElectricEndUse == measure.ElectricEndUse) & \
-            (self.data.ClimateZone == measure.ClimateZone) & \
-            (self.data.Qi >= measure.Qi) & \
-            #INCLUDE EXTRA QUARTER TO MATCH SQL:
-            (self.data.Qi < measure.Qi + measure.EULq + 1)
-        )
-        return filtered_avoided_costs_electric
-    AvoidedCostElectric.filter_by_measure = \
-        types.MethodType(filter_by_measure,AvoidedCostElectric)
+    # index by ProgramAdministrator, ElectricTargetSector, ElectricEndUse,
+    #     ClimateZone, and Qi for filtering by input measure:
+    AvoidedCostElectric = AvoidedCostElectricTableMatchSQL(AvoidedCostElectric.data, AvoidedCostElectric.source)
 
     return AvoidedCostElectric
 
-def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user):
+def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user, connection_pool=None):
     ### parameters:
     ###     acc_source : a string, either 'csv' or 'database', indicating whether
     ###         the avoided cost electric table should be retrieved from a 
@@ -306,6 +267,9 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user):
     ###         'EDCS_Table' or 'EDCS_Query_Results'
     ###     user : a dictionary containing items labelled 'id' and 'passwd'
     ###         which provide login credentials for the database if needed
+    ###     connection_pool : an optional instance of class
+    ###         'EDCS_ConnectionPool' from which database connections are
+    ###         borrowed instead of opening new ones
 
     if acc_source == 'csv':
         if InputMeasures.source == 'database':
@@ -321,27 +285,26 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user):
                 EDCS_Query_Results(
                     sql_str,
                     user['id'],
-                    user['passwd']
+                    user['passwd'],
+                    connection_pool=connection_pool
                 ).data.LookupKey
             )
         else:
-            lookup_keys = list(dict.fromkeys([
-                '|'.join(r[1][[
-                    'ProgramAdministrator',
-                    'GasTargetSector',
-                    'GasSavingsProfile',
-                ]]) for r in InputMeasures.data.iterrows()
-            ]))
-        def filter_function(dataframe_chunk):
-            f = lambda r: r['PA'] + '|' + r['GS'].upper() + '|' + r['GP'].upper() in lookup_keys
-            return dataframe_chunk.apply(f, axis='columns')
+            lookup_keys = measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'GasTargetSector',
+                'GasSavingsProfile',
+            ])
+        filter_function = lookup_key_filter(lookup_keys, ['PA','GS','GP'], ['GS','GP'])
         AvoidedCostGas = Local_CSV(
             source_name,
             delimiter=',',
             filter_csv=True,
-            filter_function=filter_function
+            filter_function=filter_function,
+            schema=table_schemas['AvoidedCostGas']
         )
     else:
+        pushed_lookup_keys = None
         if InputMeasures.source == 'database':
             # use the following query string when input measures are loaded into database:
             if InputMeasures.table_name == 'InputMeasure':
@@ -357,23 +320,15 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user):
                     '\'|\' + UPPER(E3GasSavProfile)\n\t\t' \
                     'FROM InputMeasureCEDARS\n\t)\n'.format(source_name)
         else:
-            lookup_keys = ',\n\t\t'.join(
-                list(
-                    dict.fromkeys(
-                        ['\''+'|'.join(
-                            r[1][[
-                                'ProgramAdministrator',
-                                'GasTargetSector',
-                                'GasSavingsProfile',
-                            ]]
-                        )+'\'' for r in InputMeasures.data.iterrows()]
-                    )
-                )
-            )
+            lookup_keys, pushed_lookup_keys = lookup_key_pushdown(measure_lookup_keys(InputMeasures, [
+                'ProgramAdministrator',
+                'GasTargetSector',
+                'GasSavingsProfile',
+            ]))
             sql_str = '\n\tSELECT *\n\tFROM {}\n\tWHERE PA + \'|\' + ' \
                 'UPPER(GS) + \'|\' + UPPER(GP)' \
                 '\n\tIN (\n\t\t{}\n\t)\n'.format(source_name,lookup_keys)
-        AvoidedCostGas = EDCS_Query_Results(sql_str,user['id'],user['passwd'])
+        AvoidedCostGas = EDCS_Query_Results(sql_str,user['id'],user['passwd'],connection_pool=connection_pool,schema=table_schemas['AvoidedCostGas'],lookup_keys=pushed_lookup_keys,chunksize=avoided_cost_fetch_chunksize)
 
     rename_columns = [
         ['PA','ProgramAdministrator'],
@@ -390,23 +345,10 @@ def setup_avoided_cost_gas(acc_source, source_name, InputMeasures, user):
     AvoidedCostGas.column_map('GasSavingsProfile',lambda s: s.upper())
 
     # apply universal quarter indices:
-    def quarter_index(r):
-        year,quarter = list(map(int,r.UsageQuarter.split('Q')))
-        return {'Qi' : year * 4 + quarter - 1}
-    AvoidedCostGas.append_columns(AvoidedCostGas.data.apply(quarter_index,axis='columns',result_type='expand'))
+    AvoidedCostGas.data['Qi'] = quarter_index(AvoidedCostGas.data.UsageQuarter)
 
-    # add method to get avoided cost gas data filtered by a single input measure:
-    def filter_by_measure(self, measure):
-        filtered_avoided_costs_gas = self.data.get(
-            (self.data.ProgramAdministrator == measure.ProgramAdministrator) & \
-            (self.data.GasTargetSector == measure.GasTargetSector) & \
-            (self.data.GasSavingsProfile == measure.GasSavingsProfile) & \
-            (self.data.Qi >= measure.Qi) & \
-            #INCLUDE EXTRA QUARTER TO MATCH SQL:
-            (self.data.Qi < measure.Qi + measure.EULq + 1)
-        )
-        return filtered_avoided_costs_gas
-    AvoidedCostGas.filter_by_measure = \
-        types.MethodType(filter_by_measure,AvoidedCostGas)
+    # index by ProgramAdministrator, GasTargetSector, GasSavingsProfile, and Qi
+    #     for filtering by input measure:
+    AvoidedCostGas = AvoidedCostGasTableMatchSQL(AvoidedCostGas.data, AvoidedCostGas.source)
 
     return AvoidedCostGas
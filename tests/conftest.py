@@ -0,0 +1,193 @@
+import itertools, os, sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# the cet modules are flat modules at the root of the repository:
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reference_tables as rt
+from discount_factors import DiscountFactors
+from program_costs import program_cost_columns
+
+program_administrators = ['PGE','SCE']
+electric_target_sectors = ['RES','COM']
+electric_end_uses = ['LIGHTING','HVAC']
+climate_zones = ['1','2']
+gas_target_sectors = ['RES','COM']
+gas_savings_profiles = ['ANNUAL','WINTER']
+
+first_year = 2018
+
+# avoided cost tables end before the longest measure lives, so windows running
+# off the end of the tables are covered:
+last_avoided_cost_year = 2030
+
+# lookup keys of input measures without avoided costs:
+missing_electric_key = ('SCE','COM','HVAC','2')
+missing_gas_key = ('SCE','COM','WINTER')
+
+def input_measures_data(rng, number_of_measures=120):
+    ### returns a pandas DataFrame of normalized input measures with random
+    ### lookup keys, installation quarters, useful lives, and savings,
+    ### including negative savings and measures with a remaining useful life
+    measures = pd.DataFrame({
+        'CET_ID'               : np.arange(number_of_measures) + 1000,
+        'ProgramID'            : rng.choice(['P1','P2','P3'], number_of_measures),
+        'ProgramAdministrator' : rng.choice(program_administrators, number_of_measures),
+        'ElectricTargetSector' : rng.choice(electric_target_sectors, number_of_measures),
+        'ElectricEndUse'       : rng.choice(electric_end_uses, number_of_measures),
+        'ClimateZone'          : rng.choice(climate_zones, number_of_measures),
+        'GasTargetSector'      : rng.choice(gas_target_sectors, number_of_measures),
+        'GasSavingsProfile'    : rng.choice(gas_savings_profiles, number_of_measures),
+        'CombustionType'       : rng.choice(['A','B'], number_of_measures),
+        'Qi'                   : rng.integers(first_year * 4, first_year * 4 + 8, number_of_measures),
+    })
+    rul = np.where(rng.random(number_of_measures) < 0.5, 0, rng.choice([0.3, 1.0, 2.6, 4.25], number_of_measures))
+    eul = rng.choice([0.6, 3.0, 7.3, 12.0, 15.7], number_of_measures)
+    measures['RUL'] = rul
+    measures['EUL'] = eul
+    measures['EUL1'] = np.where(rul == 0, eul, rul)
+    measures['EUL2'] = np.where(rul == 0, 0, eul)
+    measures['EULq1'] = 4 * measures.EUL1
+    measures['EULq2'] = 4 * measures.EUL2
+    measures['RULq'] = 4 * rul
+    measures['EULq'] = 4 * eul
+    for column in ['Quantity','IRkWh','RRkWh','IRkW','RRkW','IRTherm','RRTherm','NTGRkWh','NTGRkW','NTGRTherm','NTGRCost']:
+        measures[column] = rng.uniform(0.5, 1.5, number_of_measures)
+    measures['MarketEffectsBenefits'] = 0.05
+    measures['MarketEffectsCosts'] = 0.05
+    for column in ['kWh1','kWh2','kW1','kW2','Therm1','Therm2']:
+        measures[column] = rng.normal(100, 80, number_of_measures)
+    for column in ['UnitGrossCost1','UnitGrossCost2','UnitLaborCost','UnitMaterialsCost','UnitEndUserRebate','UnitIncentiveToOthers']:
+        measures[column] = rng.uniform(0, 50, number_of_measures)
+    measures['AnnualInflationRate'] = rng.uniform(0, 0.03, number_of_measures)
+    return measures
+
+def avoided_cost_electric_data(rng):
+    rows = [
+        key + (quarter,)
+        for key in itertools.product(program_administrators, electric_target_sectors, electric_end_uses, climate_zones)
+        if key != missing_electric_key
+        for quarter in range(first_year * 4, last_avoided_cost_year * 4)
+    ]
+    data = pd.DataFrame(rows, columns=['ProgramAdministrator','ElectricTargetSector','ElectricEndUse','ClimateZone','Qi'])
+    data['Gen'] = rng.uniform(0, 0.2, len(rows))
+    data['TD'] = rng.uniform(0, 0.1, len(rows))
+    data['DSType'] = rng.choice(['kWh','kW'], len(rows))
+    data['CO2'] = rng.uniform(0, 0.5, len(rows))
+    return data
+
+def avoided_cost_gas_data(rng):
+    rows = [
+        key + (quarter,)
+        for key in itertools.product(program_administrators, gas_target_sectors, gas_savings_profiles)
+        if key != missing_gas_key
+        for quarter in range(first_year * 4, last_avoided_cost_year * 4)
+    ]
+    data = pd.DataFrame(rows, columns=['ProgramAdministrator','GasTargetSector','GasSavingsProfile','Qi'])
+    data['Cost'] = rng.uniform(0, 1, len(rows))
+    return data
+
+def settings_data():
+    # the second PGE row is never used, as settings are matched to the first
+    # row for each program administrator:
+    return pd.DataFrame({
+        'ProgramAdministrator' : ['PGE','SCE','PGE'],
+        'DiscountRateQtr'      : [0.018, 0.02, 0.5],
+        'DiscountRateAnnual'   : [0.074, 0.08, 0.9],
+        'CO2Gas'               : [0.0053, 0.0055, 9.0],
+        'Version'              : [2018, 2018, 2019],
+    })
+
+def emissions_data(rng):
+    rows = list(itertools.product(program_administrators, electric_target_sectors, electric_end_uses, climate_zones))
+    data = pd.DataFrame(rows, columns=['ProgramAdministrator','ElectricTargetSector','ElectricEndUse','ClimateZone'])
+    data['NOx'] = rng.uniform(0, 0.01, len(rows))
+    data['PM10'] = rng.uniform(0, 0.001, len(rows))
+    return data
+
+def combustion_types_data():
+    return pd.DataFrame({'LookupCode' : ['A'], 'NOx' : [0.0009]})
+
+def rate_schedule_electric_data(rng):
+    rows = [
+        (program_administrator, target_sector, year)
+        for program_administrator in program_administrators
+        for target_sector in electric_target_sectors + ['ALL']
+        for year in range(first_year, 2050)
+    ]
+    data = pd.DataFrame(rows, columns=['ProgramAdministrator','ElectricTargetSector','ApplicableYear'])
+    data['ElectricRate'] = rng.uniform(0.1, 0.3, len(rows))
+    return data
+
+def rate_schedule_gas_data(rng):
+    rows = [
+        (program_administrator, target_sector, year)
+        for program_administrator in program_administrators
+        for target_sector in gas_target_sectors
+        for year in range(first_year, 2050)
+    ]
+    data = pd.DataFrame(rows, columns=['ProgramAdministrator','GasTargetSector','ApplicableYear'])
+    data['GasRate'] = rng.uniform(0.5, 1.5, len(rows))
+    return data
+
+def input_programs_data(rng, measures):
+    programs = measures[['ProgramID','Qi']].drop_duplicates().reset_index(drop=True)
+    for column in program_cost_columns:
+        programs[column] = rng.uniform(0, 1000, len(programs.index))
+    return programs
+
+class Table:
+    # stands in for the input tables of a scenario, which hold a 'data'
+    # variable:
+    def __init__(self, data):
+        self.data = data
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+@pytest.fixture
+def measures(rng):
+    return input_measures_data(rng)
+
+@pytest.fixture
+def InputMeasures(measures):
+    return Table(measures)
+
+@pytest.fixture
+def InputPrograms(rng, measures):
+    return Table(input_programs_data(rng, measures))
+
+@pytest.fixture
+def Settings():
+    return rt.SettingsTable(settings_data())
+
+@pytest.fixture
+def discount_factors(Settings):
+    return DiscountFactors(Settings, first_year)
+
+@pytest.fixture
+def AvoidedCostElectric(rng):
+    return rt.AvoidedCostElectricTable(avoided_cost_electric_data(rng))
+
+@pytest.fixture
+def AvoidedCostGas(rng):
+    return rt.AvoidedCostGasTable(avoided_cost_gas_data(rng))
+
+@pytest.fixture
+def Emissions(rng):
+    return rt.EmissionsTable(emissions_data(rng))
+
+@pytest.fixture
+def CombustionTypes():
+    return rt.CombustionTypesTable(combustion_types_data())
+
+@pytest.fixture
+def RateScheduleElectric(rng):
+    return rt.RateScheduleElectricTable(rate_schedule_electric_data(rng))
+
+@pytest.fixture
+def RateScheduleGas(rng):
+    return rt.RateScheduleGasTable(rate_schedule_gas_data(rng))
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from annual_rates import AnnualRates
+
+lookup_key = ['ProgramAdministrator','ElectricTargetSector']
+
+# helper function to build a small electric rate schedule:
+def rate_schedule(rows):
+    return pd.DataFrame(rows, columns=lookup_key + ['ApplicableYear','ElectricRate'])
+
+def test_rates_are_gathered_by_key_and_year():
+    annual_rates = AnnualRates(rate_schedule([
+        ('PGE','RES',2018,0.1),
+        ('PGE','RES',2020,0.3),
+        ('SCE','COM',2019,0.2),
+    ]), lookup_key, 'ElectricRate')
+    assert list(annual_rates.years) == [2018, 2019, 2020]
+    codes = annual_rates.key_codes(pd.DataFrame({'ProgramAdministrator' : ['SCE','PGE'], 'ElectricTargetSector' : ['COM','RES']}))
+    np.testing.assert_array_equal(annual_rates.rates[codes], [[0, 0.2, 0], [0.1, 0, 0.3]])
+    np.testing.assert_array_equal(annual_rates.rate_counts[codes], [[0, 1, 0], [1, 0, 1]])
+
+def test_rates_sharing_a_key_and_year_are_summed():
+    annual_rates = AnnualRates(rate_schedule([
+        ('PGE','RES',2018,0.1),
+        ('PGE','RES',2018,0.25),
+        ('PGE','RES',2019,np.nan),
+        ('PGE','RES',None,9.0),
+    ]), lookup_key, 'ElectricRate')
+    assert list(annual_rates.years) == [2018, 2019]
+    np.testing.assert_allclose(annual_rates.rates[0], [0.35, 0])
+    np.testing.assert_array_equal(annual_rates.rate_counts[0], [2, 1])
+
+def test_unknown_keys_gather_the_row_without_rates():
+    annual_rates = AnnualRates(rate_schedule([
+        ('PGE','RES',2018,0.1),
+    ]).set_index(lookup_key + ['ApplicableYear']), lookup_key, 'ElectricRate')
+    codes = annual_rates.key_codes(pd.DataFrame({'ProgramAdministrator' : ['PGE','SCE'], 'ElectricTargetSector' : ['RES','RES']}))
+    assert list(codes) == [0, 1]
+    assert annual_rates.rates.shape == (2, 1)
+    assert (annual_rates.rates[1] == 0).all()
+    assert (annual_rates.rate_counts[1] == 0).all()
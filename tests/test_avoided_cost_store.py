@@ -0,0 +1,91 @@
+import mmap, os, pickle
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import reference_tables as rt
+from avoided_cost_store import AvoidedCostStore
+from conftest import avoided_cost_electric_data
+
+# helper function to check whether an array is backed by a memory-mapped file:
+def memory_mapped(values):
+    while values is not None:
+        if isinstance(values, mmap.mmap):
+            return True
+        values = getattr(values, 'base', None)
+    return False
+
+# helper function to set the last use time of a store, as file system times
+# may not advance between stores written in quick succession:
+def set_last_use(path, seconds):
+    os.utime(path, (seconds, seconds))
+
+@pytest.fixture
+def avoided_cost_electric(rng):
+    return avoided_cost_electric_data(rng).astype({'ClimateZone' : 'category'})
+
+def test_read_matches_written_table(avoided_cost_electric, tmp_path):
+    data = AvoidedCostStore.write(avoided_cost_electric, str(tmp_path)).read()
+    pdt.assert_frame_equal(
+        data,
+        avoided_cost_electric,
+        check_dtype=False,
+        check_categorical=False
+    )
+    # categorical columns keep their own categories, rather than those in
+    #     order of appearance:
+    assert data.ClimateZone.dtype == avoided_cost_electric.ClimateZone.dtype
+
+def test_read_columns_are_memory_mapped(avoided_cost_electric, tmp_path):
+    data = AvoidedCostStore.write(avoided_cost_electric, str(tmp_path)).read()
+    assert memory_mapped(data.Gen.to_numpy())
+    for column in ['ProgramAdministrator','ClimateZone','DSType']:
+        assert memory_mapped(data[column].array.codes)
+        # 'cat.codes' copies the codes:
+        assert not memory_mapped(data[column].cat.codes.to_numpy())
+
+def test_write_by_content_reuses_stores_of_equal_tables(avoided_cost_electric, tmp_path):
+    store = AvoidedCostStore.write_by_content(avoided_cost_electric, str(tmp_path))
+    column_file = os.path.join(store.directory, store.manifest[0]['file_name'])
+    modified = os.stat(column_file).st_mtime_ns
+    assert AvoidedCostStore.write_by_content(avoided_cost_electric.copy(), str(tmp_path)).directory == store.directory
+    assert os.stat(column_file).st_mtime_ns == modified
+
+    changed = avoided_cost_electric.assign(Gen=avoided_cost_electric.Gen + 1)
+    assert AvoidedCostStore.write_by_content(changed, str(tmp_path)).directory != store.directory
+    assert not any(name.startswith('.tmp_') for name in os.listdir(tmp_path))
+
+def test_write_by_content_removes_least_recently_used_stores(avoided_cost_electric, tmp_path):
+    directory = str(tmp_path)
+    tables = [avoided_cost_electric.assign(Gen=avoided_cost_electric.Gen + i) for i in range(4)]
+    paths = []
+    for i, table in enumerate(tables[:2]):
+        paths.append(AvoidedCostStore.write_by_content(table, directory, max_stores=2).directory)
+        set_last_use(paths[-1], 1000 + i)
+
+    # reusing the first store marks it as recently used, so the second is
+    #     removed when a third is written:
+    AvoidedCostStore.write_by_content(tables[0], directory, max_stores=2)
+    paths.append(AvoidedCostStore.write_by_content(tables[2], directory, max_stores=2).directory)
+    assert sorted(AvoidedCostStore.stores(directory)) == sorted([paths[0], paths[2]])
+
+    # the store just written is kept even if others are more recent:
+    set_last_use(paths[0], 2**31)
+    set_last_use(paths[2], 2**31)
+    latest = AvoidedCostStore.write_by_content(tables[3], directory, max_stores=1).directory
+    assert AvoidedCostStore.stores(directory) == [latest]
+
+def test_memory_mapped_tables_attach_to_stores_when_unpickled(avoided_cost_electric, measures, tmp_path):
+    table = rt.AvoidedCostElectricTable(avoided_cost_electric)
+    expected = [table.filter_by_measure(measure) for _, measure in measures.head(20).iterrows()]
+    table.memory_map(str(tmp_path))
+    restored = pickle.loads(pickle.dumps(table))
+    assert memory_mapped(restored.data.Gen.to_numpy())
+    for (_, measure), rows in zip(measures.head(20).iterrows(), expected):
+        pdt.assert_frame_equal(
+            restored.filter_by_measure(measure).reset_index(drop=True),
+            rows.reset_index(drop=True),
+            check_dtype=False,
+            check_categorical=False
+        )
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import measure_calculations as mc
+import measure_calculations_vectorized as vc
+from cumulative_avoided_costs import CumulativeAvoidedCosts, \
+    electric_cumulative_avoided_costs, gas_cumulative_avoided_costs
+from discount_factors import DiscountFactors
+from conftest import first_year, last_avoided_cost_year, settings_data
+from test_measure_calculations_vectorized import per_measure, assert_outputs_match
+
+import reference_tables as rt
+
+@pytest.fixture
+def cumulative_tables(AvoidedCostElectric, AvoidedCostGas, discount_factors):
+    # cumulative present values are attached as by 'tables.setup_avoided_cost_*':
+    AvoidedCostElectric.cumulative_avoided_costs = electric_cumulative_avoided_costs(AvoidedCostElectric.data, discount_factors)
+    AvoidedCostGas.cumulative_avoided_costs = gas_cumulative_avoided_costs(AvoidedCostGas.data, discount_factors)
+    return AvoidedCostElectric, AvoidedCostGas
+
+def test_measure_windows_run_off_the_end_of_the_tables(measures):
+    assert (np.trunc(measures.Qi + measures.EULq) > last_avoided_cost_year * 4).any()
+
+def test_avoided_electric_costs_match_per_measure(InputMeasures, cumulative_tables, Settings, discount_factors):
+    AvoidedCostElectric, _ = cumulative_tables
+    expected = per_measure(mc.calculate_avoided_electric_costs, InputMeasures.data, AvoidedCostElectric, Settings, first_year, discount_factors)
+    outputs = vc.calculate_avoided_electric_costs_from_cumulative_sums(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+    assert_outputs_match(outputs, expected)
+
+def test_avoided_gas_costs_match_per_measure(InputMeasures, cumulative_tables, Settings, discount_factors):
+    _, AvoidedCostGas = cumulative_tables
+    expected = per_measure(mc.calculate_avoided_gas_costs, InputMeasures.data, AvoidedCostGas, Settings, first_year, discount_factors)
+    outputs = vc.calculate_avoided_gas_costs_from_cumulative_sums(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+    assert_outputs_match(outputs, expected)
+
+def test_equal_discount_factors_reuse_cumulative_sums_of_tables(InputMeasures, cumulative_tables, Settings, monkeypatch):
+    AvoidedCostElectric, AvoidedCostGas = cumulative_tables
+    expected_electric = vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year)
+    expected_gas = vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year)
+
+    def build_function(*arguments):
+        raise AssertionError('cumulative sums rebuilt')
+    monkeypatch.setattr(vc, 'electric_cumulative_avoided_costs', build_function)
+    monkeypatch.setattr(vc, 'gas_cumulative_avoided_costs', build_function)
+
+    # a separate but equal instance, and none at all:
+    for discount_factors in [DiscountFactors(Settings, first_year), None]:
+        assert_outputs_match(
+            vc.calculate_avoided_electric_costs_from_cumulative_sums(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors),
+            expected_electric
+        )
+        assert_outputs_match(
+            vc.calculate_avoided_gas_costs_from_cumulative_sums(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors),
+            expected_gas
+        )
+
+def test_different_discount_factors_rebuild_cumulative_sums(InputMeasures, cumulative_tables, Settings):
+    AvoidedCostElectric, AvoidedCostGas = cumulative_tables
+    for discount_factors in [
+        DiscountFactors(Settings, first_year + 1),
+        DiscountFactors(rt.SettingsTable(settings_data().assign(DiscountRateQtr=0.03)), first_year),
+    ]:
+        assert not discount_factors.equals(AvoidedCostElectric.cumulative_avoided_costs.discount_factors)
+        assert_outputs_match(
+            vc.calculate_avoided_electric_costs_from_cumulative_sums(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors),
+            vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+        )
+        assert_outputs_match(
+            vc.calculate_avoided_gas_costs_from_cumulative_sums(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors),
+            vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+        )
+
+def test_tables_without_cumulative_sums_build_them(InputMeasures, AvoidedCostElectric, AvoidedCostGas, Settings, discount_factors):
+    assert_outputs_match(
+        vc.calculate_avoided_electric_costs_from_cumulative_sums(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors),
+        vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+    )
+    assert_outputs_match(
+        vc.calculate_avoided_gas_costs_from_cumulative_sums(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors),
+        vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+    )
+
+def test_range_sums():
+    avoided_costs = pd.DataFrame({
+        'Key'  : ['A'] * 4 + ['B'] * 2,
+        'Qi'   : [10, 11, 12, 13, 11, 12],
+        'Cost' : [1.0, 2.0, 4.0, 8.0, 16.0, 32.0],
+    })
+    cumulative_sums = CumulativeAvoidedCosts(avoided_costs, ['Key'], [], ['Cost'])
+    key_codes = cumulative_sums.key_codes(pd.DataFrame({'Key' : ['A','A','A','B','B','C','A']}))
+    np.testing.assert_array_equal(
+        cumulative_sums.range_sums(
+            'Cost',
+            key_codes,
+            [11, 0, 12, 12, 10, 10, 13],
+            [12, 100, 11, 20, 10, 13, 13]
+        ),
+        # within a key, running off either end, an empty range, beyond the
+        # key's last quarter, before its first quarter, an unknown key, and
+        # a single quarter:
+        [6.0, 15.0, 0.0, 32.0, 0.0, 0.0, 8.0]
+    )
+
+def test_discount_factors_equals(Settings):
+    discount_factors = DiscountFactors(Settings, first_year)
+    assert discount_factors.equals(DiscountFactors(Settings, first_year))
+    assert not discount_factors.equals(DiscountFactors(Settings, first_year + 1))
+    assert not discount_factors.equals(
+        DiscountFactors(rt.SettingsTable(settings_data().assign(DiscountRateAnnual=0.1)), first_year)
+    )
+    assert not discount_factors.equals(None)
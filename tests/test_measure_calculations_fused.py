@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import measure_calculations_vectorized as vc
+import measure_calculations_fused
+from conftest import Table, first_year
+from test_measure_calculations_vectorized import assert_outputs_match
+
+# helper function to calculate measure-level outputs stage by stage, joined on
+# CET_ID, as in the standard vectorized path of 'calc':
+def stage_outputs(InputMeasures, InputPrograms, AvoidedCostElectric, AvoidedCostGas, Emissions, CombustionTypes, RateScheduleElectric, RateScheduleGas, Settings, discount_factors):
+    avoided_electric_costs = vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+    avoided_gas_costs = vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+    emissions_reductions = vc.calculate_emissions_reductions(InputMeasures, AvoidedCostElectric, Emissions, CombustionTypes, Settings)
+
+    measures = InputMeasures.data.merge(
+        avoided_electric_costs, on=['CET_ID','ProgramID','Qi']
+    ).merge(
+        avoided_gas_costs, on=['CET_ID','ProgramID','Qi']
+    )
+    benefit_sums = measures[
+        ['ProgramID','Qi'] +
+        measure_calculations_fused.avoided_electric_cost_columns +
+        measure_calculations_fused.avoided_gas_cost_columns
+    ].assign(Count=1).groupby(['ProgramID','Qi']).aggregate('sum')
+    programs = InputPrograms.data.merge(benefit_sums, on=['ProgramID','Qi'])
+
+    total_resource_cost_test_results = vc.total_resource_cost_test(measures, programs, Settings, first_year, discount_factors)
+    program_administrator_cost_test_results = vc.program_administrator_cost_test(measures, programs, Settings, first_year, discount_factors)
+    measures = measures.merge(program_administrator_cost_test_results, on='CET_ID')
+    ratepayer_impact_measure_results = vc.ratepayer_impact_measure(measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, discount_factors)
+
+    return measures[
+        ['CET_ID'] +
+        measure_calculations_fused.avoided_electric_cost_columns +
+        measure_calculations_fused.avoided_gas_cost_columns
+    ].merge(
+        emissions_reductions, on='CET_ID'
+    ).merge(
+        total_resource_cost_test_results, on='CET_ID'
+    ).merge(
+        program_administrator_cost_test_results, on='CET_ID'
+    ).merge(
+        ratepayer_impact_measure_results, on='CET_ID'
+    )
+
+@pytest.fixture
+def reference_tables(InputPrograms, AvoidedCostElectric, AvoidedCostGas, Emissions, CombustionTypes, RateScheduleElectric, RateScheduleGas, Settings):
+    return InputPrograms, AvoidedCostElectric, AvoidedCostGas, Emissions, CombustionTypes, RateScheduleElectric, RateScheduleGas, Settings
+
+def test_fused_outputs_match_stage_outputs(InputMeasures, reference_tables, discount_factors):
+    outputs = measure_calculations_fused.calculate_measure_outputs(InputMeasures, *reference_tables, first_year, discount_factors)
+    assert list(outputs.CET_ID) == list(InputMeasures.data.CET_ID)
+    assert_outputs_match(outputs, stage_outputs(InputMeasures, *reference_tables, discount_factors))
+
+def test_fused_outputs_match_stage_outputs_in_small_batches(InputMeasures, reference_tables, discount_factors):
+    assert_outputs_match(
+        measure_calculations_fused.calculate_measure_outputs(InputMeasures, *reference_tables, first_year, discount_factors, batch_size=7),
+        measure_calculations_fused.calculate_measure_outputs(InputMeasures, *reference_tables, first_year, discount_factors)
+    )
+
+def test_fused_outputs_of_measures_indexed_by_cet_id(InputMeasures, reference_tables, discount_factors):
+    # input measures read from the database are indexed by CET_ID:
+    outputs = measure_calculations_fused.calculate_measure_outputs(
+        Table(InputMeasures.data.set_index('CET_ID')), *reference_tables, first_year, discount_factors
+    )
+    assert_outputs_match(outputs, stage_outputs(InputMeasures, *reference_tables, discount_factors))
+
+@pytest.mark.parametrize('flag', ['match_sql','parallelize','cumulative_sums'])
+def test_fused_stages_reject_conflicting_flags(flag):
+    calc = pytest.importorskip('calc')
+    flags = {'match_sql' : False, 'parallelize' : False, 'cumulative_sums' : False}
+    flags[flag] = True
+    cet_scenario = type('Scenario', (), dict(
+        flags,
+        fuse_stages=True,
+        vectorize=False,
+        group_by_lookup_key=False,
+        DiscountFactors=None,
+        calculation_times={}
+    ))()
+    with pytest.raises(ValueError, match=flag):
+        calc.calculate_measure_outputs(cet_scenario)
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import measure_calculations as mc
+import measure_calculations_vectorized as vc
+from measure_calculations_vectorized import electric_lookup_key, gas_lookup_key
+from program_costs import ProgramCosts
+from conftest import Table, first_year, last_avoided_cost_year, missing_electric_key, missing_gas_key
+
+# helper function to apply a per-measure calculation to every input measure,
+# as in the serial path of 'calc':
+def per_measure(function, measures, *arguments, **keyword_arguments):
+    return measures.apply(
+        lambda measure: function(measure, *arguments, **keyword_arguments),
+        axis='columns'
+    )
+
+# helper function to compare outputs of the array-based and per-measure
+# calculations, matched by CET_ID; per-measure outputs without string columns
+# hold CET_ID as a float:
+def assert_outputs_match(outputs, expected_outputs, rtol=1e-9):
+    outputs = outputs.astype({'CET_ID' : 'int64'}).sort_values('CET_ID').reset_index(drop=True)
+    expected_outputs = expected_outputs.astype({'CET_ID' : 'int64'}).sort_values('CET_ID').reset_index(drop=True)
+    assert list(outputs.columns) == list(expected_outputs.columns)
+    key_columns = [c for c in ['CET_ID','ProgramID','Qi'] if c in outputs.columns]
+    assert (outputs[key_columns].astype(str) == expected_outputs[key_columns].astype(str)).all().all()
+    pdt.assert_frame_equal(
+        outputs.drop(columns=key_columns).astype(float),
+        expected_outputs.drop(columns=key_columns).astype(float),
+        check_exact=False,
+        rtol=rtol,
+        atol=1e-12
+    )
+
+def test_avoided_electric_costs_match_per_measure(InputMeasures, AvoidedCostElectric, Settings, discount_factors):
+    expected = per_measure(mc.calculate_avoided_electric_costs, InputMeasures.data, AvoidedCostElectric, Settings, first_year, discount_factors)
+    outputs = vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+    assert_outputs_match(outputs, expected)
+
+def test_avoided_gas_costs_match_per_measure(InputMeasures, AvoidedCostGas, Settings, discount_factors):
+    expected = per_measure(mc.calculate_avoided_gas_costs, InputMeasures.data, AvoidedCostGas, Settings, first_year, discount_factors)
+    outputs = vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+    assert_outputs_match(outputs, expected)
+
+def test_avoided_costs_match_per_measure_in_small_batches(InputMeasures, AvoidedCostElectric, AvoidedCostGas, Settings, discount_factors):
+    assert_outputs_match(
+        vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors, batch_size=7),
+        vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+    )
+    assert_outputs_match(
+        vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors, batch_size=7),
+        vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+    )
+
+def test_avoided_costs_ignore_cumulative_sums_of_tables(InputMeasures, AvoidedCostElectric, AvoidedCostGas, Settings, discount_factors):
+    # cumulative sums attached to a table are only used when selected:
+    expected_electric = vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors)
+    expected_gas = vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors)
+    AvoidedCostElectric.cumulative_avoided_costs = object()
+    AvoidedCostGas.cumulative_avoided_costs = object()
+    assert_outputs_match(vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors), expected_electric)
+    assert_outputs_match(vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors), expected_gas)
+
+def test_avoided_costs_of_measures_without_avoided_costs_are_zero(InputMeasures, AvoidedCostElectric, Settings, discount_factors):
+    measures = InputMeasures.data.assign(ClimateZone='99')
+    outputs = vc.calculate_avoided_electric_costs(Table(measures), AvoidedCostElectric, Settings, first_year, discount_factors)
+    assert len(outputs.index) == len(measures.index)
+    assert (outputs.drop(columns=['CET_ID','ProgramID','Qi']) == 0).all().all()
+
+def test_measures_cover_negative_savings_unknown_keys_and_windows_off_the_end(measures):
+    # the cases the array-based calculations must reproduce:
+    assert (measures[['kWh1','kWh2','kW1','kW2','Therm1','Therm2']] < 0).any().all()
+    assert (measures[electric_lookup_key].apply(tuple, axis='columns') == missing_electric_key).any()
+    assert (measures[gas_lookup_key].apply(tuple, axis='columns') == missing_gas_key).any()
+    assert (np.trunc(measures.Qi + measures.EULq) > last_avoided_cost_year * 4).any()
+
+def test_avoided_electric_costs_by_lookup_key_match_per_measure(InputMeasures, AvoidedCostElectric, Settings, discount_factors):
+    expected = per_measure(mc.calculate_avoided_electric_costs, InputMeasures.data, AvoidedCostElectric, Settings, first_year, discount_factors)
+    for batch_size in [10000, 3]:
+        outputs = vc.calculate_avoided_electric_costs_by_lookup_key(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors, batch_size)
+        assert_outputs_match(outputs, expected)
+
+def test_avoided_gas_costs_by_lookup_key_match_per_measure(InputMeasures, AvoidedCostGas, Settings, discount_factors):
+    expected = per_measure(mc.calculate_avoided_gas_costs, InputMeasures.data, AvoidedCostGas, Settings, first_year, discount_factors)
+    for batch_size in [10000, 3]:
+        outputs = vc.calculate_avoided_gas_costs_by_lookup_key(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors, batch_size)
+        assert_outputs_match(outputs, expected)
+
+def test_avoided_costs_by_lookup_key_of_unknown_keys_are_zero(InputMeasures, AvoidedCostElectric, AvoidedCostGas, Settings, discount_factors):
+    measures = Table(InputMeasures.data.assign(ClimateZone='99', GasSavingsProfile='NONE'))
+    for outputs in [
+            vc.calculate_avoided_electric_costs_by_lookup_key(measures, AvoidedCostElectric, Settings, first_year, discount_factors),
+            vc.calculate_avoided_gas_costs_by_lookup_key(measures, AvoidedCostGas, Settings, first_year, discount_factors),
+        ]:
+        assert list(outputs.CET_ID) == list(measures.data.CET_ID)
+        assert (outputs.drop(columns=['CET_ID','ProgramID','Qi']) == 0).all().all()
+
+def test_emissions_reductions_match_per_measure(InputMeasures, AvoidedCostElectric, Emissions, CombustionTypes, Settings):
+    expected = per_measure(mc.calculate_emissions_reductions, InputMeasures.data, AvoidedCostElectric, Emissions, CombustionTypes, Settings)
+    for batch_size in [10000, 3]:
+        outputs = vc.calculate_emissions_reductions(InputMeasures, AvoidedCostElectric, Emissions, CombustionTypes, Settings, batch_size)
+        assert_outputs_match(outputs, expected)
+
+@pytest.fixture
+def cost_test_inputs(InputMeasures, InputPrograms, AvoidedCostElectric, AvoidedCostGas, Settings, discount_factors):
+    # measures with their avoided costs, and programs with summed benefits, as
+    #     built in 'calc':
+    measures = InputMeasures.data.merge(
+        vc.calculate_avoided_electric_costs(InputMeasures, AvoidedCostElectric, Settings, first_year, discount_factors),
+        on=['CET_ID','ProgramID','Qi']
+    ).merge(
+        vc.calculate_avoided_gas_costs(InputMeasures, AvoidedCostGas, Settings, first_year, discount_factors),
+        on=['CET_ID','ProgramID','Qi']
+    )
+    benefit_sums = measures[[
+        'ProgramID','Qi','ElectricBenefitsGross','ElectricBenefitsNet','GasBenefitsGross','GasBenefitsNet'
+    ]].assign(Count=1).groupby(['ProgramID','Qi']).aggregate('sum')
+    programs = InputPrograms.data.merge(benefit_sums, on=['ProgramID','Qi'])
+    return measures, programs
+
+@pytest.mark.parametrize('cost_test', ['total_resource_cost_test','program_administrator_cost_test'])
+def test_cost_tests_match_per_measure(cost_test, cost_test_inputs, Settings, discount_factors):
+    measures, programs = cost_test_inputs
+    # per measure, program costs are discounted for every measure:
+    expected = per_measure(getattr(mc, cost_test), measures, programs, Settings, first_year, discount_factors)
+    program_costs = ProgramCosts(measures, programs, Settings, first_year, discount_factors)
+    assert_outputs_match(
+        per_measure(getattr(mc, cost_test), measures, programs, Settings, first_year, discount_factors, program_costs=program_costs),
+        expected
+    )
+    assert_outputs_match(getattr(vc, cost_test)(measures, programs, Settings, first_year, discount_factors), expected)
+    assert_outputs_match(getattr(vc, cost_test)(measures, programs, Settings, first_year, discount_factors, program_costs), expected)
+
+def test_ratepayer_impact_measure_matches_per_measure(cost_test_inputs, RateScheduleElectric, RateScheduleGas, Settings, discount_factors):
+    measures, programs = cost_test_inputs
+    measures = measures.merge(
+        vc.program_administrator_cost_test(measures, programs, Settings, first_year, discount_factors),
+        on='CET_ID'
+    )
+    # measures of target sectors without rates, other than the rates for all
+    #     target sectors:
+    measures.loc[measures.index[:5], ['ElectricTargetSector','GasTargetSector']] = 'IND'
+    expected = per_measure(mc.ratepayer_impact_measure, measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, discount_factors)
+    for batch_size in [10000, 3]:
+        outputs = vc.ratepayer_impact_measure(measures, RateScheduleElectric, RateScheduleGas, Settings, first_year, discount_factors, batch_size)
+        assert_outputs_match(outputs, expected)
@@ -0,0 +1,178 @@
+import sqlite3, threading
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+pytest.importorskip('pyodbc')
+import models
+from table_schemas import TableSchema
+
+# helper function opening sqlite3 connections to a shared in-memory database,
+# standing in for edcs through a connection pool's 'connect' function:
+def sqlite_connect(database):
+    return lambda: sqlite3.connect(
+        'file:{}?mode=memory&cache=shared'.format(database),
+        uri=True,
+        check_same_thread=False
+    )
+
+@pytest.fixture
+def connect(request):
+    connect = sqlite_connect(request.node.name)
+    # the shared database lasts while a connection to it is open:
+    keep_alive = connect()
+    keep_alive.execute('CREATE TABLE Measures (CET_ID INTEGER, LookupKey VARCHAR(255))')
+    keep_alive.executemany(
+        'INSERT INTO Measures VALUES (?, ?)',
+        [(cet_id, 'KEY{}'.format(cet_id % 5)) for cet_id in range(20)]
+    )
+    keep_alive.commit()
+    yield connect
+    keep_alive.close()
+
+@pytest.fixture
+def connection(connect):
+    connection = models.EDCS_Connection('', '', connection=connect(), dialect='sqlite')
+    yield connection
+    connection.close()
+
+def test_lookup_key_table_of_sql_server_uses_database_collation():
+    sql = models.EDCS_Connection.lookup_key_table_sql['mssql']
+    assert 'LookupKey VARCHAR(255) COLLATE DATABASE_DEFAULT PRIMARY KEY' in sql['create']
+    assert models.EDCS_Connection.lookup_key_table == sql['table']
+
+def test_fetch_sql_joins_on_pushed_lookup_keys(connection):
+    results = connection.fetch_sql(
+        'SELECT CET_ID FROM Measures WHERE LookupKey IN (SELECT LookupKey FROM {}) ORDER BY CET_ID'.format(connection.lookup_key_table),
+        lookup_keys=['KEY1','KEY3','KEY1']
+    )
+    assert list(results.CET_ID) == [1, 3, 6, 8, 11, 13, 16, 18]
+
+def test_lookup_key_table_is_dropped_after_each_query(connection):
+    for lookup_keys in [['KEY0'], ['KEY2','KEY4']]:
+        connection.fetch_sql('SELECT COUNT(*) AS Keys FROM {}'.format(connection.lookup_key_table), lookup_keys)
+    tables = connection.connection.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'").fetchall()
+    assert tables == []
+
+def test_lookup_key_table_is_dropped_after_a_failed_query(connection):
+    with pytest.raises(Exception):
+        connection.fetch_sql('SELECT Missing FROM {}'.format(connection.lookup_key_table), ['KEY0'])
+    tables = connection.connection.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'").fetchall()
+    assert tables == []
+
+@pytest.fixture
+def connection_pool(connect):
+    connection_pool = models.EDCS_ConnectionPool('', '', pool_size=2, connect=connect, dialect='sqlite')
+    yield connection_pool
+    connection_pool.close()
+
+def test_connection_pool_reuses_returned_connections(connection_pool):
+    with connection_pool.connection() as connection:
+        assert connection.dialect == 'sqlite'
+        assert connection.fetch_sql('SELECT COUNT(*) AS Measures FROM Measures').Measures[0] == 20
+    assert connection_pool.idle_connections == [connection]
+    with connection_pool.connection() as reused_connection:
+        assert reused_connection is connection
+        assert connection_pool.idle_connections == []
+
+def test_connection_pool_is_bounded_by_pool_size(connection_pool):
+    connections = [connection_pool.acquire() for _ in range(connection_pool.pool_size)]
+    assert len({id(connection) for connection in connections}) == connection_pool.pool_size
+
+    acquired = threading.Event()
+    def acquire():
+        connection_pool.release(connection_pool.acquire())
+        acquired.set()
+    waiting = threading.Thread(target=acquire)
+    waiting.start()
+    assert not acquired.wait(0.2)
+
+    connection_pool.release(connections.pop())
+    assert acquired.wait(5)
+    waiting.join()
+    for connection in connections:
+        connection_pool.release(connection)
+
+def test_connection_pool_replaces_connections_failing_health_check(connection_pool):
+    with connection_pool.connection() as connection:
+        pass
+    connection.connection.close()
+    assert not connection.is_healthy()
+    with connection_pool.connection() as replacement:
+        assert replacement is not connection
+        assert replacement.is_healthy()
+    assert connection_pool.idle_connections == [replacement]
+
+def test_connection_pool_releases_its_slot_if_a_connection_fails_to_open(connect):
+    def failing_connect():
+        raise sqlite3.OperationalError('unable to open database')
+    connection_pool = models.EDCS_ConnectionPool('', '', pool_size=1, connect=failing_connect, dialect='sqlite')
+    with pytest.raises(sqlite3.OperationalError):
+        connection_pool.acquire()
+    connection_pool.connect = connect
+    with connection_pool.connection() as connection:
+        assert connection.is_healthy()
+    connection_pool.close()
+
+def test_connection_pool_close_closes_idle_connections(connection_pool):
+    connections = [connection_pool.acquire() for _ in range(connection_pool.pool_size)]
+    for connection in connections:
+        connection_pool.release(connection)
+    connection_pool.close()
+    assert connection_pool.idle_connections == []
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.connection.execute('SELECT 1')
+
+@pytest.mark.parametrize('chunksize, chunk_lengths', [
+    (7, [7, 7, 6]),
+    (10, [10, 10]),
+    (20, [20]),
+    (25, [20]),
+])
+def test_fetch_sql_chunks_splits_results_at_chunk_boundaries(connection, chunksize, chunk_lengths):
+    sql_str = 'SELECT CET_ID, LookupKey FROM Measures ORDER BY CET_ID'
+    metrics = {}
+    chunks = list(connection.fetch_sql_chunks(sql_str, chunksize, metrics=metrics))
+    assert [len(chunk.index) for chunk in chunks] == chunk_lengths
+    pdt.assert_frame_equal(pd.concat(chunks, ignore_index=True), connection.fetch_sql(sql_str))
+    assert (metrics['rows'], metrics['chunks']) == (20, len(chunk_lengths))
+    assert metrics['seconds'] >= 0
+    assert metrics['rows_per_second'] == pytest.approx(metrics['rows'] / max(metrics['seconds'], 1e-9))
+
+def test_fetch_sql_chunks_of_empty_results_keep_their_columns(connection):
+    metrics = {}
+    chunks = list(connection.fetch_sql_chunks('SELECT CET_ID, LookupKey FROM Measures WHERE CET_ID < 0', 7, metrics=metrics))
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert list(chunks[0].columns) == ['CET_ID','LookupKey']
+    assert (metrics['rows'], metrics['chunks'], metrics['rows_per_second']) == (0, 0, 0.0)
+
+def test_fetch_sql_chunks_drops_lookup_keys_when_closed_early(connection):
+    chunks = connection.fetch_sql_chunks(
+        'SELECT CET_ID FROM Measures WHERE LookupKey IN (SELECT LookupKey FROM {})'.format(connection.lookup_key_table),
+        2,
+        lookup_keys=['KEY0','KEY1']
+    )
+    assert len(next(chunks).index) == 2
+    chunks.close()
+    tables = connection.connection.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'").fetchall()
+    assert tables == []
+
+@pytest.mark.parametrize('where, rows', [('', 20), ('WHERE CET_ID < 0', 0)])
+def test_query_results_combine_typed_chunks(connection_pool, where, rows):
+    schema = TableSchema({'CET_ID' : np.int64, 'LookupKey' : 'category'})
+    results = models.EDCS_Query_Results(
+        'SELECT CET_ID, LookupKey, 1 AS Unused FROM Measures {} ORDER BY CET_ID'.format(where),
+        '', '',
+        connection_pool=connection_pool,
+        schema=schema,
+        chunksize=7
+    )
+    assert list(results.data.columns) == ['CET_ID','LookupKey']
+    assert len(results.data.index) == rows
+    assert results.data.CET_ID.dtype == np.int64
+    assert isinstance(results.data.LookupKey.dtype, pd.CategoricalDtype)
+    assert results.fetch_metrics['rows'] == rows
+    assert results.fetch_metrics['chunks'] == -(-rows // 7)
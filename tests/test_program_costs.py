@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from program_costs import ProgramCosts, program_cost_columns, program_sum_columns
+from conftest import first_year, program_administrators
+
+@pytest.fixture
+def programs(InputPrograms, rng):
+    programs = InputPrograms.data.copy()
+    for column in program_sum_columns:
+        programs[column] = rng.uniform(1, 100, len(programs.index))
+    return programs
+
+def test_measures_share_programs_across_program_administrators(measures):
+    # so program costs are discounted at more than one rate:
+    assert (measures.groupby('ProgramID').ProgramAdministrator.nunique() == len(program_administrators)).all()
+
+def test_program_totals_match_discounted_sums(measures, programs, Settings, discount_factors):
+    program_costs = ProgramCosts(measures, programs, Settings, first_year, discount_factors)
+    assert len(program_costs.programs) == len(measures[['ProgramID','ProgramAdministrator']].drop_duplicates().index)
+    for (program_id, program_administrator), totals in program_costs.programs.items():
+        program = programs[programs.ProgramID == program_id]
+        discount_rate = Settings.data.DiscountRateQtr[Settings.data.ProgramAdministrator == program_administrator].iloc[0]
+        expected = (
+            program[program_cost_columns].sum(axis='columns') /
+            (1 + discount_rate) ** (program.Qi - first_year * 4)
+        ).sum()
+        assert totals.PresentValueProgramCosts == pytest.approx(expected, rel=1e-12)
+        for column in program_sum_columns:
+            assert totals[column] == pytest.approx(program[column].sum(), rel=1e-12)
+
+def test_discount_factors_are_built_from_settings_if_not_provided(measures, programs, Settings, discount_factors):
+    pd.testing.assert_frame_equal(
+        ProgramCosts(measures, programs, Settings, first_year).program_totals,
+        ProgramCosts(measures, programs, Settings, first_year, discount_factors).program_totals
+    )
+
+def test_programs_indexed_by_program_and_quarter_match(measures, programs, Settings, discount_factors):
+    pd.testing.assert_frame_equal(
+        ProgramCosts(measures, programs.set_index(['ProgramID','Qi']), Settings, first_year, discount_factors).program_totals,
+        ProgramCosts(measures, programs, Settings, first_year, discount_factors).program_totals
+    )
+
+def test_lookup_and_measure_totals_agree(measures, programs, Settings, discount_factors):
+    program_costs = ProgramCosts(measures, programs, Settings, first_year, discount_factors)
+    measure_totals = program_costs.measure_totals(measures)
+    assert list(measure_totals.index) == list(range(len(measures.index)))
+    for (_, measure), (_, totals) in zip(measures.iterrows(), measure_totals.iterrows()):
+        lookup = program_costs.lookup(measure)
+        assert np.allclose(totals[lookup.index].to_numpy(dtype=float), lookup.to_numpy(dtype=float), rtol=1e-12)
+
+def test_measure_totals_of_programs_without_costs_are_missing(measures, programs, Settings, discount_factors):
+    program_costs = ProgramCosts(measures, programs[programs.ProgramID != 'P1'], Settings, first_year, discount_factors)
+    measure_totals = program_costs.measure_totals(measures)
+    without_costs = (measures.ProgramID == 'P1').to_numpy()
+    assert without_costs.any()
+    assert measure_totals.PresentValueProgramCosts[without_costs].isna().all()
+    assert measure_totals.PresentValueProgramCosts[~without_costs].notna().all()
+    with pytest.raises(KeyError):
+        program_costs.lookup(measures[without_costs].iloc[0])
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import quarter_indices
+from quarter_indices import quarter_index
+
+def test_quarter_indices_of_labels():
+    labels = pd.Series(['2018Q1','2018Q4','2019Q2','2018Q1'])
+    indices = quarter_index(labels)
+    assert indices.dtype == np.int64
+    assert list(indices) == [8072, 8075, 8077, 8072]
+
+def test_quarter_indices_of_categorical_labels():
+    labels = pd.Series(['2020Q3','2018Q2','2020Q3'], dtype=pd.CategoricalDtype(['2018Q2','2020Q3','2021Q1']))
+    assert list(quarter_index(labels)) == [8082, 8073, 8082]
+
+def test_parsed_labels_are_cached():
+    quarter_index(pd.Series(['2031Q2']))
+    assert quarter_indices.parsed_quarter_indices['2031Q2'] == 4 * 2031 + 1
+
+def test_empty_labels_have_no_quarter_indices():
+    assert len(quarter_index(pd.Series([], dtype=object))) == 0
+
+def test_missing_labels_raise():
+    with pytest.raises(ValueError):
+        quarter_index(pd.Series(['2018Q1', None]))
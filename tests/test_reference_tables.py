@@ -0,0 +1,69 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import reference_tables as rt
+from conftest import avoided_cost_electric_data
+
+@pytest.fixture
+def categorical_avoided_cost_electric(rng):
+    # categories are sorted, unlike the order in which values first appear,
+    # as in tables typed by 'table_schemas':
+    data = avoided_cost_electric_data(rng)
+    data = data.astype({
+        'ProgramAdministrator' : 'category',
+        'ElectricTargetSector' : 'category',
+        'ElectricEndUse'       : 'category',
+        'ClimateZone'          : 'category',
+        'DSType'               : 'category',
+    })
+    return rt.AvoidedCostElectricTable(data)
+
+def shared_copy(table):
+    # pickled copies of a table in shared memory attach to its blocks:
+    table.share_memory()
+    return pickle.loads(pickle.dumps(table))
+
+def test_shared_memory_round_trip_keeps_categories(categorical_avoided_cost_electric):
+    table = categorical_avoided_cost_electric
+    try:
+        restored = shared_copy(table)
+        pdt.assert_frame_equal(restored.data, table.data)
+        assert (restored.data.DSType == 'kWh').sum() == (table.data.DSType == 'kWh').sum()
+        np.testing.assert_array_equal(restored.periods, table.periods)
+    finally:
+        table.release_shared_memory()
+
+def test_shared_memory_round_trip_encodes_other_columns(AvoidedCostElectric):
+    table = AvoidedCostElectric
+    try:
+        restored = shared_copy(table)
+        pdt.assert_frame_equal(restored.data, table.data, check_dtype=False, check_categorical=False)
+        assert isinstance(restored.data.DSType.dtype, pd.CategoricalDtype)
+    finally:
+        table.release_shared_memory()
+
+def test_shared_memory_columns_are_not_copied(categorical_avoided_cost_electric):
+    table = categorical_avoided_cost_electric
+    try:
+        restored = shared_copy(table)
+        for column, block in zip(restored.data.columns, restored.shared_memory_blocks):
+            values = restored.data[column].array
+            values = values.codes if isinstance(values, pd.Categorical) else values.to_numpy()
+            assert np.shares_memory(values, np.frombuffer(block.buf, dtype=np.uint8))
+    finally:
+        table.release_shared_memory()
+
+def test_filter_by_measure_after_round_trip(categorical_avoided_cost_electric, measures):
+    table = categorical_avoided_cost_electric
+    try:
+        restored = shared_copy(table)
+        for _, measure in measures.head(20).iterrows():
+            pdt.assert_frame_equal(
+                restored.filter_by_measure(measure).reset_index(drop=True),
+                table.filter_by_measure(measure).reset_index(drop=True)
+            )
+    finally:
+        table.release_shared_memory()
@@ -0,0 +1,65 @@
+import types
+import pandas.testing as pdt
+import pytest
+
+from slice_cache import SliceCache
+
+def test_get_counts_hits_and_misses():
+    slice_cache = SliceCache()
+    calls = []
+    filter_function = lambda: calls.append(1) or len(calls)
+    assert slice_cache.get('a', filter_function) == 1
+    assert slice_cache.get('a', filter_function) == 1
+    assert slice_cache.get('b', filter_function) == 2
+    assert (slice_cache.hits, slice_cache.misses) == (1, 2)
+    assert len(calls) == 2
+
+def test_least_recently_used_slices_are_removed():
+    slice_cache = SliceCache(max_entries=2)
+    slice_cache.get('a', lambda: 'a')
+    slice_cache.get('b', lambda: 'b')
+    slice_cache.get('a', lambda: 'a')
+    slice_cache.get('c', lambda: 'c')
+    assert list(slice_cache.entries) == ['a', 'c']
+
+def test_clear_keeps_counts():
+    slice_cache = SliceCache()
+    slice_cache.get('a', lambda: 'a')
+    slice_cache.get('a', lambda: 'a')
+    slice_cache.clear()
+    assert len(slice_cache.entries) == 0
+    assert (slice_cache.hits, slice_cache.misses) == (1, 1)
+
+def test_cached_slices_match_filtered_slices(measures, AvoidedCostElectric, RateScheduleElectric, Emissions):
+    for table in [AvoidedCostElectric, RateScheduleElectric, Emissions]:
+        expected = [table.filter_by_measure(measure) for _, measure in measures.iterrows()]
+        table.slice_cache = SliceCache()
+        for _ in range(2):
+            for (_, measure), rows in zip(measures.iterrows(), expected):
+                pdt.assert_frame_equal(table.filter_by_measure(measure), rows)
+        assert table.slice_cache.misses < len(measures.index)
+        assert table.slice_cache.hits + table.slice_cache.misses == 2 * len(measures.index)
+
+@pytest.mark.parametrize('memoize_slices, parallelize, cached', [
+    (True, False, True),
+    (True, True, False),
+    (False, False, False),
+])
+def test_slice_cache_is_only_set_up_for_serial_runs(memoize_slices, parallelize, cached, AvoidedCostElectric):
+    pytest.importorskip('dill')
+    pytest.importorskip('pyodbc')
+    run = pytest.importorskip('run')
+    cet_scenario = types.SimpleNamespace(
+        memoize_slices=memoize_slices,
+        parallelize=parallelize,
+        slice_cache_size=16,
+        reference_tables=lambda: [AvoidedCostElectric],
+    )
+    run.CET_Scenario.setup_slice_cache(cet_scenario)
+    assert (cet_scenario.SliceCache is not None) == cached
+    assert (AvoidedCostElectric.slice_cache is not None) == cached
+    if cached:
+        assert run.CET_Scenario.slice_cache_hits.fget(cet_scenario) == 0
+    else:
+        assert run.CET_Scenario.slice_cache_hits.fget(cet_scenario) is None
+        assert run.CET_Scenario.slice_cache_misses.fget(cet_scenario) is None
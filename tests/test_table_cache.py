@@ -0,0 +1,113 @@
+import os
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from table_cache import TableCache
+from conftest import Table, input_measures_data
+
+electric_lookup_key = ['ProgramAdministrator','ElectricTargetSector','ElectricEndUse','ClimateZone']
+
+# helper function to set the modification time of a file, as file system
+# times may not advance between writes in quick succession:
+def set_modified(path, nanoseconds):
+    os.utime(path, ns=(nanoseconds, nanoseconds))
+
+@pytest.fixture
+def table_cache(tmp_path):
+    return TableCache(str(tmp_path / 'cache'))
+
+@pytest.fixture
+def tables():
+    return [pd.DataFrame({'Qi' : range(100), 'Gen' : [float(i)] * 100}) for i in range(3)]
+
+def test_load_returns_stored_tables(table_cache, tables):
+    assert table_cache.load('missing') is None
+    table_cache.store('a', tables[0])
+    pdt.assert_frame_equal(table_cache.load('a'), tables[0])
+    table_cache.invalidate('a')
+    assert table_cache.load('a') is None
+
+def test_least_recently_used_tables_are_evicted(table_cache, tables):
+    table_cache.store('a', tables[0])
+    file_size = os.path.getsize(table_cache.path('a'))
+    table_cache.max_bytes = 2 * file_size
+    set_modified(table_cache.path('a'), 1)
+    table_cache.store('b', tables[1])
+    set_modified(table_cache.path('b'), 2)
+
+    # loading 'a' marks it as recently used, so 'b' is evicted by 'c':
+    table_cache.load('a')
+    table_cache.store('c', tables[2])
+    assert table_cache.load('b') is None
+    pdt.assert_frame_equal(table_cache.load('a'), tables[0])
+    pdt.assert_frame_equal(table_cache.load('c'), tables[2])
+
+def test_the_latest_table_is_kept_above_the_size_limit(table_cache, tables):
+    table_cache.max_bytes = 1
+    table_cache.store('a', tables[0])
+    table_cache.store('b', tables[1])
+    assert table_cache.load('a') is None
+    pdt.assert_frame_equal(table_cache.load('b'), tables[1])
+
+@pytest.fixture
+def InputMeasures(rng):
+    return Table(input_measures_data(rng))
+
+@pytest.fixture
+def csv_source(tmp_path):
+    source_name = str(tmp_path / 'E3AvoidedCostElecSeq2018.csv')
+    with open(source_name, 'w') as f:
+        f.write('PA,Qtr,Gen\nPGE,2018Q1,0.1\n')
+    set_modified(source_name, 10**18)
+    return source_name
+
+def test_cache_keys_of_csv_sources_change_with_the_file(table_cache, InputMeasures, csv_source):
+    tables = pytest.importorskip('tables')
+    cache_key = lambda: tables.avoided_cost_cache_key(table_cache, 'csv', 2018, csv_source, InputMeasures, electric_lookup_key)
+    original_key = cache_key()
+    assert cache_key() == original_key
+
+    # rewritten in place with contents of the same size:
+    with open(csv_source, 'w') as f:
+        f.write('PA,Qtr,Gen\nPGE,2018Q1,0.2\n')
+    set_modified(csv_source, 10**18)
+    assert cache_key() == original_key
+    set_modified(csv_source, 10**18 + 1)
+    modified_key = cache_key()
+    assert modified_key != original_key
+
+    # a different size, at the same modification time:
+    with open(csv_source, 'a') as f:
+        f.write('PGE,2018Q2,0.3\n')
+    set_modified(csv_source, 10**18 + 1)
+    assert cache_key() not in [original_key, modified_key]
+
+def test_cache_keys_include_the_avoided_cost_version_and_lookup_keys(table_cache, InputMeasures, csv_source, rng):
+    tables = pytest.importorskip('tables')
+    cache_key = lambda acc_version, InputMeasures: tables.avoided_cost_cache_key(table_cache, 'csv', acc_version, csv_source, InputMeasures, electric_lookup_key)
+    assert cache_key(2018, InputMeasures) != cache_key(2019, InputMeasures)
+    # the order of the input measures does not matter, but their keys do:
+    assert cache_key(2018, InputMeasures) == cache_key(2018, Table(InputMeasures.data.iloc[::-1]))
+    assert cache_key(2018, InputMeasures) != cache_key(2018, Table(InputMeasures.data.assign(ClimateZone='99')))
+
+def test_cache_keys_of_database_sources_change_with_the_checksum(table_cache, InputMeasures, monkeypatch):
+    tables = pytest.importorskip('tables')
+    source = {'Count' : 100, 'Checksum' : 12345}
+    queries = []
+    class Query_Results:
+        def __init__(self, sql_str, uid, passwd, connection_pool=None):
+            queries.append(sql_str)
+            self.data = pd.DataFrame({'Count' : [source['Count']], 'Checksum' : [source['Checksum']]})
+    monkeypatch.setattr(tables, 'EDCS_Query_Results', Query_Results)
+    user = {'id' : '', 'passwd' : ''}
+    cache_key = lambda: tables.avoided_cost_cache_key(table_cache, 'database', 2018, 'E3AvoidedCostElecSeq2018', InputMeasures, electric_lookup_key, user)
+
+    original_key = cache_key()
+    assert cache_key() == original_key
+    assert queries[0] == 'SELECT COUNT(*) AS Count, CHECKSUM_AGG(BINARY_CHECKSUM(*)) AS Checksum FROM E3AvoidedCostElecSeq2018'
+    source['Checksum'] = 54321
+    updated_key = cache_key()
+    assert updated_key != original_key
+    source['Count'] = 101
+    assert cache_key() not in [original_key, updated_key]